@@ -0,0 +1,57 @@
+# Canonical hashing benchmark
+# Compares the original per-record path (stable_stringify + sha256) with
+# canonical_json and with hash_credentials_batch across a process pool.
+# Run from projects/cred_contracts:  python -m bench.bench_hash --count 100000 --workers 4
+import argparse
+import hashlib
+import os
+import random
+import time
+
+from src.util import canonical_json, hash_credentials_batch, stable_stringify
+
+def make_credentials(count, seed=1018):
+    """Deterministic synthetic student records"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "type": "EducationCredential",
+            "credentialId": f"edu-{seed}-{i}",
+            "issuer": "university-abc",
+            "subject": f"student-{rng.randrange(10**9)}",
+            "claim": {
+                "degree": rng.choice(["BSc", "MSc", "PhD"]),
+                "major": rng.choice(["Computer Science", "Biology", "History", "Economics"]),
+                "gpa": round(rng.uniform(2.0, 4.0), 2),
+                "courses": [f"C{rng.randrange(1000)}" for _ in range(5)],
+            },
+            "issuedAt": "2025-06-01T00:00:00Z",
+            "expiresAt": None,
+        }
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    digests = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:8.3f}s  {count / elapsed:12,.0f} records/s")
+    return digests
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark canonical credential hashing")
+    p.add_argument("--count", type=int, default=100_000)
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    a = p.parse_args()
+
+    creds = list(make_credentials(a.count))
+    reference = timed("stable_stringify (reference)", a.count,
+                      lambda: [hashlib.sha256(stable_stringify(c).encode()).digest() for c in creds])
+    single = timed("canonical_json", a.count,
+                   lambda: [hashlib.sha256(canonical_json(c).encode()).digest() for c in creds])
+    batch = timed(f"hash_credentials_batch x{a.workers}", a.count,
+                  lambda: list(hash_credentials_batch(creds, workers=a.workers)))
+
+    assert reference == single == batch, "digests differ from the reference encoder"
+    print("all digests identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# In-process stand-in for algod
+# Lets the throughput suite run the client side of the system (Submitter,
+# CredentialVerifier, the deploy_localnet call paths) without a node. Sent groups
+# wait in a pool; every round_time seconds a round commits up to block_capacity
+# pooled transactions, and each committed registry call is applied to an in-memory
+# box store by a Python model of the contract (issue, issue_with_nft, issue_batch,
+# revoke, revoke_batch, sweep). Signatures and TEAL are not evaluated, so this
+# measures the client pipeline against a realistic round cadence; use LocalNet
+# (or bench/profile_app.py) for on-chain costs.
+import base64
+import threading
+from collections import deque
+
+from algosdk import encoding, transaction
+from algosdk.error import AlgodHTTPError
+
+from src import methods, revocation
+from src.record import COMPACT_OFFSETS, CompactRecord, issuer_key, iter_batch_records, iter_cred_ids
+
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+
+
+class LocalChain:
+    """The subset of AlgodClient used by the client code, backed by in-memory state"""
+
+    def __init__(self, admin, app_id=1, round_time=2.8, block_capacity=10_000):
+        self.admin = admin
+        self.app_id = app_id
+        self.round_time = round_time
+        self.block_capacity = block_capacity
+        self.boxes = {}
+        self._pool = deque()
+        self._blocks = {}
+        self._confirmed = {}  # txid -> round
+        self._rejected = {}   # txid -> error
+        self._round = 1
+        self._serial = 0
+        self._next_asset = 1000
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._tick_loop, name="localchain", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join()
+
+    # --- rounds ------------------------------------------------------------
+
+    def _tick_loop(self):
+        while not self._stop.wait(self.round_time):
+            self._commit()
+
+    def _commit(self):
+        with self._cond:
+            rnd, txids, room = self._round + 1, [], self.block_capacity
+            while self._pool and len(self._pool[0]) <= room:
+                group = self._pool.popleft()
+                room -= len(group)
+                ids = [stx.get_txid() for stx in group]
+                if any(rnd > stx.transaction.last_valid_round for stx in group):
+                    continue  # expired in the pool; the sender resubmits
+                try:
+                    for stx in group:
+                        self._apply(stx.transaction)
+                except Exception as e:
+                    for txid in ids:
+                        self._rejected[txid] = f"logic eval error: {e}"
+                    continue
+                txids += ids
+                self._confirmed.update((txid, rnd) for txid in ids)
+            self._blocks[rnd] = txids
+            self._round = rnd
+            self._cond.notify_all()
+
+    # --- contract model ----------------------------------------------------
+
+    def _write(self, cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer, nft_asa_id):
+        self._serial += 1
+        self.boxes[cred_id] = bytearray(CompactRecord.encode(
+            subject, schema_code, cred_hash, int(self._round * self.round_time), expires_at, False,
+            cid_pointer, nft_asa_id, self._serial,
+        ))
+
+    def _apply(self, txn):
+        if not isinstance(txn, transaction.ApplicationCallTxn) or txn.index != self.app_id:
+            return
+        name, values = methods.decode_args(txn.app_args)
+        if name == "issue":
+            cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer, nft_asa_id = values
+            self._write(cred_id.encode(), encoding.decode_address(subject), schema_code, cred_hash, expires_at,
+                        cid_pointer, nft_asa_id)
+        elif name == "issue_with_nft":
+            cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer = values
+            self._next_asset += 1
+            self._write(cred_id.encode(), encoding.decode_address(subject), schema_code, cred_hash, expires_at,
+                        cid_pointer, self._next_asset)
+        elif name == "issue_batch":
+            for cred_id, f in iter_batch_records(values[0]):
+                self._write(cred_id, f["subject"], f["schema_code"], f["cred_hash"], f["expires_at"],
+                            f["cid_pointer"], f["nft_asa_id"])
+        elif name == "revoke":
+            self.boxes[values[0].encode()][COMPACT_OFFSETS["revoked"]] = 1
+        elif name == "revoke_batch":
+            page, bits = values
+            box = self.boxes.setdefault(revocation.page_name(page), bytearray(revocation.PAGE_BYTES))
+            for i in range(0, len(bits), revocation.OFFSET_SIZE):
+                bit = int.from_bytes(bits[i:i + revocation.OFFSET_SIZE], "big")
+                box[bit // 8] |= 0x80 >> (bit % 8)
+        elif name == "sweep":
+            for cred_id in iter_cred_ids(values[0]):
+                del self.boxes[cred_id]
+
+    # --- algod subset ------------------------------------------------------
+
+    def status(self):
+        return {"last-round": self._round}
+
+    def status_after_block(self, block_num):
+        with self._cond:
+            self._cond.wait_for(lambda: self._round > block_num or self._stop.is_set(), timeout=self.round_time * 4)
+            return {"last-round": self._round}
+
+    def get_block_txids(self, block_num):
+        return {"blockTxids": self._blocks.get(block_num, [])}
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(
+            0, self._round, self._round + 1000, GENESIS_HASH, "localchain", min_fee=1000,
+        )
+
+    def send_transactions(self, stxns):
+        stxns = list(stxns)
+        if self._round > stxns[0].transaction.last_valid_round:
+            raise AlgodHTTPError("txn dead: round outside of validity window", 400)
+        with self._cond:
+            self._pool.append(stxns)
+        return stxns[0].get_txid()
+
+    def send_transaction(self, stxn):
+        return self.send_transactions([stxn])
+
+    def pending_transaction_info(self, txid):
+        return {"confirmed-round": self._confirmed.get(txid, 0), "pool-error": self._rejected.get(txid, "")}
+
+    def application_box_by_name(self, app_id, name):
+        value = self.boxes.get(bytes(name)) if app_id == self.app_id else None
+        if value is None:
+            raise AlgodHTTPError("box not found", 404)
+        return {"name": base64.b64encode(name).decode(), "value": base64.b64encode(bytes(value)).decode()}
+
+    def application_info(self, app_id):
+        state = [{"key": base64.b64encode(issuer_key(0)).decode(),
+                  "value": {"type": 1, "bytes": base64.b64encode(encoding.decode_address(self.admin)).decode()}}]
+        return {"id": app_id, "params": {"creator": self.admin, "global-state": state}}
@@ -0,0 +1,258 @@
+# Contract cost profiler
+# Deploys a throwaway copy of the registry on LocalNet, then runs every router
+# method through algod's simulate endpoint and records opcode cost, box I/O,
+# box MBR and fees per call. Batch calls are simulated together with the budget
+# calls they are submitted with, so their txns and fee include them. Results are
+# written as JSON; with --baseline the run fails when any metric grows by more
+# than --threshold over the stored report.
+# Run from projects/cred_contracts:
+#   python -m bench.profile_app --out artifacts/costs.json
+#   python -m bench.profile_app --baseline bench/baseline_costs.json --threshold 0.05
+#   python -m bench.profile_app --out bench/baseline_costs.json  (refresh the baseline after an intended change)
+import argparse
+import base64
+import json
+import sys
+
+from algosdk import encoding, transaction
+from algosdk.logic import get_application_address
+from algosdk.v2client import models
+
+from src import merkle, methods, migrate, record, revocation
+from src.artifact_cache import get_programs, teal_key
+from src.deploy_localnet import NET, get_deployer_account
+
+# Metrics compared against the baseline; lower is better for all of them
+METRICS = ("opcode_cost", "box_bytes_written", "box_io_budget", "mbr", "fee")
+
+BOX_FLAT_MBR = 2500    # microAlgos per box
+BOX_BYTE_MBR = 400     # microAlgos per byte of box name + value
+BOX_IO_PER_REF = 1024  # bytes of box I/O each box reference buys
+ASSET_MBR = 100_000    # microAlgos per asset created by the app account
+
+EXISTING = "profile-existing"
+BATCH_ID = b"profile-batch"
+BATCH_LEAVES = 16
+REVOKED = [f"profile-revoked-{n}" for n in range(8)]  # swept by the sweep scenarios
+
+
+def make_record(cred_id, subject, n=0):
+    return record.encode_batch_record(
+        cred_id.encode(), encoding.decode_address(subject), 2,
+        bytes([n % 256]) * 32, 0, bytes(32), 1000 + n,
+    )
+
+
+def send(sk, txns):
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    txid = NET.algod.send_transactions([t.sign(sk) for t in txns])
+    return transaction.wait_for_confirmation(NET.algod, txid, 4)
+
+
+def setup(sk, addr):
+    """Create the app plus the state that revoke/get/verify_proof calls need"""
+    approval, clear = get_programs(NET.algod)
+    sp = NET.suggested_params()
+    res = send(sk, [transaction.ApplicationCreateTxn(
+        addr, sp,
+        on_complete=transaction.OnComplete.NoOpOC.real,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=transaction.StateSchema(methods.GLOBAL_UINTS, methods.GLOBAL_BYTES),
+        local_schema=transaction.StateSchema(0, 0),
+        extra_pages=(len(approval) + len(clear) - 1) // 2048,
+    )])
+    app_id = res["application-index"]
+    send(sk, [transaction.PaymentTxn(addr, sp, get_application_address(app_id), 10_000_000)])
+    send(sk, [methods.app_call(app_id, addr, sp, "issue_batch", make_record(EXISTING, addr), boxes=[EXISTING.encode()])])
+    send(sk, methods.with_budget([methods.app_call(
+        app_id, addr, sp, "issue_batch", b"".join(make_record(c, addr, n) for n, c in enumerate(REVOKED)),
+        boxes=[c.encode() for c in REVOKED],
+    )], app_id, addr, sp, methods.call_cost("issue_batch", len(REVOKED))))
+    send(sk, [methods.app_call(app_id, addr, sp, "revoke", c, boxes=[c.encode()]) for c in REVOKED])
+    tree = merkle.MerkleTree([bytes([n]) * 32 for n in range(BATCH_LEAVES)])
+    send(sk, [methods.app_call(
+        app_id, addr, sp, "anchor_root", BATCH_ID.decode(), tree.root, 2, BATCH_LEAVES,
+        boxes=[merkle.root_name(BATCH_ID)],
+    )])
+    return app_id, tree
+
+
+def scenarios(app_id, addr, tree):
+    """name -> list of (method, args, box names) for one group"""
+    new_ids = [f"profile-new-{n}" for n in range(8)]
+    page, bit = revocation.locate(1)  # the setup credential got serial 1
+    bits = range(revocation.MAX_BITS_PER_CALL)
+    return {
+        "issue": [("issue", [
+            "profile-new", addr, 2, bytes(32), 0, b"", 1000,
+        ], [b"profile-new"])],
+        "issue_with_nft": [("issue_with_nft", [
+            "profile-nft", addr, 2, bytes(32), 0, b"",
+        ], [b"profile-nft"])],
+        "issue_batch_x8": [(
+            "issue_batch", [b"".join(make_record(c, addr, n) for n, c in enumerate(new_ids))],
+            [c.encode() for c in new_ids],
+        )],
+        "migrate_x8": [(
+            "migrate", [b"".join(
+                migrate.encode_migrate_entry(c.encode(), record.CompactRecord.encode(
+                    encoding.decode_address(addr), 2, bytes(32), 100, 0, False, b"", 1000 + n))
+                for n, c in enumerate(new_ids)
+            )],
+            [c.encode() for c in new_ids],
+        )],
+        "revoke": [("revoke", [EXISTING], [EXISTING.encode()])],
+        "revoke_batch_x1": [(
+            "revoke_batch", [page, bit.to_bytes(revocation.OFFSET_SIZE, "big")],
+            [revocation.page_name(page)],
+        )],
+        f"revoke_batch_x{revocation.MAX_BITS_PER_CALL}": [(
+            "revoke_batch", [page, b"".join(b.to_bytes(revocation.OFFSET_SIZE, "big") for b in bits)],
+            [revocation.page_name(page)],
+        )],
+        "anchor_root": [(
+            "anchor_root", ["profile-batch-2", tree.root, 2, BATCH_LEAVES],
+            [merkle.root_name(b"profile-batch-2")],
+        )],
+        f"verify_proof_depth{merkle.depth(BATCH_LEAVES)}": [(
+            "verify_proof", [BATCH_ID.decode(), bytes([3]) * 32, 3, b"".join(tree.proof(3))],
+            [merkle.root_name(BATCH_ID)],
+        )],
+        "sweep_x1": [("sweep", [record.pack_cred_ids([REVOKED[0].encode()])], [REVOKED[0].encode()])],
+        "sweep_x8": [(
+            "sweep", [record.pack_cred_ids(c.encode() for c in REVOKED)],
+            [c.encode() for c in REVOKED],
+        )],
+        "verify": [("verify", [EXISTING, bytes(32)], [EXISTING.encode(), revocation.page_name(page)])],
+        "verify_batch_x7": [(
+            "verify_batch", [b"".join(
+                bytes([len(c)]) + c.encode() + bytes([n]) * 32 for n, c in enumerate([EXISTING] + REVOKED[1:7])
+            )],
+            [EXISTING.encode(), revocation.page_name(page)] + [c.encode() for c in REVOKED[1:7]],
+        )],
+        "get": [("get", [EXISTING], [EXISTING.encode()])],
+        "get_nft": [("get_nft", [EXISTING], [EXISTING.encode()])],
+    }
+
+
+def batch_items(name, args, boxes):
+    """Entries packed into one batch-method call, for its opcode cost estimate"""
+    if name == "revoke_batch":
+        return len(args[1]) // revocation.OFFSET_SIZE
+    if name == "verify_batch":
+        return sum(1 for box in boxes if not box.startswith(revocation.PAGE_PREFIX))
+    return len(boxes)
+
+
+def box_exists(app_id, name):
+    try:
+        NET.algod.application_box_by_name(app_id, name)
+        return True
+    except Exception as e:
+        if getattr(e, "code", None) == 404:
+            return False
+        raise
+
+
+def simulate(app_id, addr, calls):
+    """Simulate one group of app calls, topped up with budget calls, and return its cost metrics"""
+    sp = NET.suggested_params()
+    cost = sum(
+        methods.call_cost(name, batch_items(name, args, boxes))
+        for name, args, boxes in calls if name in methods.CALL_COSTS
+    )
+    txns = methods.with_budget(
+        [methods.app_call(app_id, addr, sp, name, *args, boxes=boxes) for name, args, boxes in calls],
+        app_id, addr, sp, cost,
+    )
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    request = models.SimulateRequest(
+        txn_groups=[models.SimulateRequestTransactionGroup(txns=[transaction.SignedTransaction(t, None) for t in txns])],
+        allow_empty_signatures=True,
+        exec_trace_config=models.SimulateTraceConfig(enable=True, state_change=True),
+    )
+    group = NET.algod.simulate_transactions(request)["txn-groups"][0]
+    if group.get("failure-message"):
+        raise RuntimeError(f"simulate failed at {group.get('failed-at')}: {group['failure-message']}")
+
+    # last write to each box in the trace holds its final value
+    written = {}
+    for result in group["txn-results"]:
+        for step in result.get("exec-trace", {}).get("approval-program-trace", []):
+            for change in step.get("state-changes", []):
+                if change.get("app-state-type") == "b" and change.get("operation") == "w":
+                    written[base64.b64decode(change["key"])] = base64.b64decode(change["new-value"].get("bytes", ""))
+    created = {name: value for name, value in written.items() if not box_exists(app_id, name)}
+    assets = sum(
+        1 for result in group["txn-results"]
+        for inner in result["txn-result"].get("inner-txns", []) if inner.get("asset-index")
+    )
+    box_refs = sum(len(boxes) for _, _, boxes in calls)
+    return {
+        "txns": len(txns),
+        "opcode_cost": group.get("app-budget-consumed", 0),
+        "box_refs": box_refs,
+        "box_io_budget": box_refs * BOX_IO_PER_REF,
+        "box_bytes_written": sum(len(value) for value in written.values()),
+        "mbr": sum(BOX_FLAT_MBR + BOX_BYTE_MBR * (len(name) + len(value)) for name, value in created.items())
+               + assets * ASSET_MBR,
+        "fee": sum(t.fee for t in txns),
+    }
+
+
+def compare(baseline, current, threshold):
+    """Return human-readable regressions of current over baseline"""
+    regressions = []
+    for method, costs in current["methods"].items():
+        before = baseline["methods"].get(method)
+        if before is None:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric, 0), costs.get(metric, 0)
+            if new > old * (1 + threshold):
+                change = f"+{(new - old) / old:.1%}" if old else "new cost"
+                regressions.append(f"{method}.{metric}: {old} -> {new} ({change})")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Profile opcode cost, box I/O, MBR and fees of every contract method")
+    p.add_argument("--out", metavar="FILE", help="Write the JSON report here (default: stdout)")
+    p.add_argument("--baseline", metavar="FILE", help="Fail if any metric regresses against this report")
+    p.add_argument("--threshold", type=float, default=0.05, help="Allowed relative growth per metric (default 0.05)")
+    a = p.parse_args()
+
+    account = get_deployer_account()
+    app_id, tree = setup(account.private_key, account.address)
+    report = {"teal_key": teal_key(), "methods": {}}
+    for method, calls in scenarios(app_id, account.address, tree).items():
+        report["methods"][method] = costs = simulate(app_id, account.address, calls)
+        print(f"{method:<24} {costs['opcode_cost']:6} ops  {costs['box_bytes_written']:6} B written  "
+              f"{costs['mbr']:8} MBR  {costs['fee']:6} fee", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if a.out:
+        with open(a.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if a.baseline:
+        with open(a.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("teal_key") != report["teal_key"]:
+            print(f"WARNING {a.baseline} was measured on TEAL {baseline.get('teal_key')}, current is "
+                  f"{report['teal_key']}; refresh it with --out in the commit that changes the contract", file=sys.stderr)
+        regressions = compare(baseline, report, a.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {a.threshold:.0%} against {a.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# End-to-end throughput benchmark
+# Generates a seeded synthetic corpus (documents hashed with util.hash_credential),
+# then drives issuance, verification and revocation through the real client code
+# against LocalNet or the in-process stand-in (bench/localchain.py):
+#   issue_single / revoke_single - one call per credential through deploy_localnet's
+#                                  call_issue / call_revoke (the baseline)
+#   issue_batch / revoke_batch   - packed groups streamed through a Submitter
+#   verify                       - CredentialVerifier lookups, cold cache
+# Each scenario reports p50/p95/p99 latency, operations and confirmations per
+# second and transactions per round; results are written as JSON and can be
+# compared against an earlier run.
+# Run from projects/cred_contracts:
+#   python -m bench.throughput --backend standin --count 2000 --out bench/throughput.json
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import account, encoding
+
+from bench.bench_hash import make_credentials
+from src import network, revocation, telemetry
+from src.builders import issue_batch_builder, pack_issue_calls, read_serial, revoke_batch_builder
+from src.deploy_localnet import NET, call_issue, call_revoke, make_submitter
+from src.methods import ISSUE_CALLS_PER_GROUP, MAX_GROUP_SIZE
+from src.util import hash_credential
+from src.verify import CredentialVerifier
+
+SCENARIOS = ("issue_batch", "verify", "revoke_batch", "issue_single", "revoke_single")
+
+# metric -> True when larger is better
+METRICS = {
+    "ops_per_s": True,
+    "confirmations_per_s": True,
+    "txns_per_round": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+
+def make_corpus(count, seed=1018):
+    """Deterministic credentials ready for issue: same seed, same cred_ids, subjects and hashes"""
+    rng = random.Random(seed)
+    corpus = []
+    for doc in make_credentials(count, seed):
+        subject = hashlib.sha256(f"{seed}:{doc['credentialId']}".encode()).digest()
+        corpus.append({
+            "cred_id": doc["credentialId"],
+            "subject": encoding.encode_address(subject),
+            "schema_code": 2,
+            "cred_hash": hash_credential(doc),
+            "expires_at": rng.choice([0, 2_000_000_000]),
+            "nft_asa_id": 0,
+            "document": doc,
+        })
+    return corpus
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, elapsed, txns=0, rounds=()):
+    lat = sorted(latencies)
+    out = {
+        "ops": len(lat),
+        "elapsed_s": round(elapsed, 3),
+        "ops_per_s": round(len(lat) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 2),
+        "p95_ms": round(percentile(lat, 95) * 1000, 2),
+        "p99_ms": round(percentile(lat, 99) * 1000, 2),
+    }
+    if txns:
+        spanned = max(rounds) - min(rounds) + 1
+        out.update({
+            "txns": txns,
+            "rounds": spanned,
+            "txns_per_round": round(txns / spanned, 2),
+            "confirmations_per_s": round(txns / elapsed, 2),
+        })
+    return out
+
+
+def run_groups(builders, concurrency):
+    """Submit (build, ops) pairs through one Submitter; each op's latency is its group's"""
+    latencies, rounds, txns = [], [], 0
+    started = time.perf_counter()
+    with make_submitter(concurrency) as submitter:
+        pending = []
+        for build, ops in builders:
+            submitted = time.perf_counter()
+            future = submitter.submit(build)
+            future.add_done_callback(lambda f, t=submitted, n=ops: latencies.extend([time.perf_counter() - t] * n))
+            pending.append(future)
+    for future in pending:
+        result = future.result()
+        txns += len(result["txids"])
+        rounds.append(result["confirmed-round"])
+    return summarize(latencies, time.perf_counter() - started, txns, rounds)
+
+
+def run_calls(fn, items, concurrency, confirmed_round=None):
+    """Run fn(item) on a thread pool, timing each call"""
+    def timed(item):
+        t = time.perf_counter()
+        result = fn(item)
+        return time.perf_counter() - t, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool, contextlib.redirect_stdout(io.StringIO()):
+        results = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - started
+    latencies = [lat for lat, _ in results]
+    if confirmed_round is None:
+        return summarize(latencies, elapsed)
+    rounds = [confirmed_round(result) for _, result in results]
+    return summarize(latencies, elapsed, len(results), rounds)
+
+
+def scenario_issue_batch(ctx):
+    app_id, addr = NET.app_id, NET.account.address
+    calls = pack_issue_calls(ctx["corpus"])
+    builders = []
+    while True:
+        group_calls = list(itertools.islice(calls, ISSUE_CALLS_PER_GROUP))
+        if not group_calls:
+            break
+        builders.append((issue_batch_builder(app_id, addr, group_calls), sum(map(len, group_calls))))
+    return run_groups(builders, ctx["concurrency"])
+
+
+def scenario_verify(ctx):
+    verifier = CredentialVerifier(NET.algod, NET.app_id, workers=ctx["concurrency"])
+    results = []
+
+    def verify(cred):
+        verdict = verifier.verify(cred["cred_id"], cred["document"])
+        results.append(verdict.valid)
+
+    metrics = run_calls(verify, ctx["corpus"], ctx["concurrency"])
+    metrics["valid"] = sum(results)
+    return metrics
+
+
+def scenario_revoke_batch(ctx):
+    app_id, addr = NET.app_id, NET.account.address
+    revoked = ctx["corpus"][::2]
+    with ThreadPoolExecutor(ctx["concurrency"]) as pool:
+        serials = list(pool.map(lambda c: read_serial(NET.algod, app_id, c["cred_id"]), revoked))
+    calls = revocation.pack_revoke_calls(serials)
+    builders = []
+    while True:
+        group_calls = list(itertools.islice(calls, MAX_GROUP_SIZE))
+        if not group_calls:
+            break
+        ops = sum(len(bits) // revocation.OFFSET_SIZE for _, bits in group_calls)
+        builders.append((revoke_batch_builder(app_id, addr, group_calls), ops))
+    return run_groups(builders, ctx["concurrency"])
+
+
+def _confirmed_round(txid):
+    return NET.algod.pending_transaction_info(txid)["confirmed-round"]
+
+
+def scenario_issue_single(ctx):
+    def issue(cred):
+        return call_issue(f"{cred['cred_id']}-single", cred["subject"], cred["schema_code"], cred["cred_hash"],
+                          cred["expires_at"], cred["nft_asa_id"])
+
+    return run_calls(issue, ctx["corpus"][:ctx["single"]], ctx["concurrency"], _confirmed_round)
+
+
+def scenario_revoke_single(ctx):
+    def revoke(cred):
+        return call_revoke(f"{cred['cred_id']}-single")
+
+    return run_calls(revoke, ctx["corpus"][:ctx["single"]], ctx["concurrency"], _confirmed_round)
+
+
+def compare(baseline, current, threshold):
+    """Return (report lines, regressions) of current against baseline"""
+    lines, regressions = [], []
+    for name, metrics in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            line = f"{name}.{metric}: {old} -> {new} ({change:+.1%})"
+            lines.append(line)
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(line)
+    return lines, regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Issue / verify / revoke throughput against LocalNet or an in-process chain")
+    p.add_argument("--backend", choices=("standin", "localnet"), default="standin",
+                   help="standin: in-process chain (bench/localchain.py); localnet: the deployed LocalNet app")
+    p.add_argument("--count", type=int, default=1000, help="Credentials in the corpus")
+    p.add_argument("--single", type=int, default=50, help="Credentials sent through the single-call baseline paths")
+    p.add_argument("--seed", type=int, default=1018)
+    p.add_argument("--concurrency", type=int, default=32, help="Groups in flight / concurrent calls")
+    p.add_argument("--round-time", type=float, default=2.8, help="Seconds per round of the stand-in")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset, run in this order")
+    p.add_argument("--out", metavar="FILE", help="Write the JSON results here (default: stdout)")
+    p.add_argument("--baseline", metavar="FILE", help="Compare against an earlier results file")
+    p.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    p.add_argument("--telemetry", metavar="SINK", help="Also record spans and metrics: jsonl:PATH, prom:PATH or otel")
+    a = p.parse_args()
+    telemetry.configure(a.telemetry)
+
+    chain = None
+    if a.backend == "standin":
+        from bench.localchain import LocalChain
+
+        deployer = network.Account(account.generate_account()[0])
+        chain = LocalChain(deployer.address, round_time=a.round_time)
+        NET.bind(algod=chain, account=deployer, app_id=chain.app_id)
+
+    ctx = {"corpus": make_corpus(a.count, a.seed), "single": a.single, "concurrency": a.concurrency}
+    report = {
+        "backend": a.backend,
+        "count": a.count,
+        "seed": a.seed,
+        "concurrency": a.concurrency,
+        "round_time": a.round_time if chain else None,
+        "started_at": int(time.time()),
+        "scenarios": {},
+    }
+    try:
+        for name in a.scenarios.split(","):
+            report["scenarios"][name] = metrics = globals()[f"scenario_{name}"](ctx)
+            print(f"{name:<14} {metrics['ops']:7} ops  {metrics['ops_per_s']:9.1f} ops/s  "
+                  f"p50 {metrics['p50_ms']:8.1f} ms  p95 {metrics['p95_ms']:8.1f} ms  p99 {metrics['p99_ms']:8.1f} ms  "
+                  f"{metrics.get('txns_per_round', '-')} txns/round", file=sys.stderr)
+    finally:
+        if chain is not None:
+            chain.close()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if a.out:
+        with open(a.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if a.baseline:
+        with open(a.baseline) as f:
+            lines, regressions = compare(json.load(f), report, a.threshold)
+        for line in lines:
+            print(("REGRESSION " if line in regressions else "") + line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
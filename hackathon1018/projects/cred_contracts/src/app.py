@@ -1,104 +1,523 @@
 from pyteal import *
+from .record import (
+    ADMIN_ISSUER_IDX, BATCH_TAIL_OFFSETS, BATCH_TAIL_SIZE, COMPACT_FIELDS, COMPACT_MAX_SIZE, COMPACT_OFFSETS,
+    COMPACT_SIZE, COMPACT_SIZES, COMPACT_VERSION, ISSUER_KEY_PREFIX, MAX_CID_SIZE, MAX_ISSUERS,
+)
+from .revocation import BITS_PER_PAGE, PAGE_BYTES, PAGE_PREFIX, OFFSET_SIZE
+from .merkle import ROOT_PREFIX, ROOT_SIZE, ROOT_OFFSETS
+from .methods import (
+    NFT_NAME_ID_CHARS, NFT_NAME_PREFIX, NFT_UNIT_NAME, NFT_URL_PREFIX, RETURN_PREFIX, SELECTORS, VERDICT_EXPIRED,
+    VERDICT_FOUND, VERDICT_HASH_MATCH, VERDICT_REVOKED,
+)
 
 # Multi-credential registry contract with NFT support
-# On-chain per credential (in app box by cred_id):
-# issuer_addr(32) | subject_addr(32) | schema_code(1) | cred_hash(32) | issued_at(8) | expires_at(8) | revoked(1) | cid_pointer(32) | nft_asa_id(8)
-# Total: 154 bytes (was 146 bytes)
+# On-chain per credential (in app box by cred_id), compact v3 layout defined in record.COMPACT_FIELDS:
+# version(1) | subject_addr(32) | schema_code(1) | cred_hash(32) | issued_at(8) | expires_at(8) | revoked(1) | nft_asa_id(8) | serial(8) | issuer_idx(1) | cid_pointer(0..32)
+# Total: 100 bytes plus the unpadded CID (v2 deployments stored 169-byte boxes, see record.FIELDS)
+# Issuer table (global state): ISSUER_KEY_PREFIX + byte(i) = address of issuer i; the creator is issuer 0
+# Revocation bitmap pages (see revocation.py): PAGE_PREFIX + itob(page), 1024 bytes each
+# Merkle batch roots (see merkle.py): ROOT_PREFIX + batch_id, root(32) | issuer(32) | schema_code(8) | issued_at(8) | leaf_count(8)
+# Calls are ARC-4: application_args[0] is a method selector (see methods.py), arguments are ARC-4 encoded
+
+# Schema codes: 1=visa, 2=education, 3=employment
+VISA_SCHEMA = Int(1)
+EDUCATION_SCHEMA = Int(2)
+EMPLOYMENT_SCHEMA = Int(3)
+
+# Last revocation serial handed out (global uint)
+next_serial = Bytes("next_serial")
+admin = Bytes("admin")
+issuer_count = Bytes("issuer_count")
+
+# Single-byte encodings of a uint64 (schema codes, issuer indexes)
+def byte_of(value):
+    return Extract(Itob(value), Int(7), Int(1))
+
+# ARC-4 string / byte[] argument without its 2-byte length prefix
+def dynamic_arg(i):
+    return Suffix(Txn.application_args[i], Int(2))
+
+# ARC-4 byte[] encoding (2-byte length prefix) of a value up to 64 KB
+def arc4_bytes(value):
+    return Concat(Extract(Itob(Len(value)), Int(6), Int(2)), value)
+
+# Log an ARC-4 method return value
+def arc4_return(encoded):
+    return Log(Concat(Bytes(RETURN_PREFIX), encoded))
+
+# Shared guard for every method that writes state
+@Subroutine(TealType.none)
+def require_admin():
+    return Assert(Txn.sender() == App.globalGet(admin))
+
+# Validate one credential and write its compact box (shared by issue and issue_batch)
+# A reissued cred_id replaces the old box, whose size may differ with the CID length,
+# and keeps its serial, so a bitmap revocation still covers the new record. A credential
+# whose revoked byte is set cannot be reissued; sweep it first. cred_ids never start
+# with a NUL byte, which PAGE_PREFIX and ROOT_PREFIX boxes reserve.
+@Subroutine(TealType.none)
+def write_credential(cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer, nft_asa_id):
+    serial = ScratchVar(TealType.uint64)
+    rec_len = BoxLen(cred_id)
+    values = {
+        "version": Bytes(bytes([COMPACT_VERSION])),
+        "subject": subject,
+        "schema_code": byte_of(schema_code),
+        "cred_hash": cred_hash,
+        "issued_at": Itob(Global.latest_timestamp()),
+        "expires_at": Itob(expires_at),
+        "revoked": Bytes("\x00"),
+        "nft_asa_id": nft_asa_id,
+        "serial": Itob(serial.load()),
+        "issuer_idx": Bytes(bytes([ADMIN_ISSUER_IDX])),  # only the admin issues
+    }
+    return Seq(
+        Assert(GetByte(cred_id, Int(0)) != Int(0)),  # reserved for revocation pages and merkle roots
+        Assert(Len(cred_hash) == Int(COMPACT_SIZES["cred_hash"])),  # hash must be 32 bytes
+        Assert(Len(subject) == Int(COMPACT_SIZES["subject"])),   # address must be 32 bytes
+        Assert(schema_code >= VISA_SCHEMA),  # valid schema code
+        Assert(schema_code <= EMPLOYMENT_SCHEMA),
+        Assert(Len(cid_pointer) <= Int(MAX_CID_SIZE)),  # CID pointer max 32 bytes, stored unpadded
+        Assert(Len(nft_asa_id) == Int(COMPACT_SIZES["nft_asa_id"])),  # NFT ASA ID must be exactly 8 bytes
+        rec_len,
+        If(rec_len.hasValue()).Then(Seq(
+            Assert(GetByte(BoxExtract(cred_id, Int(COMPACT_OFFSETS["revoked"]), Int(1)), Int(0)) == Int(0)),
+            serial.store(ExtractUint64(BoxExtract(cred_id, Int(COMPACT_OFFSETS["serial"]), Int(8)), Int(0))),
+            Pop(BoxDelete(cred_id)),
+        )).Else(Seq(
+            App.globalPut(next_serial, App.globalGet(next_serial) + Int(1)),  # serials start at 1
+            serial.store(App.globalGet(next_serial)),
+        )),
+        BoxPut(cred_id, Concat(*[values[name] for name, _ in COMPACT_FIELDS], cid_pointer)),  # 100..132 bytes
+    )
+
+# Mint the commemorative NFT of a credential from the app account; returns the new ASA id
+# The app account must hold 0.1 ALGO of extra balance per created asset.
+@Subroutine(TealType.uint64)
+def mint_nft(cred_id, cred_hash):
+    short_id = If(
+        Len(cred_id) > Int(NFT_NAME_ID_CHARS),
+        Extract(cred_id, Len(cred_id) - Int(NFT_NAME_ID_CHARS), Int(NFT_NAME_ID_CHARS)),
+        cred_id,
+    )
+    return Seq(
+        InnerTxnBuilder.Execute({
+            TxnField.type_enum: TxnType.AssetConfig,
+            TxnField.config_asset_total: Int(1),
+            TxnField.config_asset_decimals: Int(0),
+            TxnField.config_asset_default_frozen: Int(0),
+            TxnField.config_asset_unit_name: Bytes(NFT_UNIT_NAME),
+            TxnField.config_asset_name: Concat(Bytes(NFT_NAME_PREFIX), short_id),
+            TxnField.config_asset_url: Concat(Bytes(NFT_URL_PREFIX), cred_id),
+            TxnField.config_asset_metadata_hash: cred_hash,
+            TxnField.config_asset_manager: Txn.sender(),
+            TxnField.config_asset_reserve: Txn.sender(),
+            TxnField.config_asset_freeze: Txn.sender(),
+            TxnField.config_asset_clawback: Txn.sender(),
+            TxnField.fee: Int(0),  # paid by the outer call through fee pooling
+        }),
+        InnerTxn.created_asset_id(),
+    )
+
+# 1 if an existing credential has expired
+@Subroutine(TealType.uint64)
+def is_expired(cred_id):
+    expires_at = ScratchVar(TealType.uint64)
+    return Seq(
+        expires_at.store(ExtractUint64(BoxExtract(cred_id, Int(COMPACT_OFFSETS["expires_at"]), Int(8)), Int(0))),
+        And(expires_at.load() != Int(0), expires_at.load() < Global.latest_timestamp()),
+    )
+
+# 1 if an existing credential is revoked by its revoked byte or its bitmap bit
+# The bitmap page is read only when the revoked byte is clear, so the caller must
+# reference that page box for such credentials.
+@Subroutine(TealType.uint64)
+def is_revoked(cred_id):
+    serial = ScratchVar(TealType.uint64)
+    page = ScratchVar(TealType.bytes)
+    page_len = BoxLen(page.load())
+    return If(GetByte(BoxExtract(cred_id, Int(COMPACT_OFFSETS["revoked"]), Int(1)), Int(0)) == Int(1)).Then(
+        Int(1)
+    ).Else(Seq(
+        serial.store(ExtractUint64(BoxExtract(cred_id, Int(COMPACT_OFFSETS["serial"]), Int(8)), Int(0))),
+        page.store(Concat(Bytes(PAGE_PREFIX), Itob(serial.load() / Int(BITS_PER_PAGE)))),
+        page_len,
+        If(page_len.hasValue())
+        .Then(GetBit(BoxExtract(page.load(), (serial.load() % Int(BITS_PER_PAGE)) / Int(8), Int(1)), serial.load() % Int(8)))
+        .Else(Int(0)),
+    ))
+
+# 1 if a credential box may be deleted: expired or revoked
+# Expired credentials never read their bitmap page.
+@Subroutine(TealType.uint64)
+def sweepable(cred_id):
+    return If(is_expired(cred_id)).Then(Int(1)).Else(is_revoked(cred_id))
+
+# Verdict bits (methods.VERDICT_*) of a credential against a presented 32-byte hash
+# A credential that exists reads its bitmap page unless its revoked byte is set.
+@Subroutine(TealType.uint64)
+def verdict(cred_id, cred_hash):
+    rec_len = BoxLen(cred_id)
+    return Seq(
+        rec_len,
+        If(Not(rec_len.hasValue())).Then(Int(0)).Else(
+            Int(VERDICT_FOUND)
+            | (BoxExtract(cred_id, Int(COMPACT_OFFSETS["cred_hash"]), Int(32)) == cred_hash) * Int(VERDICT_HASH_MATCH)
+            | is_expired(cred_id) * Int(VERDICT_EXPIRED)
+            | is_revoked(cred_id) * Int(VERDICT_REVOKED)
+        ),
+    )
 
 def app():
-    admin = Bytes("admin")
     version = Bytes("version")
-    
-    # Schema codes: 1=visa, 2=education, 3=employment
-    VISA_SCHEMA = Int(1)
-    EDUCATION_SCHEMA = Int(2)
-    EMPLOYMENT_SCHEMA = Int(3)
 
     # Create application
     create_app = Seq(
         App.globalPut(admin, Txn.sender()),
-        App.globalPut(version, Int(2)),  # Version 2 for multi-credential support
+        App.globalPut(version, Int(COMPACT_VERSION)),  # box format version
+        App.globalPut(Concat(Bytes(ISSUER_KEY_PREFIX), Bytes(bytes([ADMIN_ISSUER_IDX]))), Txn.sender()),
+        App.globalPut(issuer_count, Int(1)),
         Approve()
     )
 
     # Issue credential with NFT ASA ID
     def issue():
-        cred_id = Txn.application_args[1]
+        cred_id = dynamic_arg(1)
         subject = Txn.application_args[2]
         schema_code = Btoi(Txn.application_args[3])
         cred_hash = Txn.application_args[4]
         expires_at = Btoi(Txn.application_args[5])
-        cid_pointer = Txn.application_args[6]  # Optional IPFS CID
+        cid_pointer = dynamic_arg(6)  # IPFS CID, unpadded
         nft_asa_id = Txn.application_args[7]   # NFT ASA ID (8 bytes)
         
         return Seq(
-            Assert(Txn.sender() == App.globalGet(admin)),  # only admin can issue
-            Assert(Len(cred_hash) == Int(32)),  # hash must be 32 bytes
-            Assert(Len(subject) == Int(32)),   # address must be 32 bytes
-            Assert(schema_code >= VISA_SCHEMA),  # valid schema code
-            Assert(schema_code <= EMPLOYMENT_SCHEMA),
-            Assert(Len(cid_pointer) <= Int(32)),  # CID pointer max 32 bytes
-            Assert(Len(nft_asa_id) == Int(8)),  # NFT ASA ID must be exactly 8 bytes
-            Pop(BoxCreate(cred_id, Int(32 + 32 + 8 + 32 + 8 + 8 + 1 + 32 + 8))),  # Total: 161 bytes
-            BoxPut(
+            write_credential(cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer, nft_asa_id),
+            Approve(),
+        )
+
+    # Issue a credential and mint its NFT in the same call; returns the ASA id (ARC-4 uint64)
+    # Same arguments as issue() without nft_asa_id; the outer call pays one extra min fee.
+    def issue_with_nft():
+        cred_id = dynamic_arg(1)
+        cred_hash = Txn.application_args[4]
+        asa_id = ScratchVar(TealType.uint64)
+        
+        return Seq(
+            asa_id.store(mint_nft(cred_id, cred_hash)),
+            write_credential(
                 cred_id,
-                Concat(
-                    Txn.sender(),  # issuer_addr (32)
-                    subject,       # subject_addr (32)
-                    Itob(schema_code),  # schema_code (8 bytes for integer)
-                    cred_hash,     # cred_hash (32)
-                    Itob(Global.latest_timestamp()),  # issued_at (8)
-                    Itob(expires_at),  # expires_at (8)
-                    Bytes("\x00"),  # revoked (1)
-                    cid_pointer,   # cid_pointer (32 bytes, caller ensures this)
-                    nft_asa_id     # nft_asa_id (8)
-                ),
+                Txn.application_args[2],
+                Btoi(Txn.application_args[3]),
+                cred_hash,
+                Btoi(Txn.application_args[5]),
+                dynamic_arg(6),
+                Itob(asa_id.load()),
+            ),
+            arc4_return(Itob(asa_id.load())),
+            Approve(),
+        )
+
+    # Issue several credentials in one call
+    # application_args[1] (byte[]) is a concatenation of packed records (record.BATCH_TAIL_FIELDS):
+    # id_len(1) | cred_id(id_len) | subject(32) | schema_code(1) | cred_hash(32) | expires_at(8) | nft_asa_id(8) | cid_len(1) | cid(cid_len)
+    # The caller must supply one box reference per cred_id in the batch. Each record costs
+    # ~149 opcodes (methods.CALL_COSTS), so full calls need budget calls in their group.
+    def issue_batch():
+        batch = ScratchVar(TealType.bytes)
+        pos = ScratchVar(TealType.uint64)
+        id_len = ScratchVar(TealType.uint64)
+        body = ScratchVar(TealType.uint64)
+        cid_len = ScratchVar(TealType.uint64)
+        
+        def tail(name):
+            # position of a fixed-size field of the current record
+            offset = BATCH_TAIL_OFFSETS[name]
+            return body.load() + Int(offset) if offset else body.load()
+        
+        return Seq(
+            batch.store(dynamic_arg(1)),
+            pos.store(Int(0)),
+            While(pos.load() < Len(batch.load())).Do(
+                Seq(
+                    id_len.store(GetByte(batch.load(), pos.load())),
+                    body.store(pos.load() + Int(1) + id_len.load()),
+                    cid_len.store(GetByte(batch.load(), tail("cid_len"))),
+                    write_credential(
+                        Extract(batch.load(), pos.load() + Int(1), id_len.load()),  # cred_id
+                        Extract(batch.load(), tail("subject"), Int(COMPACT_SIZES["subject"])),
+                        GetByte(batch.load(), tail("schema_code")),
+                        Extract(batch.load(), tail("cred_hash"), Int(COMPACT_SIZES["cred_hash"])),
+                        ExtractUint64(batch.load(), tail("expires_at")),
+                        Extract(batch.load(), body.load() + Int(BATCH_TAIL_SIZE), cid_len.load()),
+                        Extract(batch.load(), tail("nft_asa_id"), Int(COMPACT_SIZES["nft_asa_id"])),
+                    ),
+                    pos.store(body.load() + Int(BATCH_TAIL_SIZE) + cid_len.load()),
+                )
             ),
             Approve(),
         )
 
     # Revoke credential
     def revoke():
-        cred_id = Txn.application_args[1]
+        cred_id = dynamic_arg(1)
+        
+        return Seq(
+            # replace revoked byte at offset (1+32+1+32+8+8) = 82
+            BoxReplace(cred_id, Int(COMPACT_OFFSETS["revoked"]), Bytes("\x01")),
+            Approve(),
+        )
+
+    # Revoke many credentials on one revocation bitmap page
+    # application_args[1] = page (uint64), application_args[2] = byte[] of uint16 bit offsets within the page
+    # The caller must supply a box reference for the page box.
+    def revoke_batch():
+        page = Concat(Bytes(PAGE_PREFIX), Txn.application_args[1])
+        bits = ScratchVar(TealType.bytes)
+        name = ScratchVar(TealType.bytes)
+        i = ScratchVar(TealType.uint64)
+        bit = ScratchVar(TealType.uint64)
+        
+        return Seq(
+            Assert(Len(Txn.application_args[1]) == Int(8)),
+            name.store(page),
+            bits.store(dynamic_arg(2)),
+            Pop(BoxCreate(name.load(), Int(PAGE_BYTES))),  # zero-filled on first use
+            For(i.store(Int(0)), i.load() < Len(bits.load()), i.store(i.load() + Int(OFFSET_SIZE))).Do(
+                Seq(
+                    bit.store(ExtractUint16(bits.load(), i.load())),
+                    BoxReplace(
+                        name.load(),
+                        bit.load() / Int(8),
+                        SetBit(BoxExtract(name.load(), bit.load() / Int(8), Int(1)), bit.load() % Int(8), Int(1)),
+                    ),
+                )
+            ),
+            Approve(),
+        )
+
+    # Anchor the Merkle root of a batch of credential hashes (see merkle.py)
+    # application_args: batch_id (string), root (byte[32]), schema_code (uint64), leaf_count (uint64)
+    def anchor_root():
+        name = Concat(Bytes(ROOT_PREFIX), dynamic_arg(1))
+        root = Txn.application_args[2]
+        schema_code = Btoi(Txn.application_args[3])
+        leaf_count = Btoi(Txn.application_args[4])
+        
+        return Seq(
+            Assert(Len(root) == Int(32)),
+            Assert(schema_code >= VISA_SCHEMA),
+            Assert(schema_code <= EMPLOYMENT_SCHEMA),
+            Assert(leaf_count > Int(0)),
+            Assert(BoxCreate(name, Int(ROOT_SIZE))),  # roots are immutable once anchored
+            BoxPut(name, Concat(root, Txn.sender(), Itob(schema_code), Itob(Global.latest_timestamp()), Itob(leaf_count))),
+            Approve(),
+        )
+
+    # Verify a Merkle inclusion proof against an anchored root; rejects if invalid
+    # application_args: batch_id (string), cred_hash (byte[32]), index (uint64), proof (byte[], 32 bytes per level, leaf first)
+    # Each level costs ~50 opcodes; batches deeper than ~12 levels need extra app calls in the group for budget.
+    def verify_proof():
+        name = ScratchVar(TealType.bytes)
+        node = ScratchVar(TealType.bytes)
+        index = ScratchVar(TealType.uint64)
+        i = ScratchVar(TealType.uint64)
+        proof = ScratchVar(TealType.bytes)
+        sibling = Extract(proof.load(), i.load(), Int(32))
+        leaf_count = ExtractUint64(BoxExtract(name.load(), Int(ROOT_OFFSETS["leaf_count"]), Int(8)), Int(0))
+        
+        return Seq(
+            name.store(Concat(Bytes(ROOT_PREFIX), dynamic_arg(1))),
+            proof.store(dynamic_arg(4)),
+            index.store(Btoi(Txn.application_args[3])),
+            Assert(Len(Txn.application_args[2]) == Int(32)),
+            Assert(index.load() < leaf_count),
+            Assert(Len(proof.load()) == BitLen(leaf_count - Int(1)) * Int(32)),
+            node.store(Sha256(Concat(Bytes("\x00"), Txn.application_args[2]))),
+            For(i.store(Int(0)), i.load() < Len(proof.load()), i.store(i.load() + Int(32))).Do(
+                Seq(
+                    If(index.load() % Int(2) == Int(0))
+                    .Then(node.store(Sha256(Concat(Bytes("\x01"), node.load(), sibling))))
+                    .Else(node.store(Sha256(Concat(Bytes("\x01"), sibling, node.load())))),
+                    index.store(index.load() / Int(2)),
+                )
+            ),
+            Assert(node.load() == BoxExtract(name.load(), Int(ROOT_OFFSETS["root"]), Int(32))),
+            Approve(),
+        )
+
+    # Delete expired or revoked credential boxes, releasing their minimum balance
+    # application_args[1] (byte[]) = packed cred_ids (record.pack_cred_ids): id_len(1) | cred_id(id_len), repeated
+    # The whole call fails if any listed credential is still valid. The caller must supply
+    # a box reference per cred_id, plus the bitmap page of bitmap-revoked credentials.
+    def sweep():
+        ids = ScratchVar(TealType.bytes)
+        pos = ScratchVar(TealType.uint64)
+        cred_id = ScratchVar(TealType.bytes)
+        
+        return Seq(
+            ids.store(dynamic_arg(1)),
+            pos.store(Int(0)),
+            While(pos.load() < Len(ids.load())).Do(
+                Seq(
+                    cred_id.store(Extract(ids.load(), pos.load() + Int(1), GetByte(ids.load(), pos.load()))),
+                    Assert(sweepable(cred_id.load())),
+                    Assert(BoxDelete(cred_id.load())),
+                    pos.store(pos.load() + Int(1) + Len(cred_id.load())),
+                )
+            ),
+            Approve(),
+        )
+
+    # Register another issuer address; returns its issuer_idx (ARC-4 uint8)
+    # Only needed to migrate credentials issued by another deployment's admin.
+    def add_issuer():
+        idx = ScratchVar(TealType.uint64)
+        
+        return Seq(
+            idx.store(App.globalGet(issuer_count)),
+            Assert(Len(Txn.application_args[1]) == Int(32)),
+            Assert(idx.load() < Int(MAX_ISSUERS)),  # bounded by the global byte slices
+            App.globalPut(Concat(Bytes(ISSUER_KEY_PREFIX), byte_of(idx.load())), Txn.application_args[1]),
+            App.globalPut(issuer_count, idx.load() + Int(1)),
+            arc4_return(byte_of(idx.load())),
+            Approve(),
+        )
+
+    # Copy credentials from another deployment as compact boxes (see migrate.py)
+    # application_args[1] (byte[]) = id_len(1) | cred_id(id_len) | rec_len(1) | v3 record(rec_len), repeated
+    # issued_at, expires_at and the revoked flag are kept; the serial is reassigned here.
+    # Existing boxes are never overwritten. One box reference per cred_id.
+    def migrate():
+        batch = ScratchVar(TealType.bytes)
+        pos = ScratchVar(TealType.uint64)
+        cred_id = ScratchVar(TealType.bytes)
+        rec = ScratchVar(TealType.bytes)
+        schema_code = GetByte(rec.load(), Int(COMPACT_OFFSETS["schema_code"]))
+        
+        return Seq(
+            batch.store(dynamic_arg(1)),
+            pos.store(Int(0)),
+            While(pos.load() < Len(batch.load())).Do(
+                Seq(
+                    cred_id.store(Extract(batch.load(), pos.load() + Int(1), GetByte(batch.load(), pos.load()))),
+                    pos.store(pos.load() + Int(1) + Len(cred_id.load())),
+                    rec.store(Extract(batch.load(), pos.load() + Int(1), GetByte(batch.load(), pos.load()))),
+                    pos.store(pos.load() + Int(1) + Len(rec.load())),
+                    Assert(Len(rec.load()) >= Int(COMPACT_SIZE)),
+                    Assert(Len(rec.load()) <= Int(COMPACT_MAX_SIZE)),
+                    Assert(GetByte(rec.load(), Int(COMPACT_OFFSETS["version"])) == Int(COMPACT_VERSION)),
+                    Assert(schema_code >= VISA_SCHEMA),
+                    Assert(schema_code <= EMPLOYMENT_SCHEMA),
+                    Assert(GetByte(rec.load(), Int(COMPACT_OFFSETS["issuer_idx"])) < App.globalGet(issuer_count)),
+                    Assert(BoxCreate(cred_id.load(), Len(rec.load()))),
+                    BoxPut(cred_id.load(), rec.load()),
+                    App.globalPut(next_serial, App.globalGet(next_serial) + Int(1)),
+                    BoxReplace(cred_id.load(), Int(COMPACT_OFFSETS["serial"]), Itob(App.globalGet(next_serial))),
+                )
+            ),
+            Approve(),
+        )
+
+    # Verify one credential against a presented hash; returns the verdict bits (ARC-4 uint8)
+    # Read-only, so other contracts can call it in a group and clients can simulate it.
+    # Box references: the credential and its revocation bitmap page.
+    def verify():
+        cred_hash = Txn.application_args[2]
+        
+        return Seq(
+            Assert(Len(cred_hash) == Int(32)),
+            arc4_return(byte_of(verdict(dynamic_arg(1), cred_hash))),
+            Approve(),
+        )
+
+    # Verify several credentials in one call; returns one verdict byte per entry (ARC-4 byte[])
+    # application_args[1] (byte[]) = id_len(1) | cred_id(id_len) | cred_hash(32), repeated
+    # Box references: each credential and the bitmap pages they fall in (up to 8 in total).
+    def verify_batch():
+        batch = ScratchVar(TealType.bytes)
+        pos = ScratchVar(TealType.uint64)
+        cred_id = ScratchVar(TealType.bytes)
+        verdicts = ScratchVar(TealType.bytes)
         
         return Seq(
-            Assert(Txn.sender() == App.globalGet(admin)),  # only admin can revoke
-            # replace revoked byte at offset (32+32+1+32+8+8) = 113
-            BoxReplace(cred_id, Int(113), Bytes("\x01")),
+            batch.store(dynamic_arg(1)),
+            pos.store(Int(0)),
+            verdicts.store(Bytes("")),
+            While(pos.load() < Len(batch.load())).Do(
+                Seq(
+                    cred_id.store(Extract(batch.load(), pos.load() + Int(1), GetByte(batch.load(), pos.load()))),
+                    pos.store(pos.load() + Int(1) + Len(cred_id.load())),
+                    verdicts.store(Concat(
+                        verdicts.load(), byte_of(verdict(cred_id.load(), Extract(batch.load(), pos.load(), Int(32)))),
+                    )),
+                    pos.store(pos.load() + Int(32)),
+                )
+            ),
+            arc4_return(arc4_bytes(verdicts.load())),
             Approve(),
         )
 
-    # Get credential info (read-only)
+    # Return the raw credential box (ARC-4 byte[], empty if there is none); see record.decode_record
     def get_credential():
-        cred_id = Txn.application_args[1]
+        rec = BoxGet(dynamic_arg(1))
         
         return Seq(
-            # Just return success - the box data can be read via indexer
+            rec,
+            arc4_return(arc4_bytes(rec.value())),
             Approve(),
         )
 
-    # Get NFT ASA ID for a credential
+    # Return the NFT ASA ID of a credential (ARC-4 uint64, 0 if there is none)
     def get_nft_asa_id():
-        cred_id = Txn.application_args[1]
+        cred_id = dynamic_arg(1)
+        rec_len = BoxLen(cred_id)
         
         return Seq(
-            # Check that the box exists and return success
-            # The NFT ASA ID can be read from the box at offset 146-153 (last 8 bytes)
+            rec_len,
+            arc4_return(If(
+                rec_len.hasValue(),
+                BoxExtract(cred_id, Int(COMPACT_OFFSETS["nft_asa_id"]), Int(8)),
+                Itob(Int(0)),
+            )),
             Approve(),
         )
 
     # Main program
+    # A call without arguments only adds its opcode budget to the group's pool.
+    # Read-only methods are matched first; everything else needs the admin, which is
+    # checked once before the admin methods are dispatched. Branches are ordered by
+    # expected call volume since each selector comparison costs 4 opcodes.
+    selector = Txn.application_args[0]
+    public = {
+        "verify_batch": verify_batch(),
+        "verify": verify(),
+        "verify_proof": verify_proof(),
+        "get": get_credential(),
+        "get_nft": get_nft_asa_id(),
+    }
+    admin_only = {
+        "issue_batch": issue_batch(),
+        "revoke_batch": revoke_batch(),
+        "issue": issue(),
+        "issue_with_nft": issue_with_nft(),
+        "revoke": revoke(),
+        "anchor_root": anchor_root(),
+        "sweep": sweep(),
+        "migrate": migrate(),
+        "add_issuer": add_issuer(),
+    }
     program = Cond(
         [Txn.application_id() == Int(0), create_app],
-        [Txn.on_completion() == OnComplete.NoOp, 
-         Cond(
-             [Txn.application_args[0] == Bytes("issue"), issue()],
-             [Txn.application_args[0] == Bytes("revoke"), revoke()],
-             [Txn.application_args[0] == Bytes("get"), get_credential()],
-             [Txn.application_args[0] == Bytes("get_nft"), get_nft_asa_id()],
-             [Int(1), Reject()]
-         )],
-        [Int(1), Reject()]
+        [Txn.on_completion() != OnComplete.NoOp, Reject()],
+        [Txn.application_args.length() == Int(0), Approve()],  # bare budget call, see methods.budget_calls
+        *[[selector == Bytes(SELECTORS[name]), branch] for name, branch in public.items()],
+        [Int(1), Seq(
+            require_admin(),
+            Cond(
+                *[[selector == Bytes(SELECTORS[name]), branch] for name, branch in admin_only.items()],
+                [Int(1), Reject()],
+            ),
+        )],
     )
 
     return program
@@ -0,0 +1,92 @@
+# Compiled-program cache
+# TEAL, bytecode and source maps are stored under artifacts/cache/, keyed by a hash
+# of the contract sources, the TEAL version and the pyteal version (plus the algod
+# version for bytecode). On a warm cache nothing imports pyteal and algod's compile
+# endpoint is not called.
+import base64
+import hashlib
+import json
+import os
+from importlib import metadata
+
+from . import telemetry
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(os.path.dirname(SRC_DIR), "artifacts", "cache")
+
+# Every module that contributes to the compiled program
+CONTRACT_SOURCES = ("app.py", "record.py", "revocation.py", "merkle.py", "methods.py")
+
+TEAL_VERSION = 8
+
+
+def teal_key(teal_version=TEAL_VERSION):
+    """Content hash of everything that determines the generated TEAL"""
+    h = hashlib.sha256()
+    for name in CONTRACT_SOURCES:
+        with open(os.path.join(SRC_DIR, name), "rb") as f:
+            h.update(name.encode() + b"\x00" + f.read() + b"\x00")
+    h.update(f"teal={teal_version};pyteal={metadata.version('pyteal')}".encode())
+    return h.hexdigest()[:32]
+
+
+def algod_version(algod_client):
+    build = algod_client.versions()["build"]
+    return f"{build['major']}.{build['minor']}.{build['build_number']}-{build['commit_hash'][:8]}"
+
+
+def _read(path, mode="r"):
+    try:
+        with open(path, mode) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write(path, data, mode="w"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, mode) as f:
+        f.write(data)
+    os.replace(tmp, path)  # never leave a half-written artifact behind
+
+
+def get_teal(teal_version=TEAL_VERSION, rebuild=False):
+    """Return (approval_teal, clear_teal, cached); rebuild=True regenerates a cached entry"""
+    entry = os.path.join(CACHE_DIR, teal_key(teal_version))
+    approval = _read(os.path.join(entry, "approval.teal"))
+    clear = _read(os.path.join(entry, "clear.teal"))
+    if approval is not None and clear is not None and not rebuild:
+        return approval, clear, True
+
+    from pyteal import compileTeal, Mode, Int
+    from .app import app
+
+    approval = compileTeal(app(), Mode.Application, version=teal_version)
+    clear = compileTeal(Int(1), Mode.Application, version=teal_version)
+    _write(os.path.join(entry, "approval.teal"), approval)
+    _write(os.path.join(entry, "clear.teal"), clear)
+    return approval, clear, False
+
+
+def get_programs(algod_client, teal_version=TEAL_VERSION):
+    """Return (approval_bytes, clear_bytes), compiling through algod only on a cache miss"""
+    entry = os.path.join(CACHE_DIR, teal_key(teal_version), algod_version(algod_client))
+    approval = _read(os.path.join(entry, "approval.bin"), "rb")
+    clear = _read(os.path.join(entry, "clear.bin"), "rb")
+    if approval is not None and clear is not None:
+        telemetry.count("program_cache_total", result="hit")
+        print(f"Using cached programs: {entry}")
+        return approval, clear
+
+    telemetry.count("program_cache_total", result="miss")
+    with telemetry.span("compile"):
+        approval_teal, clear_teal, _ = get_teal(teal_version)
+        compiled = algod_client.compile(approval_teal, source_map=True)
+        approval = base64.b64decode(compiled["result"])
+        clear = base64.b64decode(algod_client.compile(clear_teal)["result"])
+    _write(os.path.join(entry, "approval.map.json"), json.dumps(compiled.get("sourcemap", {})))
+    _write(os.path.join(entry, "approval.bin"), approval, "wb")
+    _write(os.path.join(entry, "clear.bin"), clear, "wb")
+    print(f"Compiled and cached programs: {entry}")
+    return approval, clear
@@ -0,0 +1,114 @@
+# Group builders for batch issue and revoke
+# Each *_builder() returns a build(sp) callable producing the unsigned transactions
+# of one atomic group, the form Submitter, bundle.py and the sharded registry all
+# consume. Nothing here touches the network except read_serial(), which takes its
+# algod client as an argument.
+import base64
+
+from algosdk import encoding
+
+from . import methods, record, revocation
+from .methods import MAX_BOX_REFS
+
+MAX_BOX_NAME = 64  # box name (cred_id) max length
+
+
+def normalize_cred_hash(cred_hash_hex):
+    """Turn a hex hash into exactly 32 bytes"""
+    if len(cred_hash_hex) % 2 != 0:
+        cred_hash_hex = cred_hash_hex + '0'  # Pad with 0 if odd length
+    cred_hash_bytes = bytes.fromhex(cred_hash_hex)
+    if len(cred_hash_bytes) != 32:
+        # Pad or truncate to exactly 32 bytes
+        cred_hash_bytes = cred_hash_bytes[:32].ljust(32, b'\x00')
+    return cred_hash_bytes
+
+
+def normalize_cid(cid_pointer):
+    """Truncate a CID pointer to 32 bytes; boxes store it unpadded"""
+    return cid_pointer[:record.MAX_CID_SIZE].rstrip(b'\x00')
+
+
+def encode_batch_record(cred):
+    """Pack one credential dict into the issue_batch record format used by app.py"""
+    cred_id = cred["cred_id"].encode()
+    if not 0 < len(cred_id) <= MAX_BOX_NAME:
+        raise ValueError(f"cred_id must be 1..{MAX_BOX_NAME} bytes: {cred['cred_id']!r}")
+    if cred_id.startswith(b"\x00"):
+        raise ValueError(f"cred_id must not start with a NUL byte: {cred['cred_id']!r}")
+    if not encoding.is_valid_address(cred["subject"]):
+        raise ValueError(f"Invalid subject address: {cred['subject']}")
+    cid_pointer = cred.get("cid_pointer") or ""
+    return record.encode_batch_record(
+        cred_id,
+        encoding.decode_address(cred["subject"]),
+        int(cred["schema_code"]),
+        normalize_cred_hash(cred["cred_hash"]),
+        int(cred["expires_at"]),
+        normalize_cid(cid_pointer.encode() if isinstance(cid_pointer, str) else cid_pointer),
+        int(cred["nft_asa_id"]),
+    )
+
+
+def pack_issue_calls(creds):
+    """Split credentials into app calls that respect the box-ref and app-arg size limits
+
+    Yields lists of (cred_id, record_bytes), one list per issue_batch call.
+    """
+    budget = methods.ISSUE_BATCH_BUDGET
+    call, size = [], 0
+    for cred in creds:
+        rec = encode_batch_record(cred)
+        if call and (len(call) == MAX_BOX_REFS or size + len(rec) > budget):
+            yield call
+            call, size = [], 0
+        call.append((cred["cred_id"], rec))
+        size += len(rec)
+    if call:
+        yield call
+
+
+def issue_batch_builder(app_id, addr, group_calls):
+    """Return a builder for one atomic group of issue_batch calls
+
+    Full calls cost more than one call's opcode budget, so the group is topped up
+    with budget calls; up to methods.ISSUE_CALLS_PER_GROUP calls fit one group.
+    """
+    cost = sum(methods.call_cost("issue_batch", len(call)) for call in group_calls)
+
+    def build(sp):
+        txns = [
+            methods.app_call(
+                app_id, addr, sp, "issue_batch",
+                b"".join(rec for _, rec in call),
+                boxes=[cred_id.encode() for cred_id, _ in call]
+            )
+            for call in group_calls
+        ]
+        return methods.with_budget(txns, app_id, addr, sp, cost)
+    return build
+
+
+def revoke_builder(app_id, addr, cred_id):
+    """Return a builder for a single revoke call"""
+    def build(sp):
+        return [
+            methods.app_call(app_id, addr, sp, "revoke", cred_id, boxes=[cred_id.encode()])
+        ]
+    return build
+
+
+def revoke_batch_builder(app_id, addr, group_calls):
+    """Return a builder for one atomic group of revoke_batch calls"""
+    def build(sp):
+        return [
+            methods.app_call(app_id, addr, sp, "revoke_batch", page, bits, boxes=[revocation.page_name(page)])
+            for page, bits in group_calls
+        ]
+    return build
+
+
+def read_serial(algod_client, app_id, cred_id):
+    """Read the revocation serial of a credential from its box (0 for legacy boxes)"""
+    box = algod_client.application_box_by_name(app_id, cred_id.encode())
+    return record.decode_record(base64.b64decode(box["value"])).serial
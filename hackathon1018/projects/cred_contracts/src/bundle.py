@@ -0,0 +1,260 @@
+# Offline-signed transaction bundles
+# Issuing with a key that never touches the node host takes three steps:
+#   build   (online)   issue/revoke groups are built unsigned, with their args and box
+#                      references already packed, and written to a bundle file
+#   sign    (offline)  the bundle is signed across all cores; no network access
+#   submit  (online)   the signed groups are streamed to algod through a Submitter,
+#                      which bounds the groups in flight and blocks the reader
+# A bundle is a msgpack stream: one header map, then one map per group. Each group
+# is built for several consecutive validity windows of up to 1000 rounds. If a copy
+# expires before it confirms, the next window's copy is sent; the key is not needed
+# again. Each copy is sent only after the previous window has passed, so at most
+# one copy of a group can be confirmed.
+import argparse
+import base64
+import copy
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import msgpack
+from algosdk import constants, encoding, transaction
+from nacl.signing import SigningKey
+
+from .builders import issue_batch_builder, pack_issue_calls, read_serial, revoke_batch_builder, revoke_builder
+
+FORMAT = "cred-bundle/1"
+MAX_VALIDITY = 1000  # rounds between first_valid and last_valid, inclusive
+
+# Canonical msgpack of {"sig": <64 bytes>, "txn": ...}: fixmap(2), "sig", bin8(64), "txn"
+_SIGNED_PREFIX = b"\x82\xa3sig\xc4\x40"
+_TXN_KEY = b"\xa3txn"
+
+
+def validity_windows(start, count, length=MAX_VALIDITY):
+    """count back-to-back (first_valid, last_valid) windows beginning at round start"""
+    return [(start + i * length, start + (i + 1) * length - 1) for i in range(count)]
+
+
+def encode_txn(txn):
+    """Canonical msgpack bytes of a Transaction or SignedTransaction"""
+    return base64.b64decode(encoding.msgpack_encode(txn))
+
+
+def decode_txn(raw):
+    return encoding.msgpack_decode(base64.b64encode(raw).decode())
+
+
+def write_bundle(path, header, entries):
+    """Write header and group entries; returns the number of groups written"""
+    written = 0
+    packer = msgpack.Packer(use_bin_type=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(packer.pack({"format": FORMAT, **header}))
+        for entry in entries:
+            f.write(packer.pack(entry))
+            written += 1
+    os.replace(tmp, path)  # a bundle is either complete or absent
+    return written
+
+
+def iter_bundle(path):
+    """Yield the header, then each group entry, reading the file incrementally"""
+    with open(path, "rb") as f:
+        unpacker = msgpack.Unpacker(f, raw=False)
+        header = next(unpacker, None)
+        if not isinstance(header, dict) or header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a {FORMAT} file")
+        yield header
+        yield from unpacker
+
+
+def build_bundle(path, sp, sender, builders, windows=4, start=None):
+    """Build every (label, build) group for each validity window and write an unsigned bundle
+
+    build(sp) is one of the group builders used with the Submitter (issue_batch_builder,
+    revoke_batch_builder, ...). Windows start at round start (default: sp.first).
+    Returns the number of groups.
+    """
+    spans = validity_windows(sp.first if start is None else start, windows)
+    params = []
+    for first, last in spans:
+        p = copy.copy(sp)
+        p.first, p.last = first, last
+        params.append(p)
+
+    def entries():
+        for label, build in builders:
+            copies = []
+            for p in params:
+                txns = build(p)
+                if len(txns) > 1:
+                    transaction.assign_group_id(txns)
+                copies.append([encode_txn(txn) for txn in txns])
+            yield {"label": label, "txns": copies}
+
+    header = {"signed": False, "sender": sender, "genesis_hash": sp.gh, "windows": spans}
+    return write_bundle(path, header, entries())
+
+
+_signing_key = None
+
+
+def _init_signer(seed):
+    global _signing_key
+    _signing_key = SigningKey(seed)
+
+
+def _sign_raw(raw):
+    # Same bytes as txn.sign(key) without decoding and re-encoding the transaction
+    sig = _signing_key.sign(constants.txid_prefix + raw).signature
+    return _SIGNED_PREFIX + sig + _TXN_KEY + raw
+
+
+def _sign_entry(entry):
+    return {**entry, "txns": [[_sign_raw(raw) for raw in group] for group in entry["txns"]]}
+
+
+def _sign_chunk(entries):
+    return [_sign_entry(entry) for entry in entries]
+
+
+def sign_bundle(src, dst, private_key, workers=None, chunksize=256):
+    """Sign every transaction of an unsigned bundle; returns the number of groups
+
+    Chunks of groups are signed in a process pool; at most 2 * workers chunks are
+    in flight, so memory stays bounded for any bundle size.
+    """
+    seed = base64.b64decode(private_key)[:32]
+    entries = iter_bundle(src)
+    header = next(entries)
+    if header["signed"]:
+        raise ValueError(f"{src} is already signed")
+    address = encoding.encode_address(bytes(SigningKey(seed).verify_key))
+    if address != header["sender"]:
+        raise ValueError(f"Key is for {address}, bundle sender is {header['sender']}")
+    workers = workers or os.cpu_count() or 1
+
+    def signed():
+        if workers <= 1:
+            _init_signer(seed)
+            yield from map(_sign_entry, entries)
+            return
+        with ProcessPoolExecutor(workers, initializer=_init_signer, initargs=(seed,)) as pool:
+            in_flight = deque()
+            while True:
+                while len(in_flight) < 2 * workers:
+                    chunk = list(itertools.islice(entries, chunksize))
+                    if not chunk:
+                        break
+                    in_flight.append(pool.submit(_sign_chunk, chunk))
+                if not in_flight:
+                    return
+                yield from in_flight.popleft().result()
+
+    return write_bundle(dst, {**header, "signed": True}, signed())
+
+
+def presigned_builder(windows, copies):
+    """Builder for Submitter.submit returning the signed copy valid for sp's round"""
+    def build(sp):
+        rnd = sp.first
+        for (first, last), group in zip(windows, copies):
+            if first <= rnd + 1 <= last:
+                return [decode_txn(raw) for raw in group]
+        raise RuntimeError(f"No signed copy valid after round {rnd} (windows {windows[0][0]}-{windows[-1][1]})")
+    return build
+
+
+def submit_bundle(path, submitter):
+    """Stream a signed bundle through a (not yet started) Submitter
+
+    submit() blocks while the submitter's queue is full, so the file is read only as
+    fast as the chain confirms. Returns (confirmed, failed labels).
+    """
+    entries = iter_bundle(path)
+    header = next(entries)
+    if not header["signed"]:
+        raise ValueError(f"{path} is not signed; run the sign step first")
+    if submitter.client.suggested_params().gh != header["genesis_hash"]:
+        raise ValueError(f"{path} was built for another network")
+    windows = [tuple(w) for w in header["windows"]]
+    submitter.max_retries = max(submitter.max_retries, len(windows))
+    confirmed, failed = [], []
+
+    def settled(future, label):
+        (failed if future.exception() else confirmed).append(label)
+
+    with submitter:
+        for entry in entries:
+            future = submitter.submit(presigned_builder(windows, entry["txns"]), entry["label"])
+            future.add_done_callback(lambda f, label=entry["label"]: settled(f, label))
+    return len(confirmed), failed
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Build, sign offline and submit bundles of issue/revoke groups")
+    sub = p.add_subparsers(dest="step", required=True)
+    b = sub.add_parser("build", help="Build an unsigned bundle (online, no key needed)")
+    b.add_argument("out", metavar="BUNDLE")
+    what = b.add_mutually_exclusive_group(required=True)
+    what.add_argument("--issue", metavar="FILE.jsonl", help="Credentials to issue (same format as --issue-batch)")
+    what.add_argument("--revoke", metavar="FILE", help="cred_ids to revoke, one per line")
+    b.add_argument("--sender", required=True, metavar="ADDRESS", help="Address of the offline signing key (the app admin)")
+    b.add_argument("--windows", type=int, default=4, help="Validity windows of 1000 rounds to build each group for")
+    b.add_argument("--start", type=int, metavar="ROUND", help="First valid round (default: the current round)")
+    s = sub.add_parser("sign", help="Sign a bundle (offline)")
+    s.add_argument("src", metavar="UNSIGNED")
+    s.add_argument("dst", metavar="SIGNED")
+    s.add_argument("--workers", type=int, help="Signing processes (default: one per core)")
+    u = sub.add_parser("submit", help="Send a signed bundle to the network")
+    u.add_argument("src", metavar="SIGNED")
+    u.add_argument("--in-flight", type=int, default=32, metavar="N", help="Max groups in flight")
+    a = p.parse_args()
+
+    if a.step == "sign":
+        words = os.environ.get("SIGNER_MNEMONIC")
+        if not words:
+            raise SystemExit("Set SIGNER_MNEMONIC to the 25-word mnemonic of the signing key")
+        from algosdk import mnemonic
+
+        n = sign_bundle(a.src, a.dst, mnemonic.to_private_key(words), a.workers)
+        print(f"Signed {n} groups into {a.dst}")
+    elif a.step == "build":
+        from . import revocation
+        from .deploy_localnet import NET, load_cred_ids, load_issue_batch
+        from .methods import ISSUE_CALLS_PER_GROUP, MAX_GROUP_SIZE
+
+        app_id = NET.app_id
+
+        def groups(calls, make_builder, label, size=MAX_GROUP_SIZE):
+            while True:
+                group_calls = list(itertools.islice(calls, size))
+                if not group_calls:
+                    return
+                yield label(group_calls), make_builder(app_id, a.sender, group_calls)
+
+        if a.issue:
+            builders = groups(pack_issue_calls(load_issue_batch(a.issue)), issue_batch_builder, lambda g: g[0][0][0],
+                              ISSUE_CALLS_PER_GROUP)
+        else:
+            cred_ids = load_cred_ids(a.revoke)
+            serials = {cred_id: read_serial(NET.algod, app_id, cred_id) for cred_id in cred_ids}
+            calls = revocation.pack_revoke_calls(serial for serial in serials.values() if serial)
+            legacy = [cred_id for cred_id, serial in serials.items() if serial == 0]
+            builders = itertools.chain(
+                groups(calls, revoke_batch_builder, lambda g: f"page-{g[0][0]}"),
+                ((cred_id, revoke_builder(app_id, a.sender, cred_id)) for cred_id in legacy),
+            )
+        n = build_bundle(a.out, NET.suggested_params(refresh=True), a.sender, builders, a.windows, a.start)
+        print(f"Built {n} groups x {a.windows} validity windows into {a.out}")
+    else:
+        from .deploy_localnet import NET
+        from .submitter import Submitter
+
+        confirmed, failed = submit_bundle(a.src, Submitter(NET.algod, None, max_in_flight=a.in_flight))
+        print(f"Confirmed {confirmed} groups, {len(failed)} failed")
+        for label in failed:
+            print(f"  failed: {label}")
@@ -0,0 +1,364 @@
+# Local credential index
+# Mirrors every credential box of the registry app into SQLite so verifiers can
+# look credentials up in-process instead of fetching and decoding boxes over HTTP.
+# A full load pages through all boxes once; after that follow() applies issue/revoke
+# deltas round by round by re-reading only the boxes touched in each round.
+# query() answers subject / issuer / schema / validity lookups from the mirror,
+# one page at a time.
+import argparse
+import base64
+import itertools
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+
+from .methods import decode_args
+from .record import (
+    CompactRecord,
+    decode_record,
+    fetch_issuers,
+    is_record_size,
+    iter_batch_records,
+    iter_cred_ids,
+    iter_migrate_entries,
+)
+from .revocation import BITS_PER_PAGE, OFFSET_SIZE, PAGE_PREFIX, revoked_in_page
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS credentials (
+    cred_id     BLOB PRIMARY KEY,
+    issuer      TEXT NOT NULL,
+    subject     TEXT NOT NULL,
+    schema_code INTEGER NOT NULL,
+    cred_hash   BLOB NOT NULL,
+    issued_at   INTEGER NOT NULL,
+    expires_at  INTEGER NOT NULL,
+    revoked     INTEGER NOT NULL,
+    cid_pointer BLOB NOT NULL,
+    nft_asa_id  INTEGER NOT NULL,
+    serial      INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS credentials_subject ON credentials (subject);
+CREATE INDEX IF NOT EXISTS credentials_issuer ON credentials (issuer);
+CREATE INDEX IF NOT EXISTS credentials_schema ON credentials (schema_code);
+CREATE INDEX IF NOT EXISTS credentials_nft ON credentials (nft_asa_id);
+CREATE INDEX IF NOT EXISTS credentials_serial ON credentials (serial);
+CREATE INDEX IF NOT EXISTS credentials_expires ON credentials (expires_at);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+COLUMNS = ("cred_id", "issuer", "subject", "schema_code", "cred_hash", "issued_at",
+           "expires_at", "revoked", "cid_pointer", "nft_asa_id", "serial")
+
+
+def decode_box(cred_id, value, issuers=None):
+    """Decode a credential box of any version into a row tuple
+
+    issuers maps issuer_idx to address and is needed for compact (v3) boxes.
+    """
+    rec = decode_record(value)
+    issuer = issuers[rec.issuer_idx] if isinstance(rec, CompactRecord) else rec.issuer
+    return (
+        cred_id,
+        encoding.encode_address(bytes(issuer)),
+        encoding.encode_address(bytes(rec.subject)),
+        rec.schema_code,
+        bytes(rec.cred_hash),
+        rec.issued_at,
+        rec.expires_at,
+        rec.revoked,
+        bytes(rec.cid_pointer).rstrip(b"\x00"),
+        rec.nft_asa_id,
+        rec.serial,
+    )
+
+
+def revoked_serials(app_args):
+    """Return the serials a revoke_batch call sets in the revocation bitmap"""
+    method, values = decode_args(app_args)
+    if method != "revoke_batch":
+        return []
+    page, bits = values
+    base = page * BITS_PER_PAGE
+    return [base + int.from_bytes(bits[i:i + OFFSET_SIZE], "big") for i in range(0, len(bits), OFFSET_SIZE)]
+
+
+def touched_cred_ids(app_args):
+    """Return the cred_ids an issue/issue_with_nft/issue_batch/migrate/revoke/sweep call writes to"""
+    method, values = decode_args(app_args)
+    if method in ("issue", "issue_with_nft", "revoke"):
+        return [values[0].encode()]
+    if method == "issue_batch":
+        return [cred_id for cred_id, _ in iter_batch_records(values[0])]
+    if method == "migrate":
+        return [cred_id for cred_id, _ in iter_migrate_entries(values[0])]
+    if method == "sweep":
+        return list(iter_cred_ids(values[0]))
+    return []
+
+
+class CredentialIndex:
+    """SQLite mirror of the registry's credential boxes"""
+
+    def __init__(self, path, app_id, algod_client, indexer_client=None, workers=8):
+        self.app_id = app_id
+        self.algod = algod_client
+        self.indexer = indexer_client
+        self.workers = workers
+        self._issuers = {}
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    # --- lookups -----------------------------------------------------------
+
+    def get(self, cred_id):
+        """Return one credential as a dict, or None
+
+        revoked is 1 when either the box's revoked byte or its bitmap bit is set.
+        """
+        if isinstance(cred_id, str):
+            cred_id = cred_id.encode()
+        with self._lock:
+            row = self.db.execute("SELECT * FROM credentials WHERE cred_id = ?", (cred_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def by_subject(self, address):
+        return self._select("subject", address)
+
+    def by_issuer(self, address):
+        return self._select("issuer", address)
+
+    def by_schema(self, schema_code):
+        return self._select("schema_code", schema_code)
+
+    def by_nft(self, nft_asa_id):
+        return self._select("nft_asa_id", nft_asa_id)
+
+    def _select(self, column, value):
+        with self._lock:
+            rows = self.db.execute(f"SELECT * FROM credentials WHERE {column} = ?", (value,)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def query(self, subject=None, issuer=None, schema_code=None, valid_at=None, limit=100, after=None):
+        """Return (credentials, cursor) for one page of matching credentials
+
+        Filters combine with AND. valid_at (unix seconds) keeps only credentials
+        that are neither revoked nor expired at that time. Pages are ordered by
+        cred_id; pass the returned cursor as after= for the next page (None when
+        there are no more).
+        """
+        where, params = [], []
+        for column, value in (("subject", subject), ("issuer", issuer), ("schema_code", schema_code)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if valid_at is not None:
+            where.append("revoked = 0 AND (expires_at = 0 OR expires_at >= ?)")
+            params.append(valid_at)
+        if after is not None:
+            where.append("cred_id > ?")
+            params.append(after)
+        sql = "SELECT * FROM credentials"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self.db.execute(sql + " ORDER BY cred_id LIMIT ?", (*params, limit + 1)).fetchall()
+        page = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+        return page, (page[-1]["cred_id"] if len(rows) > limit else None)
+
+    def valid_for_subject(self, address, now=None):
+        """Every credential of a subject that is neither revoked nor expired"""
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT * FROM credentials WHERE subject = ? AND revoked = 0 AND (expires_at = 0 OR expires_at >= ?)",
+                (address, now),
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def expiring(self, start, end):
+        """Credentials with start <= expires_at < end, soonest first"""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT * FROM credentials WHERE expires_at >= ? AND expires_at < ? AND expires_at != 0 ORDER BY expires_at",
+                (start, end),
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def revoked(self):
+        """Every revoked credential, by revoked byte or bitmap bit"""
+        return self._select("revoked", 1)
+
+    def discard(self, cred_ids):
+        """Drop credentials whose boxes are known to be deleted"""
+        with self._lock, self.db:
+            self.db.executemany("DELETE FROM credentials WHERE cred_id = ?", [(c,) for c in cred_ids])
+
+    def iter_rows(self, batch=10_000):
+        """Yield every credential row (COLUMNS order), sorted by cred_id"""
+        after = b""
+        while True:
+            with self._lock:
+                rows = self.db.execute(
+                    "SELECT * FROM credentials WHERE cred_id > ? ORDER BY cred_id LIMIT ?", (after, batch)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1][0]
+
+    def restore(self, rows, rnd):
+        """Replace the mirror with rows (COLUMNS order) taken at round rnd; catch_up() continues from there"""
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM credentials")
+            self.db.executemany(f"INSERT INTO credentials VALUES ({','.join('?' * len(COLUMNS))})", rows)
+            self.db.execute("INSERT OR REPLACE INTO sync_state VALUES ('round', ?)", (rnd,))
+
+    @property
+    def synced_round(self):
+        with self._lock:
+            row = self.db.execute("SELECT value FROM sync_state WHERE key = 'round'").fetchone()
+        return row[0] if row else None
+
+    # --- sync --------------------------------------------------------------
+
+    def _fetch_box(self, name):
+        try:
+            box = self.algod.application_box_by_name(self.app_id, name)
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return name, None  # box was deleted
+            raise
+        return name, base64.b64decode(box["value"])
+
+    def _issuer_table(self, boxes):
+        # The table only grows, so it is refetched only when a box names an unknown issuer
+        needed = {CompactRecord(value).issuer_idx for _, value in boxes}
+        if not needed <= self._issuers.keys():
+            self._issuers = fetch_issuers(self.algod, self.app_id)
+        return self._issuers
+
+    def _apply(self, names, rnd, serials=()):
+        with ThreadPoolExecutor(self.workers) as pool:
+            boxes = list(pool.map(self._fetch_box, names))
+        records = [(name, value) for name, value in boxes if value is not None and is_record_size(len(value))]
+        compact = [(name, value) for name, value in records if isinstance(decode_record(value), CompactRecord)]
+        issuers = self._issuer_table(compact) if compact else self._issuers
+        serials = set(serials)
+        for name, value in boxes:
+            if name.startswith(PAGE_PREFIX) and value is not None:
+                serials.update(revoked_in_page(int.from_bytes(name[len(PAGE_PREFIX):], "big"), value))
+        with self._lock, self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO credentials VALUES ({','.join('?' * len(COLUMNS))})",
+                [decode_box(name, value, issuers) for name, value in records],
+            )
+            self.db.executemany(
+                "DELETE FROM credentials WHERE cred_id = ?",
+                [(name,) for name, value in boxes if value is None],
+            )
+            self.db.executemany(
+                "UPDATE credentials SET revoked = 1 WHERE serial = ?",
+                [(serial,) for serial in serials],
+            )
+            self.db.execute("INSERT OR REPLACE INTO sync_state VALUES ('round', ?)", (rnd,))
+        return serials
+
+    def iter_box_names(self, page_size=1000):
+        """Yield every box name of the app, page by page through the indexer
+
+        Without an indexer client this falls back to algod's single, unpaged list.
+        """
+        if self.indexer is None:
+            yield from (base64.b64decode(b["name"]) for b in self.algod.application_boxes(self.app_id)["boxes"])
+            return
+        next_page = None
+        while True:
+            res = self.indexer.application_boxes(self.app_id, limit=page_size, next_page=next_page)
+            yield from (base64.b64decode(b["name"]) for b in res.get("boxes", []))
+            next_page = res.get("next-token")
+            if not next_page or not res.get("boxes"):
+                return
+
+    def load_all(self, page_size=1000):
+        """Bulk-load every box of the app; returns the number of boxes read
+
+        Names are streamed a page at a time and each page is fetched by the worker
+        pool and written before the next one, so memory stays bounded.
+        """
+        rnd = self.algod.status()["last-round"]
+        names = self.iter_box_names(page_size)
+        loaded, revoked = 0, set()
+        while True:
+            chunk = list(itertools.islice(names, page_size))
+            if not chunk:
+                break
+            revoked |= self._apply(chunk, rnd)
+            loaded += len(chunk)
+        self._apply([], rnd, revoked)  # bitmap pages may precede the credentials they revoke
+        print(f"Loaded {loaded} boxes at round {rnd}")
+        return loaded
+
+    def catch_up(self, to_round):
+        """Apply every issue/revoke from the last synced round up to to_round"""
+        start = (self.synced_round or 0) + 1
+        if start > to_round:
+            return 0
+        touched, serials, next_page = set(), set(), None
+        while True:
+            res = self.indexer.search_transactions(
+                application_id=self.app_id, min_round=start, max_round=to_round, next_page=next_page
+            )
+            for txn in res.get("transactions", []):
+                args = [base64.b64decode(a) for a in txn.get("application-transaction", {}).get("application-args", [])]
+                touched.update(touched_cred_ids(args))
+                serials.update(revoked_serials(args))
+            next_page = res.get("next-token")
+            if not next_page:
+                break
+        self._apply(sorted(touched), to_round, sorted(serials))
+        return len(touched) + len(serials)
+
+    def follow(self, stop=None):
+        """Block following new rounds until stop (a threading.Event) is set"""
+        rnd = self.synced_round
+        if rnd is None:
+            self.load_all()
+            rnd = self.synced_round
+        while stop is None or not stop.is_set():
+            latest = self.algod.status_after_block(rnd)["last-round"]
+            latest = min(latest, self.indexer.health()["round"])  # indexer may lag algod
+            if latest <= rnd:
+                time.sleep(1)
+                continue
+            changed = self.catch_up(latest)
+            if changed:
+                print(f"Round {latest}: updated {changed} credentials")
+            rnd = latest
+
+
+if __name__ == "__main__":
+    from .deploy_localnet import NET
+
+    p = argparse.ArgumentParser(description="Mirror credential boxes into a local SQLite index")
+    p.add_argument("--db", default="credentials.sqlite", help="SQLite database path")
+    p.add_argument("--reload", action="store_true", help="Reload every box instead of catching up")
+    p.add_argument("--follow", action="store_true", help="Keep following new rounds")
+    p.add_argument("--subject", metavar="ADDRESS", help="List the valid (not revoked, not expired) credentials of a subject")
+    a = p.parse_args()
+
+    idx = CredentialIndex(a.db, NET.app_id, NET.algod, NET.indexer)
+    if a.reload or idx.synced_round is None:
+        idx.load_all()
+    else:
+        idx.catch_up(NET.indexer.health()["round"])
+    if a.subject:
+        for cred in idx.valid_for_subject(a.subject):
+            print(f"{cred['cred_id'].decode(errors='replace')}  schema={cred['schema_code']}  expires={cred['expires_at'] or 'never'}  nft={cred['nft_asa_id']}")
+    if a.follow:
+        idx.follow()
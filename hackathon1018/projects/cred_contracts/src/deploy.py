@@ -1,64 +1,60 @@
-import argparse, json, os, time
-from algosdk import account, mnemonic, encoding
-from algosdk.v2client import algod, indexer
-from algosdk.future import transaction
-from pyteal import compileTeal, Mode
-from .app import app
-
-ALGOD = algod.AlgodClient("", "https://testnet-api.algonode.cloud")
-INDEX = indexer.IndexerClient("", "https://testnet-idx.algonode.cloud")
+import argparse, os
+from algosdk import encoding
+from algosdk import transaction
+from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+from . import methods, network
+from .artifact_cache import get_programs, get_teal, teal_key
 
 ART_PATH = "projects/cred_contracts/artifacts/app_id.json"
 
-def get_sk():
+def load_deployer():
     m = os.environ.get("DEPLOYER_MNEMONIC")
     assert m, "DEPLOYER_MNEMONIC missing"
-    return mnemonic.to_private_key(m)
+    return network.Account.from_mnemonic(m)
+
+# TestNet by default; endpoints overridable via ALGOD_SERVER / INDEXER_SERVER (see network.py)
+NET = network.Network("testnet", ART_PATH, account_loader=load_deployer)
+
+def get_sk():
+    return NET.account.private_key
 
 def compile_program(source: str):
-    return ALGOD.compile(source)["result"]
+    return NET.algod.compile(source)["result"]
 
 def deploy():
     sk = get_sk()
-    addr = account.address_from_private_key(sk)
-    approval = compile_program(compileTeal(app().approval_program, Mode.Application, 8))
-    clear = compile_program(compileTeal(app().clear_program, Mode.Application, 8))
-    sp = ALGOD.suggested_params()
+    addr = NET.account.address
+    approval, clear = get_programs(NET.algod)
+    sp = NET.suggested_params()
     txn = transaction.ApplicationCreateTxn(
         addr, sp,
         on_complete=transaction.OnComplete.NoOpOC.real,
-        approval_program=bytes.fromhex(approval),
-        clear_program=bytes.fromhex(clear),
-        global_schema=transaction.StateSchema(2,0),
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=transaction.StateSchema(methods.GLOBAL_UINTS, methods.GLOBAL_BYTES),
         local_schema=transaction.StateSchema(0,0),
-        extra_pages=0,
+        extra_pages=(len(approval) + len(clear) - 1) // 2048,  # programs over 2KB need extra pages
     )
-    stx = txn.sign(sk); txid = ALGOD.send_transaction(stx)
-    res = transaction.wait_for_confirmation(ALGOD, txid, 4)
+    stx = txn.sign(sk); txid = NET.algod.send_transaction(stx)
+    res = transaction.wait_for_confirmation(NET.algod, txid, 4)
     app_id = res["application-index"]
-    os.makedirs(os.path.dirname(ART_PATH), exist_ok=True)
-    with open(ART_PATH, "w") as f:
-        json.dump({"appId": app_id, "network": "testnet"}, f, indent=2)
+    NET.save_app_id(app_id)
     print("Deployed appId:", app_id)
 
-def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, cid_pointer=b""):
-    with open(ART_PATH) as f: app_id = json.load(f)["appId"]
-    sk = get_sk(); addr = account.address_from_private_key(sk)
+def call_method(name, method_args, boxes):
+    app_id, deployer = NET.app_id, NET.account
+    atc = AtomicTransactionComposer()
+    atc.add_method_call(app_id, methods.METHODS[name], deployer.address, methods.call_params(NET.suggested_params(), name), deployer.signer,
+                        method_args=method_args, boxes=[(app_id, b) for b in boxes])
+    return atc.execute(NET.algod, 4).tx_ids[0]
+
+def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, cid_pointer=b"", nft_asa_id=0):
     assert encoding.is_valid_address(subject)
-    sp = ALGOD.suggested_params()
-    args = [b"issue", cred_id.encode(), encoding.decode_address(subject), schema_code.to_bytes(1, "big"), bytes.fromhex(cred_hash_hex), expires_at.to_bytes(8, "big"), cid_pointer]
-    txn = transaction.ApplicationNoOpTxn(addr, sp, app_id, app_args=args, boxes=[(app_id, cred_id.encode())])
-    stx = txn.sign(sk); txid = ALGOD.send_transaction(stx)
-    transaction.wait_for_confirmation(ALGOD, txid, 4); print("issued", txid)
+    args = [cred_id, subject, schema_code, bytes.fromhex(cred_hash_hex), expires_at, cid_pointer[:32], nft_asa_id]
+    txid = call_method("issue", args, [cred_id.encode()]); print("issued", txid)
 
 def call_revoke(cred_id):
-    with open(ART_PATH) as f: app_id = json.load(f)["appId"]
-    sk = get_sk(); addr = account.address_from_private_key(sk)
-    sp = ALGOD.suggested_params()
-    args = [b"revoke", cred_id.encode()]
-    txn = transaction.ApplicationNoOpTxn(addr, sp, app_id, app_args=args, boxes=[(app_id, cred_id.encode())])
-    stx = txn.sign(sk); txid = ALGOD.send_transaction(stx)
-    transaction.wait_for_confirmation(ALGOD, txid, 4); print("revoked", txid)
+    txid = call_method("revoke", [cred_id], [cred_id.encode()]); print("revoked", txid)
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
@@ -68,8 +64,8 @@ if __name__ == "__main__":
     p.add_argument("--revoke", metavar="CRED_ID")
     a = p.parse_args()
     if a.compile:
-        compileTeal(app().approval_program, Mode.Application, 8)  # sanity
-        print("compiled ok")
+        get_teal(rebuild=True)
+        print(f"compiled ok, cached as {teal_key()}")
     if a.deploy: deploy()
     if a.issue:  call_issue(a.issue[0], a.issue[1], int(a.issue[2]), a.issue[3], int(a.issue[4]), a.issue[5].encode() if a.issue[5] else b"")
     if a.revoke: call_revoke(a.revoke)
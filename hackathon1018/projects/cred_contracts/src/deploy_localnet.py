@@ -1,29 +1,54 @@
-import argparse, json, os, time, base64
+import argparse, itertools, json, time
+from concurrent.futures import ThreadPoolExecutor
 from algosdk import account, mnemonic, encoding
-from algosdk.v2client import algod, indexer
 from algosdk import transaction
-from pyteal import compileTeal, Mode, Int
+from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+from algosdk.logic import get_application_address
 from algokit_utils import get_localnet_default_account
-from .app import app
-
-# LocalNet configuration
-ALGOD = algod.AlgodClient("a" * 64, "http://localhost:4001")
-INDEX = indexer.IndexerClient("a" * 64, "http://localhost:8980")
+from .artifact_cache import get_programs, get_teal, teal_key
+from .builders import (
+    issue_batch_builder, normalize_cid, normalize_cred_hash, pack_issue_calls, read_serial,
+    revoke_batch_builder, revoke_builder,
+)
+from .submitter import Submitter
+from .importer import BulkImporter, Journal, read_rows
+from . import merkle, methods, network, record, revocation, telemetry
+from .methods import MAX_GROUP_SIZE
+from .util import hash_credentials_batch
+from .verify import verify_onchain
+from .shards import Shard, ShardMap, ShardedRegistry, create_registry
 
 ART_PATH = "projects/cred_contracts/artifacts/app_id_localnet.json"
+SHARDS_PATH = "projects/cred_contracts/artifacts/shards_localnet.json"
 
-def get_deployer_account():
-    """Get the LocalNet dispenser account"""
+
+def _load_dispenser():
     try:
         # Use algokit_utils to get the funded dispenser account
-        return get_localnet_default_account(ALGOD)
+        return network.Account(get_localnet_default_account(NET.algod).private_key)
     except Exception as e:
         print(f"Failed to get LocalNet account: {e}")
         print("Make sure LocalNet is running and accessible")
         raise
 
+# LocalNet configuration (endpoints overridable via ALGOD_SERVER / INDEXER_SERVER, see network.py)
+NET = network.Network("localnet", ART_PATH, account_loader=_load_dispenser)
+
+def get_deployer_account():
+    """Get the LocalNet dispenser account (looked up once per process)"""
+    return NET.account
+
+def load_app_id():
+    """Read the deployed app ID from ART_PATH (once per process)"""
+    return NET.app_id
+
+def make_submitter(max_in_flight=32, queue_size=256):
+    """Create a pipelined submitter that signs as the LocalNet deployer"""
+    deployer_account = get_deployer_account()
+    return Submitter(NET.algod, deployer_account.private_key, max_in_flight=max_in_flight, queue_size=queue_size)
+
 def compile_program(source: str):
-    return ALGOD.compile(source)["result"]
+    return NET.algod.compile(source)["result"]
 
 def deploy():
     print("Deploying smart contract to LocalNet...")
@@ -35,29 +60,19 @@ def deploy():
         print(f"Using deployer address: {addr}")
         
         # Check if we have funds
-        account_info = ALGOD.account_info(addr)
+        account_info = NET.algod.account_info(addr)
         print(f"Account balance: {account_info['amount']} microAlgos")
         
         if account_info['amount'] < 1000000:  # Need at least 1 ALGO
             print("Warning: Low balance, but proceeding...")
         
-        # Compile the smart contract
+        # Compile the smart contract (reuses cached TEAL/bytecode when nothing changed)
         print("Compiling smart contract...")
-        approval_teal = compileTeal(app(), Mode.Application, version=8)
-        print(f"Approval TEAL: {approval_teal[:100]}...")  # Debug output
-        
-        # Compile TEAL to bytecode (returns base64, convert to bytes)
-        approval_program_b64 = ALGOD.compile(approval_teal)["result"]
-        approval_program = base64.b64decode(approval_program_b64)
+        approval_program, clear_program = get_programs(NET.algod)
         print(f"Approval program compiled: {len(approval_program)} bytes")  # Debug output
         
-        # Create clear state program (minimal)
-        clear_teal = compileTeal(Int(1), Mode.Application, version=8)
-        clear_program_b64 = ALGOD.compile(clear_teal)["result"]
-        clear_program = base64.b64decode(clear_program_b64)
-        
         # Get suggested parameters
-        sp = ALGOD.suggested_params()
+        sp = NET.suggested_params()
         print(f"Suggested params: {sp}")
         
         # Create application
@@ -66,32 +81,25 @@ def deploy():
             on_complete=transaction.OnComplete.NoOpOC.real,
             approval_program=approval_program,
             clear_program=clear_program,
-            global_schema=transaction.StateSchema(1, 1),  # 1 integer, 1 byte slice
+            global_schema=transaction.StateSchema(methods.GLOBAL_UINTS, methods.GLOBAL_BYTES),  # counters, admin + issuer table
             local_schema=transaction.StateSchema(0, 0),  # No local state
-            extra_pages=0,
+            extra_pages=(len(approval_program) + len(clear_program) - 1) // 2048,  # programs over 2KB need extra pages
         )
         
         # Sign and send transaction
         stx = txn.sign(sk)
-        txid = ALGOD.send_transaction(stx)
+        txid = NET.algod.send_transaction(stx)
         print(f"Transaction sent: {txid}")
         
         # Wait for confirmation
         print("Waiting for confirmation...")
-        res = transaction.wait_for_confirmation(ALGOD, txid, 4)
+        res = transaction.wait_for_confirmation(NET.algod, txid, 4)
         app_id = res["application-index"]
         
         # Save app ID
-        os.makedirs(os.path.dirname(ART_PATH), exist_ok=True)
-        with open(ART_PATH, "w") as f:
-            json.dump({
-                "appId": app_id, 
-                "network": "localnet",
-                "deployer": addr,
-                "deployedAt": int(time.time())
-            }, f, indent=2)
-        
-        print(f"Smart contract deployed successfully!")
+        NET.save_app_id(app_id, deployer=addr, deployedAt=int(time.time()))
+        
+        print("Smart contract deployed successfully!")
         print(f"Application ID: {app_id}")
         print(f"App ID saved to: {ART_PATH}")
         
@@ -101,15 +109,64 @@ def deploy():
         print(f"Deployment failed: {e}")
         raise
 
-def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, nft_asa_id, cid_pointer=b""):
-    """Call the issue method on the deployed contract"""
+def send_and_wait(atc, method, wait_rounds=4):
+    """Sign, send and confirm an ATC group, timing each phase; returns the first txid"""
+    with telemetry.span("sign", method=method):
+        stxns = atc.gather_signatures()
+    with telemetry.span("send", method=method):
+        txids = atc.submit(NET.algod)
+    with telemetry.span("wait_for_confirmation", method=method):
+        transaction.wait_for_confirmation(NET.algod, txids[0], wait_rounds)
+    telemetry.count("calls_total", method=method)
+    telemetry.observe("group_fee_microalgos", sum(stx.transaction.fee for stx in stxns), method=method)
+    return txids[0]
+
+def load_shard_admins(path):
+    """Accounts from a file of 25-word mnemonics, one per line"""
+    with open(path) as f:
+        return [network.Account.from_mnemonic(line.strip()) for line in f if line.strip()]
+
+def deploy_shards(count, names=None, strategy="hash", admins=(), fund=1_000_000):
+    """Deploy count registry apps and record the shard map in SHARDS_PATH
+    
+    Shard i is created (and administered) by admins[i], or by the LocalNet
+    dispenser when fewer admins are given; the dispenser funds every admin and
+    app account.
+    """
+    names = names or [f"shard-{i}" for i in range(count)]
+    if len(names) != count:
+        raise ValueError(f"{count} shards need {count} names, got {len(names)}")
+    dispenser = get_deployer_account()
+    approval, clear = get_programs(NET.algod)
+    shards = []
+    for i, name in enumerate(names):
+        admin = admins[i] if i < len(admins) else dispenser
+        if admin is not dispenser:
+            sp = NET.suggested_params()
+            pay = transaction.PaymentTxn(dispenser.address, sp, admin.address, fund + 1_000_000)
+            transaction.wait_for_confirmation(NET.algod, NET.algod.send_transaction(pay.sign(dispenser.private_key)), 4)
+        app_id = create_registry(NET.algod, admin, approval, clear, fund)
+        shards.append(Shard(name, app_id, admin.address))
+        print(f"Shard {name}: app {app_id}, admin {admin.address}")
+    shard_map = ShardMap(shards, strategy)
+    shard_map.save(SHARDS_PATH, network=NET.name, deployedAt=int(time.time()))
+    print(f"Shard map saved to: {SHARDS_PATH}")
+    return shard_map
+
+def sharded_registry(admins=(), max_in_flight=32):
+    """ShardedRegistry over SHARDS_PATH signing with the dispenser and the given admins"""
+    signers = {acct.address: acct.private_key for acct in [get_deployer_account(), *admins]}
+    return ShardedRegistry(NET.algod, ShardMap.load(SHARDS_PATH), signers, max_in_flight)
+
+def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, nft_asa_id=None, cid_pointer=b""):
+    """Call the issue method on the deployed contract
+    
+    With nft_asa_id=None the contract mints the NFT itself (issue_with_nft) in the
+    same transaction and its ASA id is printed.
+    """
     try:
-        with open(ART_PATH) as f: 
-            app_data = json.load(f)
-            app_id = app_data["appId"]
-        
+        app_id = load_app_id()
         deployer_account = get_deployer_account()
-        sk = deployer_account.private_key
         addr = deployer_account.address
         
         # Validate subject address
@@ -118,58 +175,30 @@ def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, nft_asa
         
         print(f"Issuing credential {cred_id} to {subject}")
         print(f"Schema code: {schema_code}")
-        print(f"NFT ASA ID: {nft_asa_id}")
-        
-        sp = ALGOD.suggested_params()
-        
-        # Ensure hash is exactly 32 bytes
-        if len(cred_hash_hex) % 2 != 0:
-            cred_hash_hex = cred_hash_hex + '0'  # Pad with 0 if odd length
-        cred_hash_bytes = bytes.fromhex(cred_hash_hex)
-        if len(cred_hash_bytes) != 32:
-            # Pad or truncate to exactly 32 bytes
-            cred_hash_bytes = cred_hash_bytes[:32].ljust(32, b'\x00')
-        
-        # Ensure CID pointer is exactly 32 bytes
-        cid_bytes = cid_pointer[:32].ljust(32, b'\x00')
-        
-        # Prepare arguments for the smart contract
-        args = [
-            b"issue",
-            cred_id.encode(),
-            encoding.decode_address(subject),
-            schema_code.to_bytes(1, "big"),
-            cred_hash_bytes,  # Now exactly 32 bytes
-            expires_at.to_bytes(8, "big"),
-            cid_bytes,  # Now exactly 32 bytes
-            nft_asa_id.to_bytes(8, "big")  # NFT ASA ID
-        ]
-        
-        # Debug: print argument lengths
-        print(f"Debug - Argument lengths:")
-        print(f"  cred_id: {len(args[1])} bytes")
-        print(f"  subject: {len(args[2])} bytes")
-        print(f"  schema_code: {len(args[3])} bytes")
-        print(f"  cred_hash: {len(args[4])} bytes")
-        print(f"  expires_at: {len(args[5])} bytes")
-        print(f"  cid_pointer: {len(args[6])} bytes")
-        print(f"  nft_asa_id: {len(args[7])} bytes")
-        
-        # Create application call transaction (sent by admin)
-        txn = transaction.ApplicationNoOpTxn(
-            addr, sp, app_id, 
-            app_args=args,
-            boxes=[(app_id, cred_id.encode())]
+        print(f"NFT ASA ID: {nft_asa_id if nft_asa_id is not None else 'minted by the contract'}")
+        
+        sp = NET.suggested_params()
+        
+        cred_hash_bytes = normalize_cred_hash(cred_hash_hex)
+        cid_bytes = normalize_cid(cid_pointer)
+        
+        # Typed ARC-4 call; more transactions can be added to the same composer
+        name = "issue" if nft_asa_id is not None else "issue_with_nft"
+        method_args = [cred_id, subject, schema_code, cred_hash_bytes, expires_at, cid_bytes]
+        if nft_asa_id is not None:
+            method_args.append(nft_asa_id)
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(
+            app_id, methods.METHODS[name], addr, methods.call_params(sp, name), deployer_account.signer,
+            method_args=method_args,
+            boxes=[(app_id, cred_id.encode())],
         )
-        
-        stx = txn.sign(sk)
-        txid = ALGOD.send_transaction(stx)
-        
-        print(f"Issue transaction sent: {txid}")
-        
-        # Wait for confirmation
-        transaction.wait_for_confirmation(ALGOD, txid, 4)
+        txid = send_and_wait(atc, name)
+        telemetry.observe("box_bytes", len(cred_id.encode()) + record.COMPACT_SIZE + len(cid_bytes), method=name)
         print(f"Credential issued successfully: {txid}")
+        if nft_asa_id is None:
+            result = atc.parse_result(methods.METHODS[name], txid, NET.algod.pending_transaction_info(txid))
+            print(f"NFT minted: ASA {result.return_value}")
         
         return txid
         
@@ -177,34 +206,222 @@ def call_issue(cred_id, subject, schema_code, cred_hash_hex, expires_at, nft_asa
         print(f"Issue failed: {e}")
         raise
 
-def call_revoke(cred_id):
-    """Call the revoke method on the deployed contract"""
+def load_issue_batch(path):
+    """Lazily read credentials from a JSONL file (one credential object per line)
+    
+    Each line needs cred_id, subject, schema_code, cred_hash (hex), expires_at and
+    nft_asa_id; cid_pointer is optional.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def call_issue_batch(creds, max_in_flight=32):
+    """Issue many credentials using issue_batch calls packed into atomic groups
+    
+    Groups are streamed through a Submitter so up to max_in_flight groups wait for
+    confirmation at the same time. Returns a list of (cred_id, txid) pairs.
+    """
     try:
-        with open(ART_PATH) as f: 
-            app_data = json.load(f)
-            app_id = app_data["appId"]
+        app_id = load_app_id()
+        addr = get_deployer_account().address
+        
+        futures = []
+        started = time.time()
+        calls = pack_issue_calls(creds)
+        
+        with make_submitter(max_in_flight) as submitter:
+            while True:
+                group_calls = list(itertools.islice(calls, methods.ISSUE_CALLS_PER_GROUP))
+                if not group_calls:
+                    break
+                futures.append((group_calls, submitter.submit(issue_batch_builder(app_id, addr, group_calls))))
+        
+        results = []
+        for group_calls, future in futures:
+            txids = future.result()["txids"]
+            for call, txid in zip(group_calls, txids):
+                for cred_id, rec in call:
+                    # box = record minus the id_len byte and batch tail, plus the stored fields
+                    telemetry.observe("box_bytes", len(rec) - 1 - record.BATCH_TAIL_SIZE + record.COMPACT_SIZE,
+                                      method="issue_batch")
+                    results.append((cred_id, txid))
+                    print(f"  {cred_id}: {txid}")
+        
+        elapsed = time.time() - started
+        rate = len(results) / elapsed if elapsed > 0 else 0.0
+        print(f"Issued {len(results)} credentials in {elapsed:.2f}s ({rate:.1f} credentials/s)")
+        
+        return results
+        
+    except Exception as e:
+        print(f"Batch issue failed: {e}")
+        raise
+
+def call_revoke_many(cred_ids, max_in_flight=32):
+    """Revoke many credentials, keeping up to max_in_flight revocations in flight
+    
+    Returns a list of (cred_id, txid) pairs.
+    """
+    try:
+        app_id = load_app_id()
+        addr = get_deployer_account().address
+        
+        with make_submitter(max_in_flight) as submitter:
+            futures = [
+                (cred_id, submitter.submit(revoke_builder(app_id, addr, cred_id)))
+                for cred_id in cred_ids
+            ]
+        
+        results = [(cred_id, future.result()["txids"][0]) for cred_id, future in futures]
+        print(f"Revoked {len(results)} credentials")
+        return results
+        
+    except Exception as e:
+        print(f"Batch revoke failed: {e}")
+        raise
+
+def call_revoke_batch(cred_ids, max_in_flight=32):
+    """Revoke many credentials by setting their bits in the revocation bitmap
+    
+    Serials are grouped per bitmap page; credentials issued before serials existed
+    fall back to single revoke calls. Returns the txids of the submitted groups.
+    """
+    try:
+        app_id = load_app_id()
+        addr = get_deployer_account().address
+        cred_ids = list(cred_ids)
+        
+        with ThreadPoolExecutor(8) as pool:
+            serials = dict(zip(cred_ids, pool.map(lambda c: read_serial(NET.algod, app_id, c), cred_ids)))
+        legacy = [cred_id for cred_id, serial in serials.items() if serial == 0]
+        calls = revocation.pack_revoke_calls(serial for serial in serials.values() if serial)
+        
+        futures = []
+        with make_submitter(max_in_flight) as submitter:
+            while True:
+                group_calls = list(itertools.islice(calls, MAX_GROUP_SIZE))
+                if not group_calls:
+                    break
+                futures.append(submitter.submit(revoke_batch_builder(app_id, addr, group_calls)))
+            for cred_id in legacy:
+                futures.append(submitter.submit(revoke_builder(app_id, addr, cred_id)))
+        
+        txids = [future.result()["txids"][0] for future in futures]
+        print(f"Revoked {len(cred_ids)} credentials in {len(txids)} groups ({len(legacy)} without a serial)")
+        return txids
+        
+    except Exception as e:
+        print(f"Batch revoke failed: {e}")
+        raise
+
+def load_cred_ids(path):
+    """Read one cred_id per line"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def call_import(path, journal_path=None, max_in_flight=32):
+    """Stream a CSV/JSONL file through the hash, mint and issue stages
+    
+    Progress is checkpointed in journal_path (default: PATH.journal.sqlite);
+    rerunning with the same journal resumes without double-issuing.
+    """
+    try:
+        app_id = load_app_id()
+        addr = get_deployer_account().address
+        journal = Journal(journal_path or path + ".journal.sqlite")
         
+        with make_submitter(max_in_flight) as submitter:
+            importer = BulkImporter(NET.algod, NET.indexer, submitter, app_id, addr, journal)
+            issued = importer.run(read_rows(path))
+        
+        print(f"Import finished: {issued} issued, {importer.skipped} already done")
+        return issued
+        
+    except Exception as e:
+        print(f"Import failed: {e}")
+        raise
+
+def call_anchor_batch(batch_id, schema_code, path, proofs_path=None):
+    """Anchor a Merkle root over every credential in a JSONL file and write inclusion proofs
+    
+    Each input line is {"cred_id": ..., "credential": {...}}. Proofs are written
+    one per line to proofs_path (default: PATH.proofs.jsonl) for the holders.
+    """
+    try:
+        app_id = load_app_id()
         deployer_account = get_deployer_account()
-        sk = deployer_account.private_key
         addr = deployer_account.address
         
-        print(f"Revoking credential {cred_id}")
-        
-        sp = ALGOD.suggested_params()
-        args = [b"revoke", cred_id.encode()]
+        cred_ids = [row["cred_id"] for row in read_rows(path)]
+        digests = list(hash_credentials_batch(row["credential"] for row in read_rows(path)))
+        tree = merkle.MerkleTree(digests)
+        print(f"Batch {batch_id}: {tree.leaf_count} credentials, root {tree.root.hex()}")
         
-        txn = transaction.ApplicationNoOpTxn(
-            addr, sp, app_id, 
-            app_args=args, 
-            boxes=[(app_id, cred_id.encode())]
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(
+            app_id, methods.METHODS["anchor_root"], addr, NET.suggested_params(), deployer_account.signer,
+            method_args=[batch_id, tree.root, schema_code, tree.leaf_count],
+            boxes=[(app_id, merkle.root_name(batch_id.encode()))],
         )
+        txid = atc.execute(NET.algod, 4).tx_ids[0]
+        print(f"Root anchored: {txid}")
+        
+        proofs_path = proofs_path or path + ".proofs.jsonl"
+        with open(proofs_path, "w") as f:
+            for index, (cred_id, digest) in enumerate(zip(cred_ids, digests)):
+                f.write(json.dumps({
+                    "cred_id": cred_id,
+                    "batch_id": batch_id,
+                    "index": index,
+                    "cred_hash": digest.hex(),
+                    "proof": [sibling.hex() for sibling in tree.proof(index)],
+                }) + "\n")
+        print(f"Inclusion proofs written to: {proofs_path}")
         
-        stx = txn.sign(sk)
-        txid = ALGOD.send_transaction(stx)
+        return txid
         
-        print(f"Revoke transaction sent: {txid}")
+    except Exception as e:
+        print(f"Anchor failed: {e}")
+        raise
+
+def verify_batch_proof(entry):
+    """Check one inclusion proof (a line of the proofs file) against the anchored root"""
+    root_box = merkle.read_root(NET.algod, load_app_id(), entry["batch_id"].encode())
+    return merkle.verify(
+        root_box["root"],
+        bytes.fromhex(entry["cred_hash"]),
+        entry["index"],
+        [bytes.fromhex(sibling) for sibling in entry["proof"]],
+        root_box["leaf_count"],
+    )
+
+def call_verify(cred_id, cred_hash_hex):
+    """Ask the contract for a verdict through simulate (no fee, no confirmation wait)"""
+    verdict = verify_onchain(NET.algod, load_app_id(), [cred_id], [normalize_cred_hash(cred_hash_hex)],
+                             sender=get_deployer_account().address)[0]
+    print(f"{cred_id}: {'VALID' if verdict.valid else 'INVALID'} (found={verdict.found}, "
+          f"hash_match={verdict.hash_match}, expired={verdict.expired}, revoked={verdict.revoked})")
+    return verdict
+
+def call_revoke(cred_id):
+    """Call the revoke method on the deployed contract"""
+    try:
+        app_id = load_app_id()
+        deployer_account = get_deployer_account()
+        addr = deployer_account.address
+        
+        print(f"Revoking credential {cred_id}")
         
-        transaction.wait_for_confirmation(ALGOD, txid, 4)
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(
+            app_id, methods.METHODS["revoke"], addr, NET.suggested_params(), deployer_account.signer,
+            method_args=[cred_id],
+            boxes=[(app_id, cred_id.encode())],
+        )
+        txid = send_and_wait(atc, "revoke")
         print(f"Credential revoked successfully: {txid}")
         
         return txid
@@ -216,28 +433,20 @@ def call_revoke(cred_id):
 def fund_app_account(amount_microalgos=200000):
     """Fund the application account for box storage operations"""
     try:
-        with open(ART_PATH) as f: 
-            app_data = json.load(f)
-            app_id = app_data["appId"]
-        
+        app_id = load_app_id()
         deployer_account = get_deployer_account()
         sk = deployer_account.private_key
         addr = deployer_account.address
         
-        # Get the application account address (derived from app ID)
-        app_info = ALGOD.application_info(app_id)
-        creator_addr = app_info['params']['creator']
-        
-        # The application account address is derived from the creator and app ID
-        # For simplicity, we'll fund the creator account which is the app account in this case
-        app_account_addr = creator_addr
+        # Box MBR is charged to the application account, derived from the app ID
+        app_account_addr = get_application_address(app_id)
         
         print(f"Funding application account: {app_account_addr}")
         print(f"Amount: {amount_microalgos} microALGOs")
         
         # Check current balance
         try:
-            app_account_info = ALGOD.account_info(app_account_addr)
+            app_account_info = NET.algod.account_info(app_account_addr)
             current_balance = app_account_info['amount']
             print(f"Current app account balance: {current_balance} microALGOs")
         except Exception as e:
@@ -249,7 +458,7 @@ def fund_app_account(amount_microalgos=200000):
             return True
         
         # Check deployer balance
-        deployer_info = ALGOD.account_info(addr)
+        deployer_info = NET.algod.account_info(addr)
         deployer_balance = deployer_info['amount']
         print(f"Deployer balance: {deployer_balance} microALGOs")
         
@@ -258,23 +467,23 @@ def fund_app_account(amount_microalgos=200000):
             return False
         
         # Create payment transaction
-        sp = ALGOD.suggested_params()
+        sp = NET.suggested_params()
         txn = transaction.PaymentTxn(
             addr, sp, app_account_addr, amount_microalgos
         )
         
         stx = txn.sign(sk)
-        txid = ALGOD.send_transaction(stx)
+        txid = NET.algod.send_transaction(stx)
         
         print(f"Funding transaction sent: {txid}")
         
         # Wait for confirmation
-        transaction.wait_for_confirmation(ALGOD, txid, 4)
+        transaction.wait_for_confirmation(NET.algod, txid, 4)
         
         # Verify the funding
-        app_account_info = ALGOD.account_info(app_account_addr)
+        app_account_info = NET.algod.account_info(app_account_addr)
         new_balance = app_account_info['amount']
-        print(f"App account funded successfully!")
+        print("App account funded successfully!")
         print(f"New balance: {new_balance} microALGOs")
         
         return True
@@ -290,8 +499,8 @@ def get_app_info():
             app_data = json.load(f)
             app_id = app_data["appId"]
         
-        app_info = ALGOD.application_info(app_id)
-        print(f"Contract Information:")
+        app_info = NET.algod.application_info(app_id)
+        print("Contract Information:")
         print(f"App ID: {app_id}")
         print(f"Network: {app_data['network']}")
         print(f"Deployer: {app_data['deployer']}")
@@ -307,18 +516,34 @@ def get_app_info():
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Deploy and interact with credential smart contract on LocalNet")
     p.add_argument("--deploy", action="store_true", help="Deploy the contract")
-    p.add_argument("--compile", action="store_true", help="Compile the contract")
+    p.add_argument("--compile", action="store_true", help="Compile the contract to TEAL, replacing any cached copy")
     p.add_argument("--fund", type=int, metavar="AMOUNT", help="Fund the application account (amount in microALGOs)")
     p.add_argument("--issue", nargs=7, metavar=("CRED_ID","SUBJECT","SCHEMA_CODE","HASH_HEX","EXPIRES_UNIX","NFT_ASA_ID","CID_POINTER"), help="Issue a credential")
+    p.add_argument("--issue-with-nft", nargs=6, metavar=("CRED_ID","SUBJECT","SCHEMA_CODE","HASH_HEX","EXPIRES_UNIX","CID_POINTER"), help="Issue a credential and mint its NFT in one transaction (the app account pays the 0.1 ALGO asset MBR)")
+    p.add_argument("--issue-batch", metavar="FILE.jsonl", help="Issue every credential in a JSONL file using batched groups")
+    p.add_argument("--import", dest="import_file", metavar="FILE", help="Stream a CSV/JSONL file through hash, NFT mint and issuance")
+    p.add_argument("--journal", metavar="PATH", help="Progress journal for --import (default: FILE.journal.sqlite)")
+    p.add_argument("--in-flight", type=int, default=32, metavar="N", help="Max transaction groups in flight for batch operations")
     p.add_argument("--revoke", metavar="CRED_ID", help="Revoke a credential")
+    p.add_argument("--revoke-batch", metavar="FILE", help="Revoke every cred_id listed in FILE (one per line) via the revocation bitmap")
+    p.add_argument("--anchor-batch", nargs=3, metavar=("BATCH_ID","SCHEMA_CODE","FILE.jsonl"), help="Anchor a Merkle root over a batch of credentials and write inclusion proofs")
+    p.add_argument("--verify", nargs=2, metavar=("CRED_ID","HASH_HEX"), help="Verify a credential with the contract's verify method (simulated)")
+    p.add_argument("--verify-proof", metavar="PROOF_JSON", help="Verify an inclusion proof (one line of a proofs file) against its anchored root")
     p.add_argument("--info", action="store_true", help="Show contract information")
+    p.add_argument("--deploy-shards", type=int, metavar="N", help="Deploy N registry apps and write the shard map")
+    p.add_argument("--shard-names", metavar="A,B,...", help="Shard names for --deploy-shards (with --routing prefix: the cred_id prefixes)")
+    p.add_argument("--routing", choices=("hash", "prefix"), default="hash", help="How cred_ids map to shards")
+    p.add_argument("--shard-admins", metavar="FILE", help="Mnemonics of the shard admins, one per line (default: the dispenser)")
+    p.add_argument("--sharded", action="store_true", help="Route --issue-batch, --revoke-batch and --verify through the shard map")
+    p.add_argument("--telemetry", metavar="SINK", help="Record spans and metrics: jsonl:PATH, prom:PATH or otel (default: $CRED_TELEMETRY)")
     
     a = p.parse_args()
+    telemetry.configure(a.telemetry)
     
     if a.compile:
         print("Compiling smart contract...")
-        compileTeal(app(), Mode.Application, version=8)
-        print("Compilation successful")
+        get_teal(rebuild=True)
+        print(f"Compilation successful, cached as {teal_key()}")
         
     if a.deploy: 
         deploy()
@@ -326,11 +551,45 @@ if __name__ == "__main__":
     if a.fund is not None:
         fund_app_account(a.fund)
         
+    shard_admins = load_shard_admins(a.shard_admins) if a.shard_admins else []
+    if a.deploy_shards:
+        deploy_shards(a.deploy_shards, a.shard_names.split(",") if a.shard_names else None, a.routing, shard_admins)
+    registry = sharded_registry(shard_admins, a.in_flight) if a.sharded else None
+        
     if a.issue:  
         call_issue(a.issue[0], a.issue[1], int(a.issue[2]), a.issue[3], int(a.issue[4]), int(a.issue[5]), a.issue[6].encode() if a.issue[6] else b"")
         
+    if a.issue_with_nft:
+        call_issue(a.issue_with_nft[0], a.issue_with_nft[1], int(a.issue_with_nft[2]), a.issue_with_nft[3], int(a.issue_with_nft[4]), None, a.issue_with_nft[5].encode() if a.issue_with_nft[5] else b"")
+        
+    if a.issue_batch and registry:
+        print(f"Failed groups per shard: {registry.issue_batch(load_issue_batch(a.issue_batch))}")
+    elif a.issue_batch:
+        call_issue_batch(load_issue_batch(a.issue_batch), a.in_flight)
+        
+    if a.import_file:
+        call_import(a.import_file, a.journal, a.in_flight)
+        
     if a.revoke: 
         call_revoke(a.revoke)
         
+    if a.revoke_batch and registry:
+        print(f"Failed groups per shard: {registry.revoke_batch(load_cred_ids(a.revoke_batch))}")
+    elif a.revoke_batch:
+        call_revoke_batch(load_cred_ids(a.revoke_batch), a.in_flight)
+        
+    if a.anchor_batch:
+        call_anchor_batch(a.anchor_batch[0], int(a.anchor_batch[1]), a.anchor_batch[2])
+        
+    if a.verify and registry:
+        verdict = registry.verify_many([a.verify[0]], [normalize_cred_hash(a.verify[1])])[0]
+        print(f"{a.verify[0]} ({registry.map.route(a.verify[0]).name}): {'VALID' if verdict.valid else 'INVALID'}")
+    elif a.verify:
+        call_verify(a.verify[0], a.verify[1])
+        
+    if a.verify_proof:
+        with open(a.verify_proof) as f:
+            print("Proof valid" if verify_batch_proof(json.loads(f.read())) else "Proof INVALID")
+        
     if a.info:
         get_app_info()
@@ -0,0 +1,321 @@
+# Streaming bulk import: CSV/JSONL rows -> hash -> NFT mint -> on-chain issue
+# Each stage runs in its own thread and hands work to the next one through a
+# bounded queue, so memory stays flat for any input size. Progress is checkpointed
+# in a SQLite journal (one row per cred_id) so an interrupted import can be rerun
+# with the same journal and picks up where it stopped without double-issuing.
+import base64
+import csv
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from algosdk import encoding, transaction
+from algosdk.error import AlgodHTTPError
+
+from . import methods, record
+from .util import credential_digest
+
+MINT_NOTE_PREFIX = b"educhain-mint:"
+MINT_GROUP_SIZE = 16
+ISSUE_CALL_SIZE = methods.MAX_BOX_REFS         # credentials per issue_batch call
+ISSUE_GROUP_SIZE = methods.ISSUE_CALLS_PER_GROUP  # issue_batch calls per group, plus budget calls
+_DONE = object()
+
+# Journal states, in order
+MINTING, MINTED, ISSUING, ISSUED = "minting", "minted", "issuing", "issued"
+
+
+class Journal:
+    """Per-credential progress of an import, stored in SQLite"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            "cred_id TEXT PRIMARY KEY, state TEXT NOT NULL, nft_asa_id INTEGER, txid TEXT)"
+        )
+        self.db.commit()
+
+    def get(self, cred_id):
+        """Return (state, nft_asa_id) or None"""
+        with self._lock:
+            return self.db.execute("SELECT state, nft_asa_id FROM progress WHERE cred_id = ?", (cred_id,)).fetchone()
+
+    def mark(self, entries):
+        """Record (cred_id, state, nft_asa_id, txid) tuples in one transaction"""
+        with self._lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?)", entries)
+
+    def counts(self):
+        with self._lock:
+            return dict(self.db.execute("SELECT state, COUNT(*) FROM progress GROUP BY state").fetchall())
+
+
+def read_rows(path):
+    """Lazily yield rows from a .csv or .jsonl file"""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def normalize_row(row):
+    """Split an input row into issue fields and the credential document
+
+    Rows need cred_id, subject, schema_code and expires_at; cid_pointer is optional.
+    The document is the "credential" field (object or JSON string) if present,
+    otherwise every remaining column.
+    """
+    fields = ("cred_id", "subject", "schema_code", "expires_at", "cid_pointer")
+    document = row.get("credential")
+    if document is None:
+        document = {k: v for k, v in row.items() if k not in fields}
+    elif isinstance(document, str):
+        document = json.loads(document)
+    if not encoding.is_valid_address(row["subject"]):
+        raise ValueError(f"Invalid subject address: {row['subject']}")
+    return {
+        "cred_id": str(row["cred_id"]),
+        "subject": row["subject"],
+        "schema_code": int(row["schema_code"]),
+        "expires_at": int(row.get("expires_at") or 0),
+        "cid_pointer": (row.get("cid_pointer") or "").encode()[:32],
+        "document": document,
+    }
+
+
+class BulkImporter:
+    """Run the hash -> mint -> issue pipeline over a stream of rows"""
+
+    def __init__(self, algod_client, indexer_client, submitter, app_id, addr, journal, queue_size=256):
+        self.algod = algod_client
+        self.indexer = indexer_client
+        self.submitter = submitter
+        self.app_id = app_id
+        self.addr = addr
+        self.journal = journal
+        self.queue_size = queue_size
+        self.skipped = 0
+        self.issued = 0
+        self.errors = []
+        self._failed = threading.Event()
+
+    def run(self, rows):
+        """Import every row; returns the number of credentials issued by this run"""
+        hashed = queue.Queue(self.queue_size)
+        minted = queue.Queue(self.queue_size // MINT_GROUP_SIZE or 1)
+        issuing = queue.Queue(4)
+        stages = [
+            threading.Thread(target=self._guard, args=(self._hash_stage, rows, hashed), daemon=True),
+            threading.Thread(target=self._guard, args=(self._mint_stage, hashed, minted), daemon=True),
+            threading.Thread(target=self._guard, args=(self._issue_stage, minted, issuing), daemon=True),
+        ]
+        for t in stages:
+            t.start()
+        started = time.time()
+        self._collect(issuing, started)
+        for t in stages:
+            t.join()
+        if self.errors:
+            raise self.errors[0]
+        return self.issued
+
+    def _guard(self, stage, inbox, outbox):
+        # A failing stage still signals the next one so the pipeline drains
+        try:
+            stage(inbox, outbox)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            try:
+                self._put(outbox, _DONE)
+            except RuntimeError:
+                pass  # the next stage stops on its own once the import has failed
+
+    def _fail(self, error):
+        self.errors.append(error)
+        self._failed.set()
+        print(f"Import failed: {error}")
+
+    def _put(self, outbox, entry):
+        # Blocks while the next stage is busy, but gives up once any stage has failed
+        while True:
+            try:
+                outbox.put(entry, timeout=0.5)
+                return
+            except queue.Full:
+                if self._failed.is_set():
+                    raise RuntimeError("import aborted") from None
+
+    def _get(self, inbox):
+        # Waits for the previous stage, or reports _DONE once the import has failed and the queue is empty
+        while True:
+            try:
+                return inbox.get(timeout=0.5)
+            except queue.Empty:
+                if self._failed.is_set():
+                    return _DONE
+
+    # --- stage 1: canonicalize + hash --------------------------------------
+
+    def _hash_stage(self, rows, outbox):
+        for row in rows:
+            item = normalize_row(row)
+            progress = self._resume_state(item["cred_id"])
+            if progress is not None and progress[0] == ISSUED:
+                self.skipped += 1
+                continue
+            item["nft_asa_id"] = progress[1] if progress is not None and progress[0] == MINTED else None
+            item["cred_hash"] = credential_digest(item.pop("document"))
+            self._put(outbox, item)
+
+    def _resume_state(self, cred_id):
+        """Settle states left in flight by a crash before trusting the journal"""
+        progress = self.journal.get(cred_id)
+        if progress is None:
+            return None
+        state, nft_asa_id = progress
+        if state == ISSUING:
+            state = ISSUED if self._box_exists(cred_id) else MINTED
+        elif state == MINTING:
+            nft_asa_id = self._find_minted_asset(cred_id)
+            state = MINTED if nft_asa_id else None
+        if state is None:
+            return None
+        self.journal.mark([(cred_id, state, nft_asa_id, None)])
+        return state, nft_asa_id
+
+    def _box_exists(self, cred_id):
+        try:
+            self.algod.application_box_by_name(self.app_id, cred_id.encode())
+            return True
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    def _find_minted_asset(self, cred_id):
+        # note_prefix also matches longer cred_ids ("a1" finds "a10"), so compare whole notes
+        note = MINT_NOTE_PREFIX + cred_id.encode()
+        next_page = None
+        while True:
+            res = self.indexer.search_transactions(
+                address=self.addr, txn_type="acfg", note_prefix=note, next_page=next_page
+            )
+            for txn in res.get("transactions", []):
+                if txn.get("created-asset-index") and base64.b64decode(txn.get("note", "")) == note:
+                    return txn["created-asset-index"]
+            next_page = res.get("next-token")
+            if not next_page or not res.get("transactions"):
+                return None
+
+    # --- stage 2: mint commemorative NFTs ----------------------------------
+
+    def _mint_builder(self, items):
+        def build(sp):
+            return [
+                transaction.AssetConfigTxn(
+                    self.addr, sp,
+                    total=1, decimals=0, default_frozen=False,
+                    unit_name=methods.NFT_UNIT_NAME,
+                    asset_name=methods.NFT_NAME_PREFIX + item["cred_id"][-methods.NFT_NAME_ID_CHARS:],
+                    url=methods.NFT_URL_PREFIX + item["cred_id"],
+                    metadata_hash=item["cred_hash"],
+                    manager=self.addr, reserve=self.addr, freeze=self.addr, clawback=self.addr,
+                    note=MINT_NOTE_PREFIX + item["cred_id"].encode(),
+                )
+                for item in items
+            ]
+        return build
+
+    def _mint_stage(self, inbox, outbox):
+        batch = []
+        while True:
+            item = self._get(inbox)
+            if item is not _DONE:
+                if item["nft_asa_id"] is not None:
+                    self._put(outbox, ([item], None))  # minted by an earlier run
+                    continue
+                batch.append(item)
+            if batch and (item is _DONE or len(batch) == MINT_GROUP_SIZE):
+                self.journal.mark([(i["cred_id"], MINTING, None, None) for i in batch])
+                self._put(outbox, (batch, self.submitter.submit(self._mint_builder(batch))))
+                batch = []
+            if item is _DONE:
+                return
+
+    # --- stage 3: issue ----------------------------------------------------
+
+    def _issue_builder(self, items):
+        calls = [items[i:i + ISSUE_CALL_SIZE] for i in range(0, len(items), ISSUE_CALL_SIZE)]
+        cost = sum(methods.call_cost("issue_batch", len(call)) for call in calls)
+
+        def build(sp):
+            return methods.with_budget([
+                methods.app_call(
+                    self.app_id, self.addr, sp, "issue_batch",
+                    b"".join(
+                        record.encode_batch_record(
+                            i["cred_id"].encode(), encoding.decode_address(i["subject"]), i["schema_code"],
+                            i["cred_hash"], i["expires_at"], i["cid_pointer"], i["nft_asa_id"],
+                        )
+                        for i in call
+                    ),
+                    boxes=[i["cred_id"].encode() for i in call],
+                )
+                for call in calls
+            ], self.app_id, self.addr, sp, cost)
+        return build
+
+    def _submit_issue(self, batch, outbox):
+        self.journal.mark([(i["cred_id"], ISSUING, i["nft_asa_id"], None) for i in batch])
+        self._put(outbox, (batch, self.submitter.submit(self._issue_builder(batch))))
+
+    def _issue_stage(self, inbox, outbox):
+        batch = []
+        while True:
+            entry = self._get(inbox)
+            if entry is _DONE:
+                break
+            if self._failed.is_set():
+                continue  # drain so upstream stages can finish
+            items, future = entry
+            if future is not None:
+                txids = future.result()["txids"]
+                for item, txid in zip(items, txids):
+                    item["nft_asa_id"] = self.algod.pending_transaction_info(txid)["asset-index"]
+                self.journal.mark([(i["cred_id"], MINTED, i["nft_asa_id"], t) for i, t in zip(items, txids)])
+            batch.extend(items)
+            while len(batch) >= ISSUE_CALL_SIZE * ISSUE_GROUP_SIZE:
+                self._submit_issue(batch[:ISSUE_CALL_SIZE * ISSUE_GROUP_SIZE], outbox)
+                batch = batch[ISSUE_CALL_SIZE * ISSUE_GROUP_SIZE:]
+        if batch:
+            self._submit_issue(batch, outbox)
+
+    # --- final: confirm and checkpoint -------------------------------------
+
+    def _collect(self, inbox, started):
+        while True:
+            entry = self._get(inbox)
+            if entry is _DONE:
+                return
+            items, future = entry
+            try:
+                txids = future.result()["txids"]
+            except Exception as e:
+                self._fail(e)  # these stay "issuing" and are re-checked on the next run
+                continue
+            self.journal.mark([
+                (item["cred_id"], ISSUED, item["nft_asa_id"], txids[n // ISSUE_CALL_SIZE])
+                for n, item in enumerate(items)
+            ])
+            self.issued += len(items)
+            elapsed = time.time() - started
+            print(f"Issued {self.issued} credentials ({self.skipped} already done, {self.issued / elapsed:.1f}/s)")
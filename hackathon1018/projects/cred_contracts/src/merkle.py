@@ -0,0 +1,93 @@
+# Merkle-batched issuance
+# Many credential digests are anchored under one root stored in a single box
+# (anchor_root() in app.py); each holder keeps an inclusion proof. Leaves and
+# inner nodes are domain separated (0x00 / 0x01 prefix) and an odd node at any
+# level is paired with itself, so every proof has exactly depth() siblings.
+import base64
+import hashlib
+import struct
+
+from .record import _layout
+
+ROOT_PREFIX = b"\x00mrk"  # cred_ids are text, so they never start with a NUL byte
+
+# Root box layout, same conventions as record.FIELDS
+ROOT_FIELDS = (
+    ("root", 32),
+    ("issuer", 32),
+    ("schema_code", 8),
+    ("issued_at", 8),
+    ("leaf_count", 8),
+)
+ROOT_OFFSETS, ROOT_SIZE = _layout(ROOT_FIELDS)  # 88 bytes
+ROOT_STRUCT = struct.Struct(">32s32sQQQ")
+
+
+def leaf_hash(digest):
+    return hashlib.sha256(b"\x00" + digest).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def root_name(batch_id):
+    return ROOT_PREFIX + batch_id
+
+
+def depth(leaf_count):
+    return max(leaf_count - 1, 0).bit_length()
+
+
+class MerkleTree:
+    """Merkle tree over 32-byte credential digests (hash_credential output)"""
+
+    def __init__(self, digests):
+        level = [leaf_hash(d) for d in digests]
+        if not level:
+            raise ValueError("Merkle tree needs at least one leaf")
+        self.leaf_count = len(level)
+        self.levels = [level]
+        while len(level) > 1:
+            if len(level) % 2:
+                level = level + [level[-1]]
+            level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+            self.levels.append(level)
+
+    @property
+    def root(self):
+        return self.levels[-1][0]
+
+    def proof(self, index):
+        """Sibling hashes from the leaf up to (not including) the root"""
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(index)
+        siblings = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            siblings.append(level[sibling] if sibling < len(level) else level[index])
+            index //= 2
+        return siblings
+
+
+def compute_root(digest, index, proof):
+    node = leaf_hash(digest)
+    for sibling in proof:
+        node = node_hash(node, sibling) if index % 2 == 0 else node_hash(sibling, node)
+        index //= 2
+    return node
+
+
+def verify(root, digest, index, proof, leaf_count):
+    """Check an inclusion proof the same way verify_proof() does on chain"""
+    return 0 <= index < leaf_count and len(proof) == depth(leaf_count) and compute_root(digest, index, proof) == root
+
+
+def decode_root_box(value):
+    return dict(zip(dict(ROOT_FIELDS), ROOT_STRUCT.unpack_from(value)))
+
+
+def read_root(algod_client, app_id, batch_id):
+    """Fetch and decode the anchored root box of a batch"""
+    box = algod_client.application_box_by_name(app_id, root_name(batch_id))
+    return decode_root_box(base64.b64decode(box["value"]))
@@ -0,0 +1,166 @@
+# ARC-4 interface of the registry contract
+# Every call starts with the 4-byte selector of one of these signatures (app.py
+# dispatches on it) followed by the ARC-4 encoded arguments. Dynamic values
+# (string, byte[]) carry a 2-byte length prefix; the contract strips it, so box
+# names are still the raw cred_id / batch_id bytes.
+import copy
+
+from algosdk import abi, constants, transaction
+
+from .record import MAX_ISSUERS
+
+# Protocol limits that bound how many credentials fit in one call / group
+MAX_GROUP_SIZE = 16  # transactions per atomic group
+MAX_BOX_REFS = 8     # box references per app call (one per credential)
+
+SIGNATURES = (
+    "issue(string,address,uint8,byte[32],uint64,byte[],uint64)void",
+    "issue_with_nft(string,address,uint8,byte[32],uint64,byte[])uint64",
+    "issue_batch(byte[])void",
+    "revoke(string)void",
+    "revoke_batch(uint64,byte[])void",
+    "anchor_root(string,byte[32],uint64,uint64)void",
+    "verify_proof(string,byte[32],uint64,byte[])void",
+    "sweep(byte[])void",
+    "migrate(byte[])void",
+    "add_issuer(address)uint8",
+    "verify(string,byte[32])uint8",
+    "verify_batch(byte[])byte[]",
+    "get(string)byte[]",
+    "get_nft(string)uint64",
+)
+
+METHODS = {m.name: m for m in map(abi.Method.from_signature, SIGNATURES)}
+SELECTORS = {name: m.get_selector() for name, m in METHODS.items()}
+BY_SELECTOR = {selector: name for name, selector in SELECTORS.items()}
+
+CONTRACT = abi.Contract("CredentialRegistry", list(METHODS.values()))
+
+# Global state declared at create: version, next_serial, issuer_count / admin + issuer table
+GLOBAL_UINTS = 3
+GLOBAL_BYTES = 1 + MAX_ISSUERS
+
+# Inner transactions each method sends; the outer call pays their fees (fee pooling)
+INNER_TXNS = {"issue_with_nft": 1}
+
+# Prefix of an ARC-4 return value in the last log of a call
+RETURN_PREFIX = bytes.fromhex("151f7c75")
+
+# Bits of the verdict returned by verify / verify_batch; a credential is valid when
+# its verdict equals VERDICT_VALID (not found = 0)
+VERDICT_FOUND = 1
+VERDICT_HASH_MATCH = 2
+VERDICT_EXPIRED = 4
+VERDICT_REVOKED = 8
+VERDICT_VALID = VERDICT_FOUND | VERDICT_HASH_MATCH
+
+# Commemorative NFT parameters, shared by the contract mint and the importer
+NFT_UNIT_NAME = "CRD"
+NFT_NAME_PREFIX = "CRD-"
+NFT_NAME_ID_CHARS = 20  # last characters of the cred_id kept in the asset name
+NFT_URL_PREFIX = "https://educhain.app/nft/"
+
+# Bytes of the single byte[] argument left for packed records in one issue_batch call
+ISSUE_BATCH_BUDGET = 2048 - 4 - 2  # app arg limit - selector - length prefix
+
+# Opcode budget: each app call adds APP_CALL_BUDGET to a pool shared by every app
+# call of its group. Batch methods loop over their packed items, so a full call can
+# cost more than its own share; groups get bare budget calls (no arguments, approved
+# right after dispatch) appended until the pool covers them.
+APP_CALL_BUDGET = 700
+BUDGET_CALL_COST = 14
+
+# (fixed, per item) opcode cost of the batch methods in the compiled approval program,
+# worst path, rounded up; each must cover the group costs bench/profile_app.py measured
+# (bench/baseline_costs.json, checked by tests/test_methods.py)
+CALL_COSTS = {
+    "issue_batch": (64, 149),   # per record
+    "migrate": (90, 95),        # per entry
+    "sweep": (85, 100),         # per cred_id (bitmap-revoked is the dearest path)
+    "verify_batch": (45, 130),  # per entry
+    "revoke_batch": (80, 30),   # per bit
+}
+
+
+def call_cost(name, items):
+    """Opcode cost of one call of a batch method with items packed items"""
+    fixed, per_item = CALL_COSTS[name]
+    return fixed + per_item * items
+
+
+def budget_calls(cost, app_calls):
+    """Number of budget calls a group of app_calls calls costing cost opcodes in total needs"""
+    deficit = cost - app_calls * APP_CALL_BUDGET
+    return max(0, -(-deficit // (APP_CALL_BUDGET - BUDGET_CALL_COST)))
+
+
+def calls_per_group(name, items_per_call):
+    """Most full calls of a batch method that fit one group together with their budget calls"""
+    cost = call_cost(name, items_per_call)
+    calls = MAX_GROUP_SIZE
+    while calls > 1 and calls + budget_calls(calls * cost, calls) > MAX_GROUP_SIZE:
+        calls -= 1
+    return calls
+
+
+# Full issue_batch calls (one box reference per record) per atomic group: 8 calls plus 7 budget calls
+ISSUE_CALLS_PER_GROUP = calls_per_group("issue_batch", MAX_BOX_REFS)
+
+
+def encode_args(name, *values):
+    """Selector plus ARC-4 encoded arguments for one method call"""
+    method = METHODS[name]
+    if len(values) != len(method.args):
+        raise TypeError(f"{name} takes {len(method.args)} arguments, got {len(values)}")
+    return [method.get_selector()] + [arg.type.encode(value) for arg, value in zip(method.args, values)]
+
+
+def decode_args(app_args):
+    """Return (method name, decoded arguments) or (None, []) for non-ARC-4 calls
+
+    byte[] / byte[N] arguments come back as bytes, string as str.
+    """
+    name = BY_SELECTOR.get(bytes(app_args[0])) if app_args else None
+    if name is None:
+        return None, []
+    values = []
+    for arg, raw in zip(METHODS[name].args, app_args[1:]):
+        value = arg.type.decode(raw)
+        if isinstance(value, list):
+            value = bytes(value)
+        values.append(value)
+    return name, values
+
+
+def call_params(sp, name):
+    """Suggested params with a flat fee covering the method's inner transactions"""
+    inner = INNER_TXNS.get(name, 0)
+    if not inner:
+        return sp
+    sp = copy.copy(sp)
+    sp.fee = (sp.min_fee or constants.min_txn_fee) * (1 + inner)
+    sp.flat_fee = True
+    return sp
+
+
+def budget_call(app_id, sender, sp, n=0):
+    """Build a bare NoOp call that only adds its opcode budget to the group
+
+    n goes into the note: identical transactions would share a txid, so the budget
+    calls of one group must differ.
+    """
+    return transaction.ApplicationNoOpTxn(sender, sp, app_id, note=b"budget:%d" % n)
+
+
+def with_budget(txns, app_id, sender, sp, cost):
+    """Append the budget calls a group of app calls costing cost opcodes needs"""
+    return txns + [budget_call(app_id, sender, sp, n) for n in range(budget_calls(cost, len(txns)))]
+
+
+def app_call(app_id, sender, sp, name, *values, boxes=()):
+    """Build an unsigned NoOp call of one contract method"""
+    return transaction.ApplicationNoOpTxn(
+        sender, call_params(sp, name), app_id,
+        app_args=encode_args(name, *values),
+        boxes=[(app_id, box) for box in boxes],
+    )
@@ -0,0 +1,156 @@
+# v2 -> v3 box migration
+# Deployed contract code cannot be updated, so compact (v3) boxes live in a new
+# deployment. The migrator streams the credentials of a v2 (or legacy) deployment
+# out of its CredentialIndex mirror, re-encodes each one as a compact record (issuer
+# address replaced by its issuer table index, CID unpadded, bitmap revocations folded
+# into the revoked byte) and copies them into the new app with migrate() calls of up
+# to 8 boxes, submitted in groups topped up with budget calls through a Submitter.
+# Credentials already present in the new app are skipped, so an interrupted run can
+# simply be started again.
+import argparse
+import itertools
+
+from algosdk import encoding
+
+from . import methods
+from .methods import MAX_BOX_REFS
+from .record import LEGACY_RECORD_SIZE, RECORD_SIZE, CompactRecord, encode_migrate_entry, fetch_issuers
+from .sweeper import BOX_BYTE_MBR
+
+
+# Full migrate calls per atomic group, leaving room for their budget calls
+CALLS_PER_GROUP = methods.calls_per_group("migrate", MAX_BOX_REFS)
+
+
+def to_compact(cred, issuer_idx):
+    """Re-encode one mirrored credential row as a compact record (serial left 0)"""
+    return CompactRecord.encode(
+        encoding.decode_address(cred["subject"]), cred["schema_code"], cred["cred_hash"], cred["issued_at"],
+        cred["expires_at"], cred["revoked"], cred["cid_pointer"], cred["nft_asa_id"], 0, issuer_idx,
+    )
+
+
+def pack_migrate_calls(entries):
+    """Split (cred_id, entry bytes) pairs into migrate() calls within the box-ref and app-arg limits"""
+    budget = methods.ISSUE_BATCH_BUDGET
+    call, size = [], 0
+    for cred_id, entry in entries:
+        if call and (len(call) == MAX_BOX_REFS or size + len(entry) > budget):
+            yield call
+            call, size = [], 0
+        call.append((cred_id, entry))
+        size += len(entry)
+    if call:
+        yield call
+
+
+def migrate_builder(app_id, addr, group_calls):
+    """Return a builder for one atomic group of migrate calls plus its budget calls"""
+    cost = sum(methods.call_cost("migrate", len(call)) for call in group_calls)
+
+    def build(sp):
+        return methods.with_budget([
+            methods.app_call(
+                app_id, addr, sp, "migrate", b"".join(entry for _, entry in call),
+                boxes=[cred_id for cred_id, _ in call],
+            )
+            for call in group_calls
+        ], app_id, addr, sp, cost)
+    return build
+
+
+class Migrator:
+    """Copy every credential of a mirrored v2 deployment into a v3 app
+
+    source is the CredentialIndex of the old app; algod and app_id name the new one,
+    submitter is a started Submitter signing as its admin (addr).
+    """
+
+    def __init__(self, source, algod_client, app_id, submitter, addr, page_size=1000):
+        self.source = source
+        self.algod = algod_client
+        self.app_id = app_id
+        self.submitter = submitter
+        self.addr = addr
+        self.page_size = page_size
+        self.migrated = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def issuer_indexes(self, addresses):
+        """Map issuer addresses to issuer_idx, registering unknown ones with add_issuer()"""
+        table = {encoding.encode_address(addr): idx for idx, addr in fetch_issuers(self.algod, self.app_id).items()}
+        missing = sorted(set(addresses) - table.keys())
+        futures = [
+            self.submitter.submit(lambda sp, a=a: [methods.app_call(self.app_id, self.addr, sp, "add_issuer", a)])
+            for a in missing
+        ]
+        for future in futures:
+            future.result()
+        if missing:
+            table = {encoding.encode_address(addr): idx for idx, addr in fetch_issuers(self.algod, self.app_id).items()}
+        return table
+
+    def _rows(self, skip):
+        after = None
+        while True:
+            page, after = self.source.query(limit=self.page_size, after=after)
+            yield from (cred for cred in page if cred["cred_id"] not in skip)
+            if after is None:
+                return
+
+    def run(self, existing=()):
+        """Migrate every source credential not in existing (box names of the new app)
+
+        Returns the number of credentials copied.
+        """
+        skip = set(existing)
+        issuers = self.issuer_indexes({cred["issuer"] for cred in self._rows(skip)})
+        started = self.migrated
+
+        def encoded():
+            for cred in self._rows(skip):
+                rec = to_compact(cred, issuers[cred["issuer"]])
+                self.bytes_before += RECORD_SIZE if cred["serial"] else LEGACY_RECORD_SIZE
+                self.bytes_after += len(rec)
+                self.migrated += 1
+                yield cred["cred_id"], encode_migrate_entry(cred["cred_id"], rec)
+
+        calls = pack_migrate_calls(encoded())
+        futures = []
+        while True:
+            group_calls = list(itertools.islice(calls, CALLS_PER_GROUP))
+            if not group_calls:
+                break
+            futures.append(self.submitter.submit(migrate_builder(self.app_id, self.addr, group_calls)))
+        for future in futures:
+            future.result()
+        return self.migrated - started
+
+    @property
+    def mbr_saved(self):
+        """microALGOs of box minimum balance saved by the smaller records"""
+        return BOX_BYTE_MBR * (self.bytes_before - self.bytes_after)
+
+
+if __name__ == "__main__":
+    from .credential_index import CredentialIndex
+    from .deploy_localnet import NET, make_submitter
+
+    p = argparse.ArgumentParser(description="Copy the credentials of a v2 deployment into the current (v3) app")
+    p.add_argument("--from-app", type=int, required=True, metavar="APP_ID", help="App id of the v2 deployment")
+    p.add_argument("--db", default="credentials-v2.sqlite", help="SQLite mirror of the v2 app")
+    p.add_argument("--in-flight", type=int, default=32, metavar="N", help="Max migrate groups in flight")
+    a = p.parse_args()
+
+    source = CredentialIndex(a.db, a.from_app, NET.algod, NET.indexer)
+    if source.synced_round is None:
+        source.load_all()
+    else:
+        source.catch_up(NET.indexer.health()["round"])
+    existing = CredentialIndex(":memory:", NET.app_id, NET.algod, NET.indexer).iter_box_names()
+    with make_submitter(a.in_flight) as submitter:
+        migrator = Migrator(source, NET.algod, NET.app_id, submitter, NET.account.address)
+        migrator.run(existing)
+    print(f"Migrated {migrator.migrated} credentials: {migrator.bytes_before} -> {migrator.bytes_after} box bytes, "
+          f"{migrator.mbr_saved / 1e6:.4f} ALGO less minimum balance")
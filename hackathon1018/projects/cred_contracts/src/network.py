@@ -0,0 +1,232 @@
+# Shared network clients
+# Endpoints come from a named profile (localnet / testnet) and can be overridden
+# with ALGOD_SERVER / ALGOD_TOKEN / INDEXER_SERVER / INDEXER_TOKEN. Nothing touches
+# the network until a client is first used. Clients keep one keep-alive HTTP
+# connection per thread and host instead of opening a new one per request, and
+# suggested params, the app id and the signing account are cached per Network.
+import http.client
+import json
+import os
+import threading
+import time
+from urllib import parse
+
+from algosdk import account, constants, error, mnemonic
+from algosdk.atomic_transaction_composer import AccountTransactionSigner
+from algosdk.v2client import algod, indexer
+
+from . import telemetry
+
+NETWORKS = {
+    "localnet": {
+        "algod": "http://localhost:4001",
+        "algod_token": "a" * 64,
+        "indexer": "http://localhost:8980",
+        "indexer_token": "a" * 64,
+    },
+    "testnet": {
+        "algod": "https://testnet-api.algonode.cloud",
+        "algod_token": "",
+        "indexer": "https://testnet-idx.algonode.cloud",
+        "indexer_token": "",
+    },
+}
+
+ROUND_TIME = 2.8  # seconds; suggested params are refetched at most this often
+
+# Errors meaning a pooled connection went stale between requests
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections, one per thread and host"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, url, headers, data=None, timeout=30):
+        """Return (status, body bytes)"""
+        parts = parse.urlsplit(url)
+        path = parts.path + ("?" + parts.query if parts.query else "")
+        conns = self._local.__dict__.setdefault("conns", {})
+        key = (parts.scheme, parts.netloc)
+        while True:
+            conn = conns.get(key)
+            reused = conn is not None
+            if conn is None:
+                factory = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+                conn = conns[key] = factory(parts.netloc, timeout=timeout)
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                return resp.status, resp.read()
+            except _STALE:
+                conn.close()
+                del conns[key]
+                if not reused:
+                    raise
+            except Exception:
+                conn.close()
+                del conns[key]
+                raise
+
+
+def _request_path(requrl, params):
+    if requrl not in constants.unversioned_paths:
+        requrl = "/v2" + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return requrl
+
+
+def _error_message(body):
+    try:
+        j = json.loads(body)
+        return j.get("message", body.decode(errors="replace")), j
+    except ValueError:
+        return body.decode(errors="replace"), {}
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """AlgodClient whose requests go through a shared ConnectionPool"""
+
+    def __init__(self, algod_token, algod_address, headers=None, pool=None):
+        super().__init__(algod_token, algod_address, headers)
+        self.pool = pool or ConnectionPool()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json", timeout=30):
+        header = {"User-Agent": "py-algorand-sdk"}
+        header.update(self.headers or {})
+        header.update(headers or {})
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+        status, body = self.pool.request(method, self.algod_address + _request_path(requrl, params), header, data, timeout)
+        if status >= 400:
+            message, j = _error_message(body)
+            raise error.AlgodHTTPError(message, status, j.get("data"))
+        if response_format != "json":
+            return body
+        if not body:
+            return {}  # some endpoints answer 200 with an empty body
+        return json.loads(body)
+
+
+class PooledIndexerClient(indexer.IndexerClient):
+    """IndexerClient whose requests go through a shared ConnectionPool"""
+
+    def __init__(self, indexer_token, indexer_address, headers=None, pool=None):
+        super().__init__(indexer_token, indexer_address, headers)
+        self.pool = pool or ConnectionPool()
+
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None, timeout=30):
+        header = {"User-Agent": "py-algorand-sdk"}
+        header.update(self.headers or {})
+        header.update(headers or {})
+        if requrl not in constants.no_auth and self.indexer_token:
+            header[constants.indexer_auth_header] = self.indexer_token
+        status, body = self.pool.request(method, self.indexer_address + _request_path(requrl, params), header, data, timeout)
+        if status >= 400:
+            raise error.IndexerHTTPError(_error_message(body)[0])
+        return json.loads(body)
+
+
+class Account:
+    """Signing key with its address and an ATC signer"""
+
+    def __init__(self, private_key):
+        self.private_key = private_key
+        self.address = account.address_from_private_key(private_key)
+        self.signer = AccountTransactionSigner(private_key)
+
+    @classmethod
+    def from_mnemonic(cls, words):
+        return cls(mnemonic.to_private_key(words))
+
+
+class Network:
+    """Lazily built clients plus cached per-network context
+
+    account_loader is called once, on first use of .account, and must return an
+    object with private_key and address attributes.
+    """
+
+    def __init__(self, name, art_path=None, account_loader=None, round_time=ROUND_TIME):
+        self.name = name
+        self.art_path = art_path
+        self.round_time = round_time
+        self._account_loader = account_loader
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool()
+        self._algod = None
+        self._indexer = None
+        self._account = None
+        self._app_id = None
+        self._sp = None
+        self._sp_at = 0.0
+
+    def bind(self, algod=None, indexer=None, account=None, app_id=None):
+        """Use ready-made clients or context instead of the configured ones (e.g. an in-process chain)"""
+        with self._lock:
+            self._algod = algod or self._algod
+            self._indexer = indexer or self._indexer
+            self._account = account or self._account
+            self._app_id = app_id or self._app_id
+            self._sp = None
+
+    def setting(self, key):
+        env = {"algod": "ALGOD_SERVER", "algod_token": "ALGOD_TOKEN",
+               "indexer": "INDEXER_SERVER", "indexer_token": "INDEXER_TOKEN"}[key]
+        value = os.environ.get(env)
+        return value if value is not None else NETWORKS[self.name][key]
+
+    @property
+    def algod(self):
+        with self._lock:
+            if self._algod is None:
+                self._algod = PooledAlgodClient(self.setting("algod_token"), self.setting("algod"), pool=self._pool)
+            return self._algod
+
+    @property
+    def indexer(self):
+        with self._lock:
+            if self._indexer is None:
+                self._indexer = PooledIndexerClient(self.setting("indexer_token"), self.setting("indexer"), pool=self._pool)
+            return self._indexer
+
+    def suggested_params(self, refresh=False):
+        """Suggested params, refetched at most once per round"""
+        with self._lock:
+            sp, fresh = self._sp, time.monotonic() - self._sp_at < self.round_time
+        if sp is None or refresh or not fresh:
+            with telemetry.span("suggested_params"):
+                sp = self.algod.suggested_params()
+            with self._lock:
+                self._sp, self._sp_at = sp, time.monotonic()
+        return sp
+
+    @property
+    def account(self):
+        with self._lock:
+            if self._account is None:
+                self._account = self._account_loader()
+            return self._account
+
+    @property
+    def app_id(self):
+        """App id recorded in art_path, read once"""
+        with self._lock:
+            if self._app_id is None:
+                with open(self.art_path) as f:
+                    self._app_id = json.load(f)["appId"]
+            return self._app_id
+
+    def save_app_id(self, app_id, **extra):
+        """Record a newly deployed app id in art_path and in the cache"""
+        os.makedirs(os.path.dirname(self.art_path), exist_ok=True)
+        with open(self.art_path, "w") as f:
+            json.dump({"appId": app_id, "network": self.name, **extra}, f, indent=2)
+        with self._lock:
+            self._app_id = app_id
@@ -0,0 +1,331 @@
+# Credential box layout
+# Single definition of the per-credential boxes. The contract writes compact (v3)
+# boxes, laid out by COMPACT_FIELDS; boxes of older deployments use the fixed v2
+# layout in FIELDS (or its legacy form without a serial). app.py builds its
+# Concat()/BoxReplace() offsets from these tables, and the Python side decodes boxes
+# of any version with decode_record() (zero-copy views over the box bytes) or, for
+# millions of boxes at once, with a NumPy structured array.
+import base64
+import struct
+
+
+def _layout(fields):
+    """Return ({name: offset}, total size) for a (name, size) table"""
+    offsets, pos = {}, 0
+    for name, size in fields:
+        offsets[name] = pos
+        pos += size
+    return offsets, pos
+
+
+# v2: (name, size in bytes) in box order; integers are big-endian uint64 except revoked
+FIELDS = (
+    ("issuer", 32),       # issuer address
+    ("subject", 32),      # subject address
+    ("schema_code", 8),   # 1=visa, 2=education, 3=employment (Itob)
+    ("cred_hash", 32),    # SHA-256 of the canonical credential JSON
+    ("issued_at", 8),     # Global.latest_timestamp() at issue
+    ("expires_at", 8),    # unix seconds, 0 = never expires
+    ("revoked", 1),       # 0x00 / 0x01
+    ("cid_pointer", 32),  # IPFS CID, zero padded
+    ("nft_asa_id", 8),    # commemorative NFT ASA id
+    ("serial", 8),        # position in the revocation bitmap, assigned at issue (1, 2, ...)
+)
+
+OFFSETS, RECORD_SIZE = _layout(FIELDS)  # 169 bytes
+
+# Boxes issued before serials existed stop after nft_asa_id; they decode with serial 0
+LEGACY_RECORD_SIZE = RECORD_SIZE - 8  # 161 bytes
+
+SIZES = dict(FIELDS)
+INT_FIELDS = ("schema_code", "issued_at", "expires_at", "nft_asa_id", "serial")
+
+RECORD_STRUCT = struct.Struct(">32s32sQ32sQQB32sQQ")
+assert RECORD_STRUCT.size == RECORD_SIZE
+
+# v3 (compact): fixed fields, then the CID unpadded (0..32 bytes) as the box's tail.
+# The schema code takes one byte and the issuer is an index into the issuer table.
+# v3 boxes are COMPACT_SIZE..COMPACT_MAX_SIZE bytes, so box length alone tells the
+# versions apart; the version byte leaves room for later formats.
+COMPACT_VERSION = 3
+COMPACT_FIELDS = (
+    ("version", 1),       # COMPACT_VERSION
+    ("subject", 32),
+    ("schema_code", 1),
+    ("cred_hash", 32),
+    ("issued_at", 8),
+    ("expires_at", 8),
+    ("revoked", 1),
+    ("nft_asa_id", 8),
+    ("serial", 8),
+    ("issuer_idx", 1),    # key of the issuer's address in the issuer table
+)
+COMPACT_OFFSETS, COMPACT_SIZE = _layout(COMPACT_FIELDS)  # 100 bytes
+COMPACT_SIZES = dict(COMPACT_FIELDS)
+MAX_CID_SIZE = 32
+COMPACT_MAX_SIZE = COMPACT_SIZE + MAX_CID_SIZE
+COMPACT_STRUCT = struct.Struct(">B32sB32sQQBQQB")
+assert COMPACT_STRUCT.size == COMPACT_SIZE
+
+# Issuer table: global state ISSUER_KEY_PREFIX + bytes([i]) holds the address of
+# issuer i. The creator (the admin, who issues everything) is issuer 0; add_issuer()
+# registers the issuers of credentials migrated from other deployments.
+ISSUER_KEY_PREFIX = b"iss"
+ADMIN_ISSUER_IDX = 0
+MAX_ISSUERS = 8
+
+# Packed issue_batch record: id_len(1) | cred_id(id_len) | BATCH_TAIL_FIELDS | cid(cid_len)
+BATCH_TAIL_FIELDS = (
+    ("subject", 32),
+    ("schema_code", 1),
+    ("cred_hash", 32),
+    ("expires_at", 8),
+    ("nft_asa_id", 8),
+    ("cid_len", 1),
+)
+BATCH_TAIL_OFFSETS, BATCH_TAIL_SIZE = _layout(BATCH_TAIL_FIELDS)  # 82 bytes
+BATCH_TAIL_STRUCT = struct.Struct(">32sB32sQQB")
+assert BATCH_TAIL_STRUCT.size == BATCH_TAIL_SIZE
+
+
+def _int_field(name, offsets=OFFSETS, sizes=SIZES):
+    offset, size = offsets[name], sizes[name]
+    if size == 1:
+        return property(lambda self: self._buf[offset])
+    return property(lambda self: int.from_bytes(self._buf[offset:offset + size], "big"))
+
+
+def _bytes_field(name, offsets=OFFSETS, sizes=SIZES):
+    start = offsets[name]
+    end = start + sizes[name]
+    return property(lambda self: self._buf[start:end])
+
+
+class CredentialRecord:
+    """Read-only view over one credential box
+
+    Wraps a memoryview of the box bytes; byte fields come back as memoryview
+    slices of the original buffer, so nothing is copied until asked for.
+    """
+
+    __slots__ = ("_buf",)
+
+    issuer = _bytes_field("issuer")
+    subject = _bytes_field("subject")
+    schema_code = _int_field("schema_code")
+    cred_hash = _bytes_field("cred_hash")
+    issued_at = _int_field("issued_at")
+    expires_at = _int_field("expires_at")
+    revoked = _int_field("revoked")
+    cid_pointer = _bytes_field("cid_pointer")
+    nft_asa_id = _int_field("nft_asa_id")
+    serial = _int_field("serial")
+
+    def __init__(self, buf, offset=0):
+        view = memoryview(buf)
+        available = len(view) - offset
+        if available == LEGACY_RECORD_SIZE:
+            # the only case that copies: a legacy box padded with a zero serial
+            view, offset = memoryview(bytes(view[offset:]) + bytes(SIZES["serial"])), 0
+        elif available < RECORD_SIZE:
+            raise ValueError(f"Credential record needs {RECORD_SIZE} bytes, got {available}")
+        self._buf = view[offset:offset + RECORD_SIZE]
+
+    @classmethod
+    def encode(cls, issuer, subject, schema_code, cred_hash, issued_at, expires_at, revoked, cid_pointer, nft_asa_id, serial=0):
+        """Build the box bytes for one credential"""
+        return RECORD_STRUCT.pack(
+            issuer, subject, schema_code, cred_hash, issued_at, expires_at,
+            int(revoked), cid_pointer, nft_asa_id, serial,
+        )
+
+    def is_expired(self, now):
+        expires_at = self.expires_at
+        return expires_at != 0 and now > expires_at
+
+    def to_dict(self):
+        """Copy all fields out into a plain dict (bytes for byte fields)"""
+        values = RECORD_STRUCT.unpack_from(self._buf)
+        record = dict(zip(SIZES, values))
+        record["cid_pointer"] = record["cid_pointer"].rstrip(b"\x00")
+        return record
+
+
+class CompactRecord:
+    """Read-only view over one compact (v3) credential box
+
+    Same interface as CredentialRecord except that the issuer is issuer_idx, an
+    index into the app's issuer table, and cid_pointer is exactly as long as stored.
+    """
+
+    __slots__ = ("_buf",)
+
+    version = _int_field("version", COMPACT_OFFSETS, COMPACT_SIZES)
+    subject = _bytes_field("subject", COMPACT_OFFSETS, COMPACT_SIZES)
+    schema_code = _int_field("schema_code", COMPACT_OFFSETS, COMPACT_SIZES)
+    cred_hash = _bytes_field("cred_hash", COMPACT_OFFSETS, COMPACT_SIZES)
+    issued_at = _int_field("issued_at", COMPACT_OFFSETS, COMPACT_SIZES)
+    expires_at = _int_field("expires_at", COMPACT_OFFSETS, COMPACT_SIZES)
+    revoked = _int_field("revoked", COMPACT_OFFSETS, COMPACT_SIZES)
+    nft_asa_id = _int_field("nft_asa_id", COMPACT_OFFSETS, COMPACT_SIZES)
+    serial = _int_field("serial", COMPACT_OFFSETS, COMPACT_SIZES)
+    issuer_idx = _int_field("issuer_idx", COMPACT_OFFSETS, COMPACT_SIZES)
+
+    def __init__(self, buf):
+        view = memoryview(buf)
+        if not COMPACT_SIZE <= len(view) <= COMPACT_MAX_SIZE:
+            raise ValueError(f"Compact record needs {COMPACT_SIZE}..{COMPACT_MAX_SIZE} bytes, got {len(view)}")
+        if view[0] != COMPACT_VERSION:
+            raise ValueError(f"Unknown record version {view[0]}")
+        self._buf = view
+
+    @property
+    def cid_pointer(self):
+        return self._buf[COMPACT_SIZE:]
+
+    @classmethod
+    def encode(cls, subject, schema_code, cred_hash, issued_at, expires_at, revoked, cid_pointer, nft_asa_id,
+               serial=0, issuer_idx=ADMIN_ISSUER_IDX):
+        """Build the box bytes for one credential; zero padding is dropped from the CID"""
+        cid_pointer = cid_pointer.rstrip(b"\x00")
+        if len(cid_pointer) > MAX_CID_SIZE:
+            raise ValueError(f"CID pointer is longer than {MAX_CID_SIZE} bytes")
+        return COMPACT_STRUCT.pack(
+            COMPACT_VERSION, subject, schema_code, cred_hash, issued_at, expires_at,
+            int(revoked), nft_asa_id, serial, issuer_idx,
+        ) + cid_pointer
+
+    def is_expired(self, now):
+        expires_at = self.expires_at
+        return expires_at != 0 and now > expires_at
+
+    def to_dict(self):
+        """Copy all fields out into a plain dict (bytes for byte fields)"""
+        record = dict(zip(COMPACT_SIZES, COMPACT_STRUCT.unpack_from(self._buf)))
+        record["cid_pointer"] = bytes(self.cid_pointer)
+        return record
+
+
+def is_record_size(size):
+    """True for the length of a credential box of any format version"""
+    return size in (RECORD_SIZE, LEGACY_RECORD_SIZE) or COMPACT_SIZE <= size <= COMPACT_MAX_SIZE
+
+
+def decode_record(buf):
+    """View a credential box of any version: CredentialRecord (v2, legacy) or CompactRecord (v3)"""
+    if len(buf) in (RECORD_SIZE, LEGACY_RECORD_SIZE):
+        return CredentialRecord(buf)
+    return CompactRecord(buf)
+
+
+def issuer_key(idx):
+    return ISSUER_KEY_PREFIX + bytes([idx])
+
+
+def fetch_issuers(algod_client, app_id):
+    """Read the app's issuer table as {issuer_idx: 32-byte address}"""
+    issuers = {}
+    for kv in algod_client.application_info(app_id)["params"].get("global-state", []):
+        key = base64.b64decode(kv["key"])
+        if len(key) == len(ISSUER_KEY_PREFIX) + 1 and key.startswith(ISSUER_KEY_PREFIX):
+            issuers[key[-1]] = base64.b64decode(kv["value"]["bytes"])
+    return issuers
+
+
+def iter_records(buf):
+    """Yield a CredentialRecord view for each record in a buffer of concatenated v2 boxes"""
+    view = memoryview(buf)
+    for offset in range(0, len(view) - RECORD_SIZE + 1, RECORD_SIZE):
+        yield CredentialRecord(view, offset)
+
+
+def numpy_dtype(fields=FIELDS):
+    """Structured NumPy dtype for a box layout, v2 by default (requires numpy)"""
+    import numpy as np
+
+    return np.dtype([
+        (name, ">u8") if size == 8 else (name, "u1") if size == 1 else (name, f"S{size}")
+        for name, size in fields
+    ])
+
+
+def decode_array(buf):
+    """View a buffer of concatenated v2 boxes as a NumPy structured array, without copying"""
+    import numpy as np
+
+    return np.frombuffer(buf, dtype=numpy_dtype())
+
+
+def decode_compact_array(boxes):
+    """Stack the fixed fields of v3 boxes into a NumPy structured array
+
+    v3 boxes end in a CID of varying length, so unlike decode_array() this copies
+    the first COMPACT_SIZE bytes of each box and leaves the CIDs out.
+    """
+    import numpy as np
+
+    return np.frombuffer(b"".join(bytes(box[:COMPACT_SIZE]) for box in boxes), dtype=numpy_dtype(COMPACT_FIELDS))
+
+
+def expired_mask(records, now):
+    """Vectorized is_expired over a decode_array() or decode_compact_array() result"""
+    expires_at = records["expires_at"]
+    return (expires_at != 0) & (expires_at < now)
+
+
+def revoked_mask(records):
+    """Vectorized revoked check over a decode_array() or decode_compact_array() result"""
+    return records["revoked"] != 0
+
+
+def encode_batch_record(cred_id, subject, schema_code, cred_hash, expires_at, cid_pointer, nft_asa_id):
+    """Pack one credential into the issue_batch record format; zero padding is dropped from the CID"""
+    cid_pointer = cid_pointer.rstrip(b"\x00")
+    return bytes([len(cred_id)]) + cred_id + BATCH_TAIL_STRUCT.pack(
+        subject, schema_code, cred_hash, expires_at, nft_asa_id, len(cid_pointer)
+    ) + cid_pointer
+
+
+def iter_batch_records(batch):
+    """Yield (cred_id, fields_dict) for each record in an issue_batch argument"""
+    view = memoryview(batch)
+    pos = 0
+    while pos < len(view):
+        id_len = view[pos]
+        cred_id = bytes(view[pos + 1:pos + 1 + id_len])
+        tail = pos + 1 + id_len
+        fields = dict(zip(dict(BATCH_TAIL_FIELDS), BATCH_TAIL_STRUCT.unpack_from(view, tail)))
+        end = tail + BATCH_TAIL_SIZE + fields.pop("cid_len")
+        fields["cid_pointer"] = bytes(view[tail + BATCH_TAIL_SIZE:end])
+        yield cred_id, fields
+        pos = end
+
+
+def encode_migrate_entry(cred_id, rec):
+    """id_len(1) | cred_id | rec_len(1) | record, the migrate() argument format"""
+    return bytes([len(cred_id)]) + cred_id + bytes([len(rec)]) + rec
+
+
+def iter_migrate_entries(batch):
+    """Yield (cred_id, record bytes) for each entry of a migrate argument"""
+    view = memoryview(batch)
+    pos = 0
+    while pos < len(view):
+        id_end = pos + 1 + view[pos]
+        end = id_end + 1 + view[id_end]
+        yield bytes(view[pos + 1:id_end]), bytes(view[id_end + 1:end])
+        pos = end
+
+
+def pack_cred_ids(cred_ids):
+    """Pack cred_ids as id_len(1) | cred_id(id_len), repeated (the sweep argument)"""
+    return b"".join(bytes([len(cred_id)]) + cred_id for cred_id in cred_ids)
+
+
+def iter_cred_ids(packed):
+    """Yield each cred_id of a pack_cred_ids() buffer"""
+    pos = 0
+    while pos < len(packed):
+        id_len = packed[pos]
+        yield bytes(packed[pos + 1:pos + 1 + id_len])
+        pos += 1 + id_len
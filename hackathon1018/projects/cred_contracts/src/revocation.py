@@ -0,0 +1,79 @@
+# Revocation registry
+# Every credential gets a serial at issue time (record field "serial"). Serial n is
+# bit n % BITS_PER_PAGE of bitmap page n // BITS_PER_PAGE, stored in the box
+# PAGE_PREFIX + itob(page). revoke_batch() sets many bits of one page per call, and
+# a verifier learns the status of every credential on a page with one box read.
+import base64
+
+PAGE_BYTES = 1024  # one box reference worth of I/O budget
+BITS_PER_PAGE = PAGE_BYTES * 8
+PAGE_PREFIX = b"\x00rev"  # cred_ids are text, so they never start with a NUL byte
+
+# Offsets of one call are packed as big-endian uint16 bit positions within the page
+OFFSET_SIZE = 2
+MAX_BITS_PER_CALL = 16  # bounded by the 700 opcode budget of a single app call
+
+
+def locate(serial):
+    """Return (page, bit) for a credential serial"""
+    return divmod(serial, BITS_PER_PAGE)
+
+
+def page_name(page):
+    return PAGE_PREFIX + page.to_bytes(8, "big")
+
+
+def bit_is_set(page_bytes, bit):
+    # Bit 0 is the most significant bit of byte 0, matching TEAL setbit/getbit on bytes
+    return bool(page_bytes[bit // 8] & (0x80 >> (bit % 8)))
+
+
+def revoked_in_page(page, page_bytes):
+    """Yield every revoked serial recorded in one bitmap page"""
+    base = page * BITS_PER_PAGE
+    for index, byte in enumerate(page_bytes):
+        if byte:
+            for offset in range(8):
+                if byte & (0x80 >> offset):
+                    yield base + index * 8 + offset
+
+
+def pack_revoke_calls(serials):
+    """Group serials into revoke_batch calls
+
+    Yields (page, packed_bit_offsets) pairs; every call touches exactly one page.
+    """
+    by_page = {}
+    for serial in serials:
+        if serial <= 0:
+            raise ValueError(f"Credential has no revocation serial: {serial}")
+        page, bit = locate(serial)
+        by_page.setdefault(page, []).append(bit)
+    for page in sorted(by_page):
+        bits = sorted(set(by_page[page]))
+        for start in range(0, len(bits), MAX_BITS_PER_CALL):
+            chunk = bits[start:start + MAX_BITS_PER_CALL]
+            yield page, b"".join(bit.to_bytes(OFFSET_SIZE, "big") for bit in chunk)
+
+
+def fetch_page(algod_client, app_id, page):
+    """Read one bitmap page; a page that was never written means nothing is revoked"""
+    try:
+        box = algod_client.application_box_by_name(app_id, page_name(page))
+    except Exception as e:
+        if getattr(e, "code", None) == 404:
+            return bytes(PAGE_BYTES)
+        raise
+    return base64.b64decode(box["value"])
+
+
+def check_revoked_many(algod_client, app_id, serials):
+    """Return {serial: revoked} reading each bitmap page only once"""
+    pages = {}
+    result = {}
+    for serial in serials:
+        page, bit = locate(serial)
+        if page not in pages:
+            pages[page] = fetch_page(algod_client, app_id, page)
+        result[serial] = bit_is_set(pages[page], bit)
+    return result
@@ -0,0 +1,208 @@
+# Sharded registry
+# A sharded deployment runs N copies of the registry app, each with its own admin,
+# box set and app account MBR, so institutions issue in parallel and no single app's
+# box set grows without bound. Each cred_id maps to exactly one shard. The mapping
+# is a deterministic function, so no directory app is consulted:
+#   hash    first 8 bytes of sha256(cred_id) modulo the shard count; the count
+#           cannot change once credentials are issued
+#   prefix  the cred_id part before the first "-" names the shard, e.g. one shard
+#           per institution ("edu-..." -> shard "edu"); unknown prefixes fall back
+#           to the hash rule over all shards
+# The map lives in a JSON artifact next to the single-app one (see ShardMap.save).
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from algosdk import transaction
+from algosdk.logic import get_application_address
+
+from . import methods, revocation
+from .builders import issue_batch_builder, pack_issue_calls, read_serial, revoke_batch_builder, revoke_builder
+from .methods import ISSUE_CALLS_PER_GROUP, MAX_GROUP_SIZE
+from .submitter import Submitter
+from .verify import verify_onchain
+
+STRATEGIES = ("hash", "prefix")
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    app_id: int
+    admin: str
+
+
+def hash_route(cred_id, count):
+    """Shard index of cred_id under the hash strategy"""
+    return int.from_bytes(hashlib.sha256(cred_id.encode()).digest()[:8], "big") % count
+
+
+class ShardMap:
+    """Deterministic cred_id -> Shard routing"""
+
+    def __init__(self, shards, strategy="hash"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown routing strategy {strategy!r} (expected one of {STRATEGIES})")
+        if not shards:
+            raise ValueError("A sharded deployment needs at least one shard")
+        self.shards = list(shards)
+        self.strategy = strategy
+        self._by_name = {shard.name: shard for shard in self.shards}
+
+    def route(self, cred_id):
+        if self.strategy == "prefix":
+            shard = self._by_name.get(cred_id.split("-", 1)[0])
+            if shard is not None:
+                return shard
+        return self.shards[hash_route(cred_id, len(self.shards))]
+
+    def partition(self, items, key=lambda item: item):
+        """Group items by shard, keeping their order within each shard"""
+        parts = {}
+        for item in items:
+            parts.setdefault(self.route(key(item)), []).append(item)
+        return parts
+
+    def to_json(self):
+        return {
+            "strategy": self.strategy,
+            "shards": [{"name": s.name, "appId": s.app_id, "admin": s.admin} for s in self.shards],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls([Shard(s["name"], s["appId"], s["admin"]) for s in data["shards"]], data.get("strategy", "hash"))
+
+    def save(self, path, **extra):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({**self.to_json(), **extra}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+def create_registry(algod_client, admin, approval, clear, fund=0):
+    """Create one registry app with admin (an Account) as creator and admin; returns its app id
+
+    fund microALGOs are sent to the new app account for box MBR.
+    """
+    sp = algod_client.suggested_params()
+    txn = transaction.ApplicationCreateTxn(
+        admin.address, sp,
+        on_complete=transaction.OnComplete.NoOpOC.real,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=transaction.StateSchema(methods.GLOBAL_UINTS, methods.GLOBAL_BYTES),
+        local_schema=transaction.StateSchema(0, 0),
+        extra_pages=(len(approval) + len(clear) - 1) // 2048,
+    )
+    txid = algod_client.send_transaction(txn.sign(admin.private_key))
+    app_id = transaction.wait_for_confirmation(algod_client, txid, 4)["application-index"]
+    if fund:
+        pay = transaction.PaymentTxn(admin.address, sp, get_application_address(app_id), fund)
+        transaction.wait_for_confirmation(algod_client, algod_client.send_transaction(pay.sign(admin.private_key)), 4)
+    return app_id
+
+
+class ShardedRegistry:
+    """Send issue / revoke / verify to the shard owning each cred_id
+
+    signers maps each shard admin address to its private key; shards without a key
+    can still be verified but not written to. Writes to different shards run in
+    parallel, one Submitter per shard.
+    """
+
+    def __init__(self, algod_client, shard_map, signers=None, max_in_flight=32):
+        self.algod = algod_client
+        self.map = shard_map
+        self.signers = dict(signers or {})
+        self.max_in_flight = max_in_flight
+
+    def _signer(self, shard):
+        key = self.signers.get(shard.admin)
+        if key is None:
+            raise KeyError(f"No signing key for the admin of shard {shard.name} ({shard.admin})")
+        return key
+
+    def submit_all(self, work):
+        """Run {shard: iterable of (label, build)} through one Submitter per shard
+
+        Returns {shard: [result or exception per group]} in submission order.
+        """
+        def run(shard, builders):
+            with Submitter(self.algod, self._signer(shard), max_in_flight=self.max_in_flight) as submitter:
+                futures = [submitter.submit(build, label) for label, build in builders]
+            return [f.exception() or f.result() for f in futures]
+
+        for shard in work:
+            self._signer(shard)  # fail before anything is sent
+        with ThreadPoolExecutor(max(1, len(work))) as pool:
+            results = {shard: pool.submit(run, shard, builders) for shard, builders in work.items()}
+            return {shard: future.result() for shard, future in results.items()}
+
+    @staticmethod
+    def _groups(calls, make_builder, app_id, addr, label, size=MAX_GROUP_SIZE):
+        while True:
+            group_calls = list(itertools.islice(calls, size))
+            if not group_calls:
+                return
+            yield label(group_calls), make_builder(app_id, addr, group_calls)
+
+    def issue_batch(self, creds):
+        """Issue credential dicts (the --issue-batch JSONL format) on their shards
+
+        Returns {shard name: number of groups that failed}.
+        """
+        work = {
+            shard: self._groups(pack_issue_calls(part), issue_batch_builder, shard.app_id, shard.admin,
+                                lambda g: g[0][0][0], ISSUE_CALLS_PER_GROUP)
+            for shard, part in self.map.partition(creds, key=lambda cred: cred["cred_id"]).items()
+        }
+        return self._failures(self.submit_all(work))
+
+    def read_serial(self, cred_id):
+        return read_serial(self.algod, self.map.route(cred_id).app_id, cred_id)
+
+    def revoke_batch(self, cred_ids, workers=8):
+        """Revoke cred_ids through each shard's revocation bitmap (revoke() for serial-less boxes)
+
+        Returns {shard name: number of groups that failed}.
+        """
+        cred_ids = list(cred_ids)
+        with ThreadPoolExecutor(workers) as pool:
+            serials = dict(zip(cred_ids, pool.map(self.read_serial, cred_ids)))
+        work = {}
+        for shard, part in self.map.partition(cred_ids).items():
+            calls = revocation.pack_revoke_calls(serials[c] for c in part if serials[c])
+            work[shard] = itertools.chain(
+                self._groups(calls, revoke_batch_builder, shard.app_id, shard.admin, lambda g: f"page-{g[0][0]}"),
+                ((c, revoke_builder(shard.app_id, shard.admin, c)) for c in part if not serials[c]),
+            )
+        return self._failures(self.submit_all(work))
+
+    def verify_many(self, cred_ids, presented_docs, workers=8):
+        """One Verdict per credential, evaluated by its shard's verify_batch (simulated), in input order"""
+        pairs = list(zip(cred_ids, presented_docs))
+        parts = self.map.partition(range(len(pairs)), key=lambda i: pairs[i][0])
+        verdicts = [None] * len(pairs)
+
+        def verify(shard, indexes):
+            found = verify_onchain(self.algod, shard.app_id, [pairs[i][0] for i in indexes],
+                                   [pairs[i][1] for i in indexes], sender=shard.admin, workers=workers)
+            for i, verdict in zip(indexes, found):
+                verdicts[i] = verdict
+
+        with ThreadPoolExecutor(max(1, len(parts))) as pool:
+            for future in [pool.submit(verify, shard, indexes) for shard, indexes in parts.items()]:
+                future.result()
+        return verdicts
+
+    @staticmethod
+    def _failures(results):
+        return {shard.name: sum(isinstance(r, Exception) for r in rs) for shard, rs in results.items()}
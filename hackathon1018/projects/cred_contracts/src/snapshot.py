@@ -0,0 +1,337 @@
+# Registry snapshots
+# A snapshot holds every credential of the CredentialIndex mirror (decoded rows, bitmap
+# revocations merged in), sorted by cred_id and tagged with the app id and the round
+# it was taken at. A new verifier node imports it into its index and then catches up
+# from that round through the indexer, so it needs no full box scan.
+# Two formats hold the same columns:
+#   parquet  Arrow table with app id and round in the schema metadata; used when
+#            pyarrow is installed
+#   binary   fixed-width columns after a small header, read through mmap: columns
+#            are decoded in bulk on import, and get() binary-searches the sorted
+#            cred_id column without loading the file
+# open_snapshot() tells the formats apart by their magic bytes.
+import argparse
+import mmap
+import os
+import struct
+
+from .credential_index import COLUMNS
+
+MAGIC = b"CREDSNP1"
+PARQUET_MAGIC = b"PAR1"
+FORMATS = ("auto", "parquet", "binary")
+
+# magic, app_id, round, row count, issuer count; followed by the issuer addresses,
+# then one fixed-width column after another. Addresses are kept as their 58-character
+# text: base32 and checksum work per row would cost more than the rest of the import.
+HEADER_STRUCT = struct.Struct(">8sQQQH")
+ADDRESS_SIZE = 58
+MAX_CRED_ID_SIZE = 64  # box name limit
+MAX_CID_SIZE = 32
+
+# (name, struct code) in file order; issuer is an index into the header's issuer list
+BINARY_COLUMNS = (
+    ("cred_id_len", "B"),
+    ("cred_id", f"{MAX_CRED_ID_SIZE}s"),
+    ("issuer", "H"),
+    ("subject", f"{ADDRESS_SIZE}s"),
+    ("schema_code", "B"),
+    ("cred_hash", "32s"),
+    ("issued_at", "Q"),
+    ("expires_at", "Q"),
+    ("revoked", "B"),
+    ("cid_len", "B"),
+    ("cid_pointer", f"{MAX_CID_SIZE}s"),
+    ("nft_asa_id", "Q"),
+    ("serial", "Q"),
+)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class BinarySnapshot:
+    """mmap view over a binary snapshot file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.app_id, self.round, self.count, issuer_count = HEADER_STRUCT.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary credential snapshot")
+        pos = HEADER_STRUCT.size
+        self.issuers = [
+            self._mm[at:at + ADDRESS_SIZE].decode() for at in range(pos, pos + ADDRESS_SIZE * issuer_count, ADDRESS_SIZE)
+        ]
+        pos += ADDRESS_SIZE * issuer_count
+        self._columns = {}  # name -> (offset, struct code, width)
+        for name, code in BINARY_COLUMNS:
+            width = struct.calcsize(f">{code}")
+            self._columns[name] = (pos, code, width)
+            pos += width * self.count
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """Every value of one column; integer columns are decoded in a single unpack"""
+        offset, code, width = self._columns[name]
+        if code.endswith("s"):
+            return [self._mm[pos:pos + width] for pos in range(offset, offset + width * self.count, width)]
+        return struct.unpack_from(f">{self.count}{code}", self._mm, offset)
+
+    def _value(self, name, i):
+        offset, code, width = self._columns[name]
+        return struct.unpack_from(f">{code}", self._mm, offset + i * width)[0]
+
+    def _cred_id(self, i):
+        offset, _, width = self._columns["cred_id"]
+        start = offset + i * width
+        return self._mm[start:start + self._value("cred_id_len", i)]
+
+    def _row(self, values):
+        values = dict(values)
+        values["cred_id"] = values["cred_id"][:values.pop("cred_id_len")]
+        values["cid_pointer"] = values["cid_pointer"][:values.pop("cid_len")]
+        values["issuer"] = self.issuers[values["issuer"]]
+        values["subject"] = values["subject"].decode()
+        return tuple(values[name] for name in COLUMNS)
+
+    def rows(self):
+        """Yield every row (CredentialIndex COLUMNS order), sorted by cred_id"""
+        col = self.column
+        issuers = self.issuers
+        for (id_len, cred_id, issuer, subject, schema_code, cred_hash, issued_at, expires_at, revoked, cid_len, cid,
+             nft_asa_id, serial) in zip(*(col(name) for name, _ in BINARY_COLUMNS)):
+            yield (cred_id[:id_len], issuers[issuer], subject.decode(), schema_code, cred_hash, issued_at,
+                   expires_at, revoked, cid[:cid_len], nft_asa_id, serial)
+
+    def get(self, cred_id):
+        """The row of one credential, or None, found by binary search over the mapped file"""
+        if isinstance(cred_id, str):
+            cred_id = cred_id.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._cred_id(mid) < cred_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or self._cred_id(lo) != cred_id:
+            return None
+        return self._row((name, self._value(name, lo)) for name, _ in BINARY_COLUMNS)
+
+
+def write_binary(path, rows, app_id, rnd):
+    """Write rows (sorted by cred_id) as a binary snapshot; returns the row count"""
+    issuers, columns, count = {}, {name: bytearray() for name, _ in BINARY_COLUMNS}, 0
+    packers = {name: struct.Struct(f">{code}") for name, code in BINARY_COLUMNS}
+    for row in rows:
+        values = dict(zip(COLUMNS, row))
+        cred_id, cid = bytes(values["cred_id"]), bytes(values["cid_pointer"])
+        if len(cred_id) > MAX_CRED_ID_SIZE or len(cid) > MAX_CID_SIZE:
+            raise ValueError(f"Credential {cred_id!r} does not fit the snapshot columns")
+        values.update(
+            cred_id_len=len(cred_id), cred_id=cred_id, cid_len=len(cid), cid_pointer=cid,
+            issuer=issuers.setdefault(values["issuer"], len(issuers)),
+            subject=values["subject"].encode(),
+        )
+        for name, packer in packers.items():
+            columns[name] += packer.pack(values[name])
+        count += 1
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER_STRUCT.pack(MAGIC, app_id, rnd, count, len(issuers)))
+        for address in issuers:
+            f.write(address.encode())
+        for name, _ in BINARY_COLUMNS:
+            f.write(columns[name])
+    os.replace(tmp, path)  # a snapshot is either complete or absent
+    return count
+
+
+class ParquetSnapshot:
+    """A Parquet snapshot loaded into an Arrow table (requires pyarrow)"""
+
+    def __init__(self, path):
+        pa = _pyarrow()
+        self.table = pa.parquet.read_table(path)
+        meta = self.table.schema.metadata or {}
+        if meta.get(b"format") != MAGIC:
+            raise ValueError(f"{path} is not a credential snapshot")
+        self.app_id, self.round = int(meta[b"app_id"]), int(meta[b"round"])
+        self.count = self.table.num_rows
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        return self.table.column(name).to_pylist()
+
+    def rows(self):
+        yield from zip(*map(self.column, COLUMNS))
+
+    def get(self, cred_id):
+        if isinstance(cred_id, str):
+            cred_id = cred_id.encode()
+        pa = _pyarrow()
+        match = self.table.filter(pa.compute.equal(self.table.column("cred_id"), pa.scalar(cred_id, pa.binary())))
+        return next(zip(*(match.column(name).to_pylist() for name in COLUMNS)), None)
+
+
+def write_parquet(path, rows, app_id, rnd):
+    """Write rows (sorted by cred_id) as a Parquet snapshot; returns the row count"""
+    pa = _pyarrow()
+    schema = pa.schema(
+        [
+            ("cred_id", pa.binary()), ("issuer", pa.string()), ("subject", pa.string()),
+            ("schema_code", pa.uint8()), ("cred_hash", pa.binary(32)), ("issued_at", pa.uint64()),
+            ("expires_at", pa.uint64()), ("revoked", pa.uint8()), ("cid_pointer", pa.binary()),
+            ("nft_asa_id", pa.uint64()), ("serial", pa.uint64()),
+        ],
+        metadata={b"format": MAGIC, b"app_id": str(app_id).encode(), b"round": str(rnd).encode()},
+    )
+    columns = list(zip(*rows)) or [[] for _ in COLUMNS]
+    table = pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema)
+    tmp = path + ".tmp"
+    pa.parquet.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    return table.num_rows
+
+
+def write_snapshot(path, rows, app_id, rnd, fmt="auto"):
+    """Write a snapshot in fmt ("auto" picks parquet when pyarrow is installed); returns the format used"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown snapshot format {fmt!r} (expected one of {FORMATS})")
+    if fmt == "auto":
+        fmt = "parquet" if _pyarrow() else "binary"
+    if fmt == "parquet":
+        if _pyarrow() is None:
+            raise ImportError("Parquet snapshots need pyarrow (pip install pyarrow)")
+        write_parquet(path, rows, app_id, rnd)
+    else:
+        write_binary(path, rows, app_id, rnd)
+    return fmt
+
+
+def open_snapshot(path):
+    """BinarySnapshot or ParquetSnapshot, by the file's magic bytes"""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return BinarySnapshot(path)
+    if magic.startswith(PARQUET_MAGIC):
+        if _pyarrow() is None:
+            raise ImportError(f"{path} is a Parquet snapshot; reading it needs pyarrow")
+        return ParquetSnapshot(path)
+    raise ValueError(f"{path} is not a credential snapshot")
+
+
+def export_index(index, path, fmt="auto"):
+    """Snapshot a CredentialIndex at its synced round; returns (format, round)"""
+    rnd = index.synced_round
+    if rnd is None:
+        raise ValueError("The index has never been synced; load it first")
+    return write_snapshot(path, index.iter_rows(), index.app_id, rnd, fmt), rnd
+
+
+def import_snapshot(path, index):
+    """Replace a CredentialIndex's contents with a snapshot; returns the snapshot round
+
+    Follow with index.catch_up() to apply what happened after that round.
+    """
+    with open_snapshot(path) as snap:
+        if snap.app_id != index.app_id:
+            raise ValueError(f"{path} is a snapshot of app {snap.app_id}, the index mirrors app {index.app_id}")
+        index.restore(snap.rows(), snap.round)
+        return snap.round
+
+
+def diff(old_rows, new_rows):
+    """Yield (change, cred_id) for two cred_id-sorted row streams; change is added, removed or changed"""
+    old_rows, new_rows = iter(old_rows), iter(new_rows)
+    old, new = next(old_rows, None), next(new_rows, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and bytes(old[0]) < bytes(new[0])):
+            yield "removed", bytes(old[0])
+            old = next(old_rows, None)
+        elif old is None or bytes(new[0]) < bytes(old[0]):
+            yield "added", bytes(new[0])
+            new = next(new_rows, None)
+        else:
+            if tuple(old) != tuple(new):
+                yield "changed", bytes(new[0])
+            old, new = next(old_rows, None), next(new_rows, None)
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Export, import and compare snapshots of the credential registry")
+    sub = p.add_subparsers(dest="step", required=True)
+    e = sub.add_parser("export", help="Sync the index and write a snapshot of it")
+    e.add_argument("out", metavar="SNAPSHOT")
+    e.add_argument("--db", default="credentials.sqlite", help="SQLite index path (see credential_index.py)")
+    e.add_argument("--format", choices=FORMATS, default="auto", help="auto: parquet when pyarrow is installed")
+    i = sub.add_parser("import", help="Load a snapshot into an index and catch up from its round")
+    i.add_argument("src", metavar="SNAPSHOT")
+    i.add_argument("--db", default="credentials.sqlite", help="SQLite index path to (re)build")
+    d = sub.add_parser("diff", help="List credentials added, removed or changed between two snapshots")
+    d.add_argument("old", metavar="OLD")
+    d.add_argument("new", metavar="NEW", help="A snapshot, or an index database (.sqlite)")
+    a = p.parse_args()
+
+    if a.step == "diff":
+        with open_snapshot(a.old) as old:
+            if a.new.endswith(".sqlite"):
+                from .credential_index import CredentialIndex
+
+                new = CredentialIndex(a.new, old.app_id, None)
+                new_round, new_rows = new.synced_round, new.iter_rows()
+            else:
+                new = open_snapshot(a.new)
+                new_round, new_rows = new.round, new.rows()
+            counts = {"added": 0, "removed": 0, "changed": 0}
+            for change, cred_id in diff(old.rows(), new_rows):
+                counts[change] += 1
+                print(f"{change:8} {cred_id.decode(errors='replace')}")
+            print(f"Round {old.round} -> {new_round}: " + ", ".join(f"{n} {c}" for c, n in counts.items()))
+    else:
+        from .credential_index import CredentialIndex
+        from .deploy_localnet import NET
+
+        idx = CredentialIndex(a.db, NET.app_id, NET.algod, NET.indexer)
+        if a.step == "export":
+            if idx.synced_round is None:
+                idx.load_all()
+            else:
+                idx.catch_up(NET.indexer.health()["round"])
+            fmt, rnd = export_index(idx, a.out, a.format)
+            print(f"Wrote {fmt} snapshot of app {idx.app_id} at round {rnd} to {a.out}")
+        else:
+            rnd = import_snapshot(a.src, idx)
+            changed = idx.catch_up(NET.indexer.health()["round"])
+            print(f"Imported snapshot at round {rnd}, caught up to round {idx.synced_round} ({changed} updates)")
@@ -0,0 +1,209 @@
+# Pipelined transaction submission engine
+# Keeps up to N transaction groups in flight, confirms them by watching new rounds
+# (status_after_block + the block's txid list) instead of polling each transaction,
+# and rebuilds groups whose validity window expired before they were confirmed.
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from algosdk import transaction
+from algosdk.error import AlgodHTTPError
+
+from . import telemetry
+
+_STOP = object()
+
+
+class _Pending:
+    """One submitted group: how to build it, its future and its current attempt"""
+
+    def __init__(self, build, future, label=None):
+        self.build = build
+        self.future = future
+        self.label = label
+        self.attempts = 0
+        self.txids = []
+        self.last_valid = 0
+        self.sent_at = 0.0
+
+
+class Submitter:
+    """Submit transaction groups with a bounded number in flight
+
+    Producers call submit(build) where build(sp) returns the unsigned transactions
+    of one group for the given suggested params, or the group already signed for a
+    validity window covering sp's round (then private_key may be None). submit()
+    blocks once queue_size requests are waiting, so a producer streaming
+    issue/revoke requests can never run ahead of the chain. Each call returns a Future resolving to
+    {"txids": [...], "confirmed-round": r, "label": label}.
+    """
+
+    def __init__(self, client, private_key, max_in_flight=32, queue_size=256, max_retries=3):
+        self.client = client
+        self.private_key = private_key
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._pending = {}  # first txid of the group -> _Pending
+        self._retry = deque()
+        self._round = None
+        self._sp = None
+        self._sp_round = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._round = self.client.status()["last-round"]
+        self._threads = [
+            threading.Thread(target=self._send_loop, name="submitter-send", daemon=True),
+            threading.Thread(target=self._watch_loop, name="submitter-watch", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def submit(self, build, label=None):
+        """Queue a group builder; blocks while the queue is full"""
+        future = Future()
+        self.queue.put(_Pending(build, future, label))
+        return future
+
+    def close(self):
+        """Stop accepting work and wait until everything in flight is settled"""
+        self.queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _suggested_params(self, refresh=False):
+        # Fetched at most once per round unless a send asks for fresh params
+        if refresh or self._sp is None or self._sp_round != self._round:
+            with telemetry.span("suggested_params"):
+                self._sp = self.client.suggested_params()
+            self._sp_round = self._round
+        return self._sp
+
+    def _send_loop(self):
+        stopping = False
+        while True:
+            with self._lock:
+                item = self._retry.popleft() if self._retry else None
+                idle = not self._pending and not self._retry
+            if item is None:
+                if stopping:
+                    if idle:
+                        break
+                    time.sleep(0.05)
+                    continue
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _STOP:
+                    stopping = True
+                    continue
+                self._acquire_slot()
+            self._send(item)
+        self._stop.set()
+
+    def _acquire_slot(self):
+        # A retried item keeps the slot it already holds. When every slot belongs to a
+        # group waiting in _retry, only this thread can free one, so resend while waiting.
+        while not self._slots.acquire(timeout=0.05):
+            while True:
+                with self._lock:
+                    item = self._retry.popleft() if self._retry else None
+                if item is None:
+                    break
+                self._send(item)
+
+    def _send(self, item):
+        refresh = item.attempts > 0
+        while True:
+            item.attempts += 1
+            item.txids = []
+            try:
+                sp = self._suggested_params(refresh)
+                with telemetry.span("build", label=item.label):
+                    txns = item.build(sp)
+                if isinstance(txns[0], transaction.SignedTransaction):
+                    stxns, txns = txns, [stx.transaction for stx in txns]  # signed offline (bundle.py)
+                else:
+                    if len(txns) > 1:
+                        transaction.assign_group_id(txns)
+                    with telemetry.span("sign", txns=len(txns)):
+                        stxns = [txn.sign(self.private_key) for txn in txns]
+                item.txids = [stx.get_txid() for stx in stxns]
+                item.last_valid = txns[0].last_valid_round
+                # Register before sending so a confirmation in the very next block is not missed
+                with self._lock:
+                    self._pending[item.txids[0]] = item
+                with telemetry.span("send", txid=item.txids[0]):
+                    self.client.send_transactions(stxns)
+                item.sent_at = time.perf_counter()
+                telemetry.observe("group_fee_microalgos", sum(txn.fee for txn in txns))
+                return
+            except AlgodHTTPError as e:
+                self._forget(item)
+                if "txn dead" in str(e) and item.attempts <= self.max_retries:
+                    telemetry.count("retries_total", reason="txn_dead")
+                    refresh = True  # validity window already passed, rebuild with new params
+                    continue
+                self._fail(item, e)
+                return
+            except Exception as e:
+                self._forget(item)
+                self._fail(item, e)
+                return
+
+    def _forget(self, item):
+        if item.txids:
+            with self._lock:
+                self._pending.pop(item.txids[0], None)
+
+    def _fail(self, item, error):
+        telemetry.count("groups_total", result="failed")
+        item.future.set_exception(error)
+        self._slots.release()
+
+    def _watch_loop(self):
+        rnd = self._round
+        while not self._stop.is_set():
+            try:
+                latest = self.client.status_after_block(rnd)["last-round"]
+                for r in range(rnd + 1, latest + 1):
+                    txids = self.client.get_block_txids(r).get("blockTxids") or []
+                    self._settle(r, set(txids))
+                rnd = latest
+                self._round = latest
+            except Exception as e:
+                telemetry.count("watcher_errors_total")
+                print(f"Round watcher error: {e}")
+                time.sleep(1)
+
+    def _settle(self, rnd, block_txids):
+        with self._lock:
+            for txid, item in list(self._pending.items()):
+                if txid in block_txids:
+                    del self._pending[txid]
+                    telemetry.observe("confirm_seconds", time.perf_counter() - item.sent_at)
+                    telemetry.count("groups_total", result="confirmed")
+                    item.future.set_result({"txids": item.txids, "confirmed-round": rnd, "label": item.label})
+                    self._slots.release()
+                elif rnd >= item.last_valid:
+                    del self._pending[txid]
+                    if item.attempts <= self.max_retries:
+                        telemetry.count("retries_total", reason="expired")
+                        self._retry.append(item)
+                    else:
+                        telemetry.count("groups_total", result="expired")
+                        item.future.set_exception(RuntimeError(f"Transaction {txid} expired after {item.attempts} attempts"))
+                        self._slots.release()
@@ -0,0 +1,219 @@
+# Expiry sweeper
+# Every credential box locks 2500 + 400 * (len(cred_id) + box size) microALGOs of the
+# app account's minimum balance until it is deleted. The sweeper keeps a min-heap of
+# (expires_at, cred_id) fed from the CredentialIndex mirror one time window at a time,
+# pops the entries that are due, packs them into sweep() calls of up to 8 box
+# references and submits the calls in groups, topped up with budget calls, through a
+# Submitter.
+# Revoked credentials are swept only when an archive file is given: their rows are
+# written there before the boxes are deleted.
+import argparse
+import heapq
+import json
+import time
+
+from . import methods, revocation
+from .methods import MAX_BOX_REFS
+from .record import COMPACT_SIZE, pack_cred_ids
+
+BOX_FLAT_MBR = 2500  # microALGOs per box
+BOX_BYTE_MBR = 400   # microALGOs per byte of name + value
+
+# The contract compares expires_at with the last block's timestamp, which trails wall time
+CLOCK_MARGIN = 30  # seconds
+
+REVOKED = 0  # heap key of revoked credentials: due immediately
+
+# Full sweep calls per atomic group, leaving room for their budget calls
+CALLS_PER_GROUP = methods.calls_per_group("sweep", MAX_BOX_REFS)
+
+
+def box_mbr(cred_id, cid_pointer):
+    """Minimum balance held by one compact credential box (the only kind sweep() deletes)"""
+    return BOX_FLAT_MBR + BOX_BYTE_MBR * (len(cred_id) + COMPACT_SIZE + len(cid_pointer))
+
+
+def pack_sweep_calls(entries):
+    """Yield (cred_ids, boxes) per sweep call from (cred_id, page box or None) entries
+
+    Credentials sharing a bitmap page share its box reference.
+    """
+    ids, boxes = [], []
+    for cred_id, page in entries:
+        need = [cred_id] + ([page] if page is not None and page not in boxes else [])
+        if len(boxes) + len(need) > MAX_BOX_REFS:
+            yield ids, boxes
+            ids, boxes = [], []
+            need = [cred_id] + ([page] if page is not None else [])
+        ids.append(cred_id)
+        boxes.extend(need)
+    if ids:
+        yield ids, boxes
+
+
+def sweep_builder(app_id, addr, group_calls):
+    """Return a builder for one atomic group of sweep calls plus its budget calls"""
+    cost = sum(methods.call_cost("sweep", len(ids)) for ids, _ in group_calls)
+
+    def build(sp):
+        return methods.with_budget([
+            methods.app_call(app_id, addr, sp, "sweep", pack_cred_ids(ids), boxes=boxes)
+            for ids, boxes in group_calls
+        ], app_id, addr, sp, cost)
+    return build
+
+
+def _archive_row(cred):
+    return json.dumps({k: v.hex() if isinstance(v, bytes) else v for k, v in cred.items()})
+
+
+class ExpirySweeper:
+    """Delete the boxes of expired (and optionally revoked) credentials in batches
+
+    index is a CredentialIndex, submitter a started Submitter signing as the app
+    admin (addr). Only credentials expiring before now + horizon are held in the
+    heap; later ones are pulled in as time advances. Heap entries are checked
+    against the mirror when popped, so credentials that were reissued or already
+    deleted in the meantime are skipped.
+    """
+
+    def __init__(self, index, submitter, addr, horizon=86400, archive=None, margin=CLOCK_MARGIN):
+        self.index = index
+        self.submitter = submitter
+        self.addr = addr
+        self.horizon = horizon
+        self.archive = archive
+        self.margin = margin
+        self._heap = []
+        self._queued = set()
+        self._scanned_until = 0
+        self.swept = 0
+        self.reclaimed = 0
+
+    def _push(self, key, cred_id):
+        if cred_id not in self._queued:
+            self._queued.add(cred_id)
+            heapq.heappush(self._heap, (key, cred_id))
+
+    def scan(self, now):
+        """Push credentials expiring before now + horizon not covered by earlier scans"""
+        until = now + self.horizon
+        for cred in self.index.expiring(self._scanned_until, until):
+            self._push(cred["expires_at"], cred["cred_id"])
+        self._scanned_until = max(self._scanned_until, until)
+        if self.archive is not None:
+            for cred in self.index.revoked():
+                self._push(REVOKED, cred["cred_id"])
+
+    def rescan(self):
+        """Forget the scanned window, e.g. to pick up credentials issued with short expiries"""
+        self._heap, self._queued, self._scanned_until = [], set(), 0
+
+    def due(self, now):
+        """Pop every entry due at now that the mirror still agrees with"""
+        cutoff = now - self.margin
+        creds = []
+        while self._heap and self._heap[0][0] < cutoff:
+            key, cred_id = heapq.heappop(self._heap)
+            self._queued.discard(cred_id)
+            cred = self.index.get(cred_id)
+            if cred is None:
+                continue  # already deleted
+            if cred["expires_at"] == key or (key == REVOKED and cred["revoked"]):
+                creds.append(cred)
+        return creds
+
+    def _page_box(self, cred, now):
+        # An unexpired credential may be revoked only in the bitmap, so its page is referenced
+        expired = cred["expires_at"] != 0 and cred["expires_at"] < now - self.margin
+        if expired:
+            return None
+        return revocation.page_name(revocation.locate(cred["serial"])[0])
+
+    def sweep_once(self, now=None):
+        """Scan, then delete every due credential; returns (boxes deleted, microALGOs freed)"""
+        now = int(time.time()) if now is None else now
+        self.scan(now)
+        creds = {cred["cred_id"]: cred for cred in self.due(now)}
+        if not creds:
+            return 0, 0
+        if self.archive is not None:
+            for cred in creds.values():
+                self.archive.write(_archive_row(cred) + "\n")
+            self.archive.flush()
+
+        calls = list(pack_sweep_calls((cred_id, self._page_box(cred, now)) for cred_id, cred in creds.items()))
+        futures = []
+        for start in range(0, len(calls), CALLS_PER_GROUP):
+            group_calls = calls[start:start + CALLS_PER_GROUP]
+            futures.append((group_calls, self.submitter.submit(sweep_builder(self.index.app_id, self.addr, group_calls))))
+
+        swept, reclaimed = 0, 0
+        for group_calls, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # e.g. a credential reissued since the last catch-up; the next rescan retries it
+                print(f"Sweep group failed: {e}")
+                continue
+            ids = [cred_id for call_ids, _ in group_calls for cred_id in call_ids]
+            self.index.discard(ids)
+            swept += len(ids)
+            reclaimed += sum(box_mbr(cred_id, creds[cred_id]["cid_pointer"]) for cred_id in ids)
+        self.swept += swept
+        self.reclaimed += reclaimed
+        return swept, reclaimed
+
+    def run(self, stop=None, interval=60, rescan_every=3600):
+        """Catch the mirror up and sweep every interval seconds until stop is set"""
+        last_rescan = time.monotonic()
+        while stop is None or not stop.is_set():
+            if self.index.indexer is not None:
+                self.index.catch_up(self.index.indexer.health()["round"])
+            if time.monotonic() - last_rescan >= rescan_every:
+                self.rescan()
+                last_rescan = time.monotonic()
+            swept, reclaimed = self.sweep_once()
+            if swept:
+                print(f"Swept {swept} credentials, freed {reclaimed / 1e6:.4f} ALGO of minimum balance")
+            if stop is not None:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from algosdk.logic import get_application_address
+
+    from .credential_index import CredentialIndex
+    from .deploy_localnet import NET, make_submitter
+
+    p = argparse.ArgumentParser(description="Delete expired credential boxes and report the freed minimum balance")
+    p.add_argument("--db", default="credentials.sqlite", help="SQLite index path (see credential_index.py)")
+    p.add_argument("--archive", metavar="FILE.jsonl", help="Also sweep revoked credentials, appending their rows to FILE first")
+    p.add_argument("--follow", action="store_true", help="Keep sweeping as credentials expire")
+    p.add_argument("--interval", type=int, default=60, metavar="SECONDS", help="Time between passes with --follow")
+    p.add_argument("--in-flight", type=int, default=32, metavar="N", help="Max sweep groups in flight")
+    a = p.parse_args()
+
+    idx = CredentialIndex(a.db, NET.app_id, NET.algod, NET.indexer)
+    if idx.synced_round is None:
+        idx.load_all()
+    else:
+        idx.catch_up(NET.indexer.health()["round"])
+    app_addr = get_application_address(NET.app_id)
+    before = NET.algod.account_info(app_addr)["min-balance"]
+    archive = open(a.archive, "a") if a.archive else None
+    try:
+        with make_submitter(a.in_flight) as submitter:
+            sweeper = ExpirySweeper(idx, submitter, NET.account.address, archive=archive)
+            if a.follow:
+                sweeper.run(interval=a.interval)
+            else:
+                sweeper.sweep_once()
+    finally:
+        if archive is not None:
+            archive.close()
+    after = NET.algod.account_info(app_addr)["min-balance"]
+    print(f"Swept {sweeper.swept} credentials; app min balance {before} -> {after} microALGOs "
+          f"({sweeper.reclaimed} expected to be freed)")
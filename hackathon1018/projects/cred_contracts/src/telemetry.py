@@ -0,0 +1,288 @@
+# Tracing and metrics
+# span() times a block of code, count() bumps a counter and observe() records a
+# value in a histogram. Everything goes to one process-wide sink picked with
+# configure() or the CRED_TELEMETRY environment variable:
+#   jsonl:PATH  one JSON object per span / counter / observation
+#   prom:PATH   Prometheus text format, rewritten at most every few seconds and on exit
+#               (for node_exporter's textfile collector)
+#   otel        OpenTelemetry spans and instruments (needs opentelemetry-api installed)
+# With no sink every call returns after a single check and span() hands back a
+# shared no-op context manager, so the instrumented hot paths cost next to nothing.
+# Metric names follow Prometheus conventions: the unit is the last part of the name
+# (_seconds, _microalgos, _bytes) and counters end in _total.
+import atexit
+import json
+import os
+import threading
+import time
+
+ENV = "CRED_TELEMETRY"
+
+# Histogram bucket upper bounds, chosen by the unit at the end of the metric name
+BUCKETS = {
+    "seconds": (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    "microalgos": (1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+    "bytes": (64, 128, 256, 512, 1024, 2048, 4096, 8192),
+}
+DEFAULT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_sink = None
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("sink", "name", "attrs", "started", "start_ns")
+
+    def __init__(self, sink, name, attrs):
+        self.sink = sink
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.sink.span(self.name, self.start_ns, duration, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes known only once the block has run (e.g. a txid)"""
+        self.attrs.update(attrs)
+
+
+def span(name, **attrs):
+    """Context manager timing a block; also recorded in the <name>_seconds histogram"""
+    sink = _sink
+    if sink is None:
+        return _NO_SPAN
+    return _Span(sink, name, attrs)
+
+
+def count(name, value=1, **labels):
+    if _sink is not None:
+        _sink.count(name, value, labels)
+
+
+def observe(name, value, **labels):
+    if _sink is not None:
+        _sink.observe(name, value, labels)
+
+
+def enabled():
+    return _sink is not None
+
+
+def buckets_for(name):
+    return BUCKETS.get(name.rsplit("_", 1)[-1], DEFAULT_BUCKETS)
+
+
+class Metrics:
+    """In-memory counters and histograms keyed by (name, sorted labels)"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def count(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        bounds = buckets_for(name)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = [0] * (len(bounds) + 2)
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[len(bounds)] += 1
+        hist[-1] += value
+
+    def prometheus(self):
+        """Render everything in the Prometheus text exposition format"""
+        lines, typed = [], set()
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), hist in sorted(self.histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(buckets_for(name) + ("+Inf",), hist[:-1]):
+                cumulative += n
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{fmt(labels)} {hist[-1]}")
+            lines.append(f"{name}_count{fmt(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class JsonLinesSink:
+    """Append every span, counter increment and observation to a JSONL file"""
+
+    def __init__(self, path):
+        self._f = open(path, "a")
+        self._lock = threading.Lock()
+
+    def _write(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+
+    def span(self, name, start_ns, duration, attrs):
+        self._write({"type": "span", "name": name, "start_ns": start_ns, "duration_s": duration,
+                     "thread": threading.current_thread().name, **attrs})
+
+    def count(self, name, value, labels):
+        self._write({"type": "counter", "name": name, "value": value, **labels})
+
+    def observe(self, name, value, labels):
+        self._write({"type": "histogram", "name": name, "value": value, **labels})
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+class PrometheusSink:
+    """Aggregate in memory; rewrite a Prometheus text file every interval seconds and on close"""
+
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.metrics = Metrics()
+        self._lock = threading.Lock()
+        self._written = time.monotonic()
+
+    def span(self, name, start_ns, duration, attrs):
+        labels = {k: v for k, v in attrs.items() if k in ("method", "error")}
+        self.observe(f"{name}_seconds", duration, labels)
+
+    def count(self, name, value, labels):
+        with self._lock:
+            self.metrics.count(name, value, labels)
+        self._maybe_flush()
+
+    def observe(self, name, value, labels):
+        with self._lock:
+            self.metrics.observe(name, value, labels)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._written >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            text = self.metrics.prometheus()
+            self._written = time.monotonic()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, self.path)  # scrapers never see a half-written file
+
+    def close(self):
+        self.flush()
+
+
+class OpenTelemetrySink:
+    """Forward spans and metrics to the OpenTelemetry API (exporters are configured by the SDK)"""
+
+    def __init__(self, name="cred_contracts"):
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError as e:
+            raise ImportError("the otel sink needs opentelemetry-api (pip install opentelemetry-sdk)") from e
+        self._tracer = trace.get_tracer(name)
+        self._meter = metrics.get_meter(name)
+        self._instruments = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, kind, name):
+        with self._lock:
+            inst = self._instruments.get(name)
+            if inst is None:
+                create = self._meter.create_counter if kind == "counter" else self._meter.create_histogram
+                inst = self._instruments[name] = create(name)
+            return inst
+
+    def span(self, name, start_ns, duration, attrs):
+        s = self._tracer.start_span(name, start_time=start_ns, attributes={k: str(v) for k, v in attrs.items()})
+        s.end(end_time=start_ns + int(duration * 1e9))
+        self._instrument("histogram", f"{name}_seconds").record(duration)
+
+    def count(self, name, value, labels):
+        self._instrument("counter", name).add(value, labels)
+
+    def observe(self, name, value, labels):
+        self._instrument("histogram", name).record(value, labels)
+
+    def close(self):
+        pass
+
+
+def make_sink(spec):
+    """Build a sink from "jsonl:PATH", "prom:PATH" or "otel" """
+    kind, _, arg = spec.partition(":")
+    if kind == "jsonl" and arg:
+        return JsonLinesSink(arg)
+    if kind == "prom" and arg:
+        return PrometheusSink(arg)
+    if kind == "otel":
+        return OpenTelemetrySink(arg or "cred_contracts")
+    raise ValueError(f"Unknown telemetry sink {spec!r} (expected jsonl:PATH, prom:PATH or otel)")
+
+
+def set_sink(sink):
+    """Install sink (None disables telemetry), closing the previous one"""
+    global _sink
+    previous, _sink = _sink, sink
+    if previous is not None and previous is not sink:
+        previous.close()
+    return sink
+
+
+def configure(spec=None):
+    """Install the sink described by spec, or by CRED_TELEMETRY when spec is None"""
+    spec = os.environ.get(ENV, "") if spec is None else spec
+    return set_sink(make_sink(spec) if spec else None)
+
+
+def shutdown():
+    set_sink(None)
+
+
+atexit.register(shutdown)
@@ -1,7 +1,10 @@
 # Utility functions for credential verification
 import hashlib
+import itertools
 import json
-from typing import Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 
 def stable_stringify(obj: Any) -> str:
     """Create a stable JSON string representation of an object"""
@@ -16,7 +19,72 @@ def stable_stringify(obj: Any) -> str:
     else:
         return json.dumps(obj)
 
+_SCALARS = (str, int, float, bool, type(None))
+
+def _plain_key(key: Any) -> bool:
+    """True if json.dumps would write the key exactly as f'"{key}"'"""
+    return type(key) is str and key.isascii() and key.isprintable() and '"' not in key and "\\" not in key
+
+def _encodes_like_reference(obj: Any) -> bool:
+    """Check that json.dumps(sort_keys=True) gives the same bytes as stable_stringify
+
+    That holds for plain dicts/lists/scalars with keys that need no escaping. Anything
+    else (tuples, subclasses, escaped or non-string keys) is left to stable_stringify.
+    """
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        kind = type(item)
+        if kind is dict:
+            for key, value in item.items():
+                if not _plain_key(key):
+                    return False
+                if type(value) not in _SCALARS:
+                    stack.append(value)
+        elif kind is list:
+            stack.extend(value for value in item if type(value) not in _SCALARS)
+        elif kind not in _SCALARS:
+            return False
+    return True
+
+def canonical_json(obj: Any) -> str:
+    """Byte-identical to stable_stringify, encoded in one C-level json.dumps pass when possible"""
+    if _encodes_like_reference(obj):
+        return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return stable_stringify(obj)
+
 def hash_credential(credential: Dict[str, Any]) -> str:
     """Hash a credential using SHA-256"""
-    cred_str = stable_stringify(credential)
+    cred_str = canonical_json(credential)
     return hashlib.sha256(cred_str.encode()).hexdigest()
+
+def credential_digest(credential: Dict[str, Any]) -> bytes:
+    """Raw 32-byte SHA-256 of a credential, as passed to the contract's issue args"""
+    return hashlib.sha256(canonical_json(credential).encode()).digest()
+
+def _digest_chunk(credentials: List[Dict[str, Any]]) -> List[bytes]:
+    return [credential_digest(credential) for credential in credentials]
+
+def hash_credentials_batch(credentials: Iterable[Dict[str, Any]], workers: Optional[int] = None, chunksize: int = 512) -> Iterator[bytes]:
+    """Stream 32-byte digests for many credentials, in input order
+
+    With workers > 1 chunks of the input are hashed in a process pool; at most
+    2 * workers chunks are in flight, so memory stays bounded for any input size.
+    """
+    credentials = iter(credentials)
+    if not workers or workers <= 1:
+        for credential in credentials:
+            yield credential_digest(credential)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        in_flight = deque()
+        while True:
+            while len(in_flight) < 2 * workers:
+                chunk = list(itertools.islice(credentials, chunksize))
+                if not chunk:
+                    break
+                in_flight.append(pool.submit(_digest_chunk, chunk))
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
@@ -0,0 +1,295 @@
+# Bulk credential verification
+# verify_many() checks presented documents against their on-chain boxes. Lookups
+# for the same cred_id share one in-flight fetch, boxes are fetched concurrently
+# (each bitmap page they point to once), and decoded records live in a size-bounded
+# LRU with a TTL. follow_revocations() drops cached entries as soon as a revoke for
+# them lands in a new round.
+# verify_onchain() instead lets the contract's verify_batch method decide, through
+# algod's simulate endpoint: one request per 128 credentials, no fees and no
+# confirmation wait.
+import base64
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from algosdk import transaction
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import models
+
+from . import methods
+from .methods import MAX_BOX_REFS, MAX_GROUP_SIZE
+from .credential_index import revoked_serials, touched_cred_ids
+from .record import decode_record
+from .revocation import check_revoked_many
+from .util import credential_digest
+
+
+@dataclass
+class Verdict:
+    cred_id: str
+    found: bool
+    hash_match: bool = False
+    expired: bool = False
+    revoked: bool = False
+
+    @property
+    def valid(self):
+        return self.found and self.hash_match and not self.expired and not self.revoked
+
+    @classmethod
+    def from_bits(cls, cred_id, bits):
+        """Verdict from the bits returned by the contract's verify / verify_batch"""
+        return cls(
+            cred_id,
+            found=bool(bits & methods.VERDICT_FOUND),
+            hash_match=bool(bits & methods.VERDICT_HASH_MATCH),
+            expired=bool(bits & methods.VERDICT_EXPIRED),
+            revoked=bool(bits & methods.VERDICT_REVOKED),
+        )
+
+
+class _Entry:
+    __slots__ = ("cred_hash", "expires_at", "revoked", "serial", "deadline")
+
+    def __init__(self, rec, revoked, deadline):
+        self.cred_hash = bytes(rec.cred_hash) if rec else None
+        self.expires_at = rec.expires_at if rec else 0
+        self.serial = rec.serial if rec else 0
+        self.revoked = revoked
+        self.deadline = deadline
+
+
+class CredentialVerifier:
+    """Verify credentials against the registry with caching and request coalescing"""
+
+    def __init__(self, algod_client, app_id, max_entries=100_000, ttl=30.0, workers=16):
+        self.algod = algod_client
+        self.app_id = app_id
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache = OrderedDict()  # cred_id -> _Entry (None record = not found)
+        self._by_serial = {}         # serial -> cred_id, for bitmap revocations
+        self._inflight = {}          # cred_id -> Future
+        self._generation = 0         # bumped by every invalidate()
+        self._invalidated = {}       # cred_id or ("serial", serial) -> generation of its last invalidation
+        self._fetching = 0           # _fetch() calls running
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(workers)
+
+    def verify_many(self, cred_ids, presented_docs, now=None):
+        """Return one Verdict per (cred_id, presented document)
+
+        A presented document is the credential dict, its hex hash_credential() or
+        the raw 32-byte digest.
+        """
+        now = time.time() if now is None else now
+        futures = self._lookup_many(cred_ids)
+        verdicts = []
+        for cred_id, doc, future in zip(cred_ids, presented_docs, futures):
+            entry = future.result()
+            if entry.cred_hash is None:
+                verdicts.append(Verdict(cred_id, found=False))
+                continue
+            verdicts.append(Verdict(
+                cred_id,
+                found=True,
+                hash_match=_digest(doc) == entry.cred_hash,
+                expired=entry.expires_at != 0 and now > entry.expires_at,
+                revoked=entry.revoked,
+            ))
+        return verdicts
+
+    def verify(self, cred_id, presented_doc, now=None):
+        return self.verify_many([cred_id], [presented_doc], now)[0]
+
+    def invalidate(self, cred_ids=(), serials=()):
+        """Drop cached entries; fetches already in flight for them are not cached either"""
+        with self._lock:
+            self._generation += 1
+            for serial in serials:
+                self._invalidated[("serial", serial)] = self._generation
+                cred_id = self._by_serial.pop(serial, None)
+                if cred_id is not None:
+                    self._cache.pop(cred_id, None)
+            for cred_id in cred_ids:
+                self._invalidated[cred_id] = self._generation
+                self._inflight.pop(cred_id, None)  # later lookups start a fresh fetch
+                entry = self._cache.pop(cred_id, None)
+                if entry is not None:
+                    self._by_serial.pop(entry.serial, None)
+
+    def _lookup_many(self, cred_ids):
+        # Cache hits resolve at once and cred_ids already being fetched join that fetch;
+        # the rest are fetched together by this thread
+        futures, missing = {}, {}
+        with self._lock:
+            now = time.monotonic()
+            for cred_id in cred_ids:
+                if cred_id in futures:
+                    continue
+                entry = self._cache.get(cred_id)
+                if entry is not None and entry.deadline > now:
+                    self._cache.move_to_end(cred_id)
+                    futures[cred_id] = Future()
+                    futures[cred_id].set_result(entry)
+                elif cred_id in self._inflight:
+                    futures[cred_id] = self._inflight[cred_id]
+                else:
+                    futures[cred_id] = missing[cred_id] = self._inflight[cred_id] = Future()
+            generation = self._generation
+            self._fetching += bool(missing)
+        if missing:
+            self._fetch(missing, generation)
+        return [futures[cred_id] for cred_id in cred_ids]
+
+    def _fetch_box(self, cred_id):
+        try:
+            box = self.algod.application_box_by_name(self.app_id, cred_id.encode())
+        except AlgodHTTPError as e:
+            if e.code != 404:
+                raise
+            return None
+        return decode_record(base64.b64decode(box["value"]))
+
+    def _fetch(self, futures, generation):
+        """Fetch the boxes of futures' cred_ids concurrently, then each bitmap page they need once
+
+        Results are cached unless their cred_id or serial was invalidated after
+        generation, i.e. while they were being fetched.
+        """
+        try:
+            recs = dict(zip(futures, self._pool.map(self._fetch_box, futures)))
+            serials = [rec.serial for rec in recs.values() if rec is not None and not rec.revoked and rec.serial]
+            bitmap = check_revoked_many(self.algod, self.app_id, serials)
+        except Exception as e:
+            self._settle(futures, generation)
+            for future in futures.values():
+                future.set_exception(e)
+            return
+        deadline = time.monotonic() + self.ttl
+        entries = {
+            cred_id: _Entry(rec, rec is not None and (bool(rec.revoked) or bitmap.get(rec.serial, False)), deadline)
+            for cred_id, rec in recs.items()
+        }
+        with self._lock:
+            for cred_id, entry in entries.items():
+                if self._invalidated.get(cred_id, 0) > generation:
+                    continue
+                if entry.serial and self._invalidated.get(("serial", entry.serial), 0) > generation:
+                    continue
+                self._cache[cred_id] = entry
+                self._cache.move_to_end(cred_id)
+                if entry.serial:
+                    self._by_serial[entry.serial] = cred_id
+                while len(self._cache) > self.max_entries:
+                    _, old = self._cache.popitem(last=False)
+                    self._by_serial.pop(old.serial, None)
+        self._settle(futures, generation)
+        for cred_id, future in futures.items():
+            future.set_result(entries[cred_id])
+
+    def _settle(self, futures, generation):
+        # invalidate() already dropped (and may have replaced) the futures of invalidated cred_ids
+        with self._lock:
+            for cred_id in futures:
+                if self._invalidated.get(cred_id, 0) <= generation:
+                    self._inflight.pop(cred_id, None)
+            self._fetching -= 1
+            if not self._fetching:
+                self._invalidated.clear()  # no fetch left that started before them
+
+    def follow_revocations(self, indexer_client, stop=None):
+        """Invalidate cached entries touched by revoke/revoke_batch in each new round"""
+        rnd = self.algod.status()["last-round"]
+        while stop is None or not stop.is_set():
+            latest = min(self.algod.status_after_block(rnd)["last-round"], indexer_client.health()["round"])
+            if latest <= rnd:
+                time.sleep(1)
+                continue
+            next_page = None
+            while True:
+                res = indexer_client.search_transactions(
+                    application_id=self.app_id, min_round=rnd + 1, max_round=latest, next_page=next_page
+                )
+                for txn in res.get("transactions", []):
+                    args = [base64.b64decode(a) for a in txn.get("application-transaction", {}).get("application-args", [])]
+                    self.invalidate(
+                        [cred_id.decode(errors="replace") for cred_id in touched_cred_ids(args)],
+                        revoked_serials(args),
+                    )
+                next_page = res.get("next-token")
+                if not next_page:
+                    break
+            rnd = latest
+
+
+def _digest(doc):
+    if isinstance(doc, (bytes, bytearray)):
+        return bytes(doc)
+    if isinstance(doc, str):
+        return bytes.fromhex(doc)
+    return credential_digest(doc)
+
+
+def verify_many(algod_client, app_id, cred_ids, presented_docs, **kwargs):
+    """One-shot helper; keep a CredentialVerifier around to benefit from its cache"""
+    return CredentialVerifier(algod_client, app_id, **kwargs).verify_many(cred_ids, presented_docs)
+
+
+SIMULATE_BUDGET = 20_000  # extra opcode budget per simulated group
+
+
+def pack_verify_entries(entries):
+    """id_len(1) | cred_id | cred_hash(32) per (cred_id, digest), the verify_batch argument"""
+    return b"".join(bytes([len(cred_id.encode())]) + cred_id.encode() + digest for cred_id, digest in entries)
+
+
+def returned_value(txn_result):
+    """ARC-4 return value logged by an app call, without its prefix"""
+    logs = txn_result.get("logs") or []
+    last = base64.b64decode(logs[-1]) if logs else b""
+    if not last.startswith(methods.RETURN_PREFIX):
+        raise ValueError("Call did not log a return value")
+    return last[len(methods.RETURN_PREFIX):]
+
+
+def verify_onchain(algod_client, app_id, cred_ids, presented_docs, sender=None, workers=8):
+    """Return one Verdict per (cred_id, presented document), evaluated by the contract
+
+    Groups of verify_batch calls are simulated with empty signatures; bitmap pages
+    are left to simulate's unnamed-resource lookup. sender defaults to the app
+    creator, which only needs enough balance to cover the (never charged) fees.
+    """
+    sender = sender or algod_client.application_info(app_id)["params"]["creator"]
+    sp = algod_client.suggested_params()
+    entries = list(zip(cred_ids, map(_digest, presented_docs)))
+    calls = [entries[i:i + MAX_BOX_REFS] for i in range(0, len(entries), MAX_BOX_REFS)]
+    groups = [calls[i:i + MAX_GROUP_SIZE] for i in range(0, len(calls), MAX_GROUP_SIZE)]
+
+    def simulate(group):
+        txns = [
+            methods.app_call(app_id, sender, sp, "verify_batch", pack_verify_entries(call),
+                             boxes=[cred_id.encode() for cred_id, _ in call])
+            for call in group
+        ]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        request = models.SimulateRequest(
+            txn_groups=[models.SimulateRequestTransactionGroup(txns=[transaction.SignedTransaction(t, None) for t in txns])],
+            allow_empty_signatures=True,
+            allow_unnamed_resources=True,
+            extra_opcode_budget=SIMULATE_BUDGET,
+        )
+        result = algod_client.simulate_transactions(request)["txn-groups"][0]
+        if result.get("failure-message"):
+            raise RuntimeError(f"verify_batch simulate failed at {result.get('failed-at')}: {result['failure-message']}")
+        return [returned_value(r["txn-result"])[2:] for r in result["txn-results"]]  # byte[]: skip length
+
+    verdicts = []
+    with ThreadPoolExecutor(workers) as pool:
+        for group, returned in zip(groups, pool.map(simulate, groups)):
+            for call, bits in zip(group, returned):
+                verdicts.extend(Verdict.from_bits(cred_id, b) for (cred_id, _), b in zip(call, bits))
+    return verdicts
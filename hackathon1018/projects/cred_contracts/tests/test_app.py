@@ -1,5 +1,5 @@
 import pytest
-from src.util import hash_credential, stable_stringify
+from src.util import canonical_json, hash_credential, hash_credentials_batch, stable_stringify
 
 def test_stable_stringify():
     """Test that stable_stringify produces consistent output"""
@@ -46,3 +46,27 @@ def test_hash_credential():
     assert isinstance(hash_result, str)
     assert len(hash_result) == 64
     assert all(c in '0123456789abcdef' for c in hash_result)
+
+def test_canonical_json_matches_stable_stringify():
+    """The fast encoder is byte-identical to stable_stringify, including fallback cases"""
+    samples = [
+        {"b": 1, "a": [1, 2.5, None, True, {"z": "é", "y": "line\nbreak"}]},
+        {"claim": {"gpa": 3.9, "honors": ["cum laude"]}, "issuedAt": "2024-01-01T00:00:00Z"},
+        {"tuple": (1, 2)},            # tuples go through json.dumps' default separators
+        {"quo\"te": 1, "tab\tkey": 2},  # keys that json would escape
+        {"naïve": 1},                 # non-ASCII key
+        {1: "int key"},
+        [],
+        "plain",
+        42,
+    ]
+    for sample in samples:
+        assert canonical_json(sample) == stable_stringify(sample)
+
+def test_hash_credentials_batch():
+    """Batch hashing returns raw digests in input order, with or without workers"""
+    creds = [{"credentialId": f"cred-{i}", "claim": {"n": i}} for i in range(50)]
+    expected = [bytes.fromhex(hash_credential(c)) for c in creds]
+
+    assert list(hash_credentials_batch(creds)) == expected
+    assert list(hash_credentials_batch(iter(creds), workers=2, chunksize=7)) == expected
@@ -0,0 +1,77 @@
+import base64
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("pyteal")
+
+from src import artifact_cache
+from src.artifact_cache import CONTRACT_SOURCES, SRC_DIR, get_programs, get_teal, teal_key
+
+class FakeAlgod:
+    """Counts compile calls and reports a settable node version"""
+
+    def __init__(self, build_number=1):
+        self.build_number = build_number
+        self.compiles = 0
+
+    def versions(self):
+        return {"build": {"major": 3, "minor": 20, "build_number": self.build_number, "commit_hash": "abcdef0123"}}
+
+    def compile(self, source, source_map=False):
+        self.compiles += 1
+        result = {"result": base64.b64encode(source.encode()[:16]).decode()}
+        if source_map:
+            result["sourcemap"] = {"version": 3}
+        return result
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+def test_teal_miss_then_hit(cache):
+    approval, clear, cached = get_teal()
+    assert not cached and approval.startswith("#pragma version 8")
+    assert (cache / teal_key() / "approval.teal").read_text() == approval
+    assert get_teal() == (approval, clear, True)
+
+def test_rebuild_replaces_a_cached_entry(cache):
+    approval, clear, _ = get_teal()
+    (cache / teal_key() / "approval.teal").write_text("stale")
+    assert get_teal()[0] == "stale"
+    assert get_teal(rebuild=True) == (approval, clear, False)
+    assert get_teal()[0] == approval
+
+def test_key_follows_sources_and_pyteal_version(tmp_path, monkeypatch):
+    key = teal_key()
+    assert teal_key(teal_version=9) != key
+
+    monkeypatch.setattr(artifact_cache.metadata, "version", lambda name: "0.0.1")
+    assert teal_key() != key
+    monkeypatch.undo()
+
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in CONTRACT_SOURCES:
+        shutil.copy(os.path.join(SRC_DIR, name), src / name)
+    monkeypatch.setattr(artifact_cache, "SRC_DIR", str(src))
+    assert teal_key() == key
+    with open(src / "record.py", "a") as f:
+        f.write("\n# changed\n")
+    assert teal_key() != key
+
+def test_bytecode_is_cached_per_algod_version(cache):
+    algod = FakeAlgod()
+    programs = get_programs(algod)
+    assert algod.compiles == 2 and get_programs(algod) == programs and algod.compiles == 2
+
+    entry = cache / teal_key() / artifact_cache.algod_version(algod)
+    assert entry.name == "3.20.1-abcdef01"
+    assert sorted(os.listdir(entry)) == ["approval.bin", "approval.map.json", "clear.bin"]
+
+    algod.build_number = 2
+    get_programs(algod)
+    assert algod.compiles == 4
+    assert sorted(os.listdir(cache / teal_key())) == ["3.20.1-abcdef01", "3.20.2-abcdef01", "approval.teal", "clear.teal"]
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding, transaction
+
+from bench.localchain import LocalChain
+from src import methods
+from src.bundle import build_bundle, encode_txn, iter_bundle, presigned_builder, sign_bundle, submit_bundle
+from src.record import CompactRecord, encode_batch_record
+from src.submitter import Submitter
+
+SK, ADDR = account.generate_account()
+SP = transaction.SuggestedParams(1000, 10, 1010, "A" * 44, "test")
+
+def issue_builder(app_id, n):
+    rec = encode_batch_record(f"c-{n}".encode(), encoding.decode_address(ADDR), 2, bytes(32), 0, b"", 0)
+    return lambda sp: [methods.app_call(app_id, ADDR, sp, "issue_batch", rec, boxes=[f"c-{n}".encode()])]
+
+def test_offline_signature_matches_sdk(tmp_path):
+    build_bundle(str(tmp_path / "u"), SP, ADDR, [("c-0", issue_builder(1, 0))], windows=1)
+    sign_bundle(str(tmp_path / "u"), str(tmp_path / "s"), SK, workers=1)
+    entries = iter_bundle(str(tmp_path / "s"))
+    assert next(entries)["signed"]
+    raw = next(entries)["txns"][0][0]
+    txn = issue_builder(1, 0)(SP)[0]
+    txn.first_valid_round, txn.last_valid_round = 10, 1009
+    assert raw == encode_txn(txn.sign(SK))
+
+def test_copies_per_window(tmp_path):
+    builders = [(f"c-{n}", issue_builder(1, n)) for n in range(5)]
+    assert build_bundle(str(tmp_path / "u"), SP, ADDR, builders, windows=3, start=100) == 5
+    assert sign_bundle(str(tmp_path / "u"), str(tmp_path / "s"), SK, workers=2, chunksize=2) == 5
+    entries = iter_bundle(str(tmp_path / "s"))
+    header = next(entries)
+    assert header["windows"] == [[100, 1099], [1100, 2099], [2100, 3099]]
+    entries = list(entries)
+    assert [e["label"] for e in entries] == [f"c-{n}" for n in range(5)]
+
+    build = presigned_builder(header["windows"], entries[0]["txns"])
+
+    def at(rnd):
+        return transaction.SuggestedParams(1000, rnd, rnd + 1000, "A" * 44)
+
+    assert build(at(500))[0].transaction.last_valid_round == 1099
+    assert build(at(1099))[0].transaction.first_valid_round == 1100
+    with pytest.raises(RuntimeError):
+        build(at(3099))
+
+def test_sign_rejects_other_key(tmp_path):
+    build_bundle(str(tmp_path / "u"), SP, ADDR, [("c-0", issue_builder(1, 0))], windows=1)
+    with pytest.raises(ValueError):
+        sign_bundle(str(tmp_path / "u"), str(tmp_path / "s"), account.generate_account()[0], workers=1)
+
+def test_submit_streams_signed_groups(tmp_path):
+    chain = LocalChain(ADDR, round_time=0.05)
+    try:
+        sp = chain.suggested_params()
+        builders = [(f"c-{n}", issue_builder(chain.app_id, n)) for n in range(40)]
+        build_bundle(str(tmp_path / "u"), sp, ADDR, builders, windows=2)
+        sign_bundle(str(tmp_path / "u"), str(tmp_path / "s"), SK, workers=1)
+        confirmed, failed = submit_bundle(str(tmp_path / "s"), Submitter(chain, None, max_in_flight=4, queue_size=4))
+    finally:
+        chain.close()
+    assert (confirmed, failed) == (40, [])
+    assert CompactRecord(chain.boxes[b"c-39"]).subject == encoding.decode_address(ADDR)
@@ -0,0 +1,140 @@
+import base64
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding
+from algosdk.error import AlgodHTTPError
+
+from src.credential_index import CredentialIndex
+from src.methods import encode_args
+from src.record import CompactRecord, CredentialRecord, issuer_key
+from src.revocation import PAGE_BYTES, locate, page_name
+
+ALICE = account.generate_account()[1]
+BOB = account.generate_account()[1]
+
+def record(subject, serial, schema_code=2, expires_at=0, issuer_idx=0, revoked=False):
+    return CompactRecord.encode(encoding.decode_address(subject), schema_code, bytes(32), 100,
+                                expires_at, revoked, b"", 0, serial, issuer_idx)
+
+class FakeChain:
+    """algod + indexer stand-in: fixed boxes, two names per indexer page, and the app calls it reports"""
+
+    def __init__(self, boxes, issuers=None):
+        self.boxes = boxes
+        self.issuers = issuers or {0: bytes(32)}
+        self.pages_served = 0
+        self.calls = []  # app args of each reported transaction
+        self.info_calls = 0
+
+    def status(self):
+        return {"last-round": 10}
+
+    def application_info(self, app_id):
+        self.info_calls += 1
+        state = [{"key": base64.b64encode(issuer_key(i)).decode(), "value": {"bytes": base64.b64encode(a).decode()}}
+                 for i, a in self.issuers.items()]
+        return {"params": {"global-state": state}}
+
+    def application_box_by_name(self, app_id, name):
+        if name not in self.boxes:
+            raise AlgodHTTPError("not found", 404)
+        return {"value": base64.b64encode(self.boxes[name]).decode()}
+
+    def application_boxes(self, app_id, limit=0, next_page=None):
+        names = sorted(self.boxes)
+        start = int(next_page or 0)
+        self.pages_served += 1
+        page = {"boxes": [{"name": base64.b64encode(n).decode()} for n in names[start:start + 2]]}
+        if start + 2 < len(names):
+            page["next-token"] = str(start + 2)
+        return page
+
+    def search_transactions(self, **kwargs):
+        return {"transactions": [
+            {"application-transaction": {"application-args": [base64.b64encode(a).decode() for a in args]}}
+            for args in self.calls
+        ]}
+
+@pytest.fixture
+def index(tmp_path):
+    page, bit = locate(3)
+    bitmap = bytearray(PAGE_BYTES)
+    bitmap[bit // 8] |= 0x80 >> (bit % 8)
+    chain = FakeChain({
+        b"a-1": record(ALICE, 1),
+        b"a-2": record(ALICE, 2, schema_code=3, expires_at=500),
+        b"a-3": record(ALICE, 3),
+        b"b-1": record(BOB, 4, expires_at=2000),
+        page_name(page): bytes(bitmap),
+    })
+    idx = CredentialIndex(str(tmp_path / "idx.sqlite"), 1, chain, chain)
+    idx.load_all(page_size=2)
+    return idx, chain
+
+def test_load_all_and_lookups(index):
+    idx, _ = index
+
+    assert idx.synced_round == 10
+    assert idx.get("a-1")["subject"] == ALICE
+    assert sorted(c["cred_id"] for c in idx.by_subject(ALICE)) == [b"a-1", b"a-2", b"a-3"]
+    assert [c["cred_id"] for c in idx.by_schema(3)] == [b"a-2"]
+    assert idx.get("missing") is None
+
+def test_catch_up_rereads_touched_boxes(index):
+    """Only the boxes named by issue/revoke calls in the new rounds are re-read"""
+    idx, chain = index
+    chain.boxes[b"a-1"] = record(ALICE, 1, revoked=True)
+    chain.boxes[b"a-2"] = record(ALICE, 2)  # changed without a reported call: stays as loaded
+    chain.boxes[b"b-2"] = record(BOB, 5)
+    chain.calls = [encode_args("revoke", "a-1"), encode_args("issue", "b-2", BOB, 2, bytes(32), 0, bytes(32), 7)]
+
+    assert idx.catch_up(12) == 2
+    assert idx.synced_round == 12
+    assert idx.get("a-1")["revoked"] == 1
+    assert idx.get("a-2")["schema_code"] == 3
+    assert sorted(c["cred_id"] for c in idx.by_subject(BOB)) == [b"b-1", b"b-2"]
+
+def test_load_all_pages_and_applies_bitmap(index):
+    """Box names are paged through the indexer; bitmap pages listed first still revoke later boxes"""
+    idx, chain = index
+
+    assert chain.pages_served == 3
+    assert idx.get("a-3")["revoked"] == 1
+    assert idx.get("a-1")["revoked"] == 0
+
+def test_valid_for_subject(index):
+    """Revoked and expired credentials are left out"""
+    idx, _ = index
+
+    assert [c["cred_id"] for c in idx.valid_for_subject(ALICE, now=1000)] == [b"a-1"]
+    assert [c["cred_id"] for c in idx.valid_for_subject(BOB, now=1000)] == [b"b-1"]
+
+def test_query_pagination_and_expiring(index):
+    """query() pages by cred_id with a cursor; expiring() sorts by expires_at"""
+    idx, _ = index
+    first, cursor = idx.query(subject=ALICE, limit=2)
+    second, end = idx.query(subject=ALICE, limit=2, after=cursor)
+
+    assert [c["cred_id"] for c in first + second] == [b"a-1", b"a-2", b"a-3"]
+    assert end is None
+    assert [c["cred_id"] for c in idx.query(schema_code=3)[0]] == [b"a-2"]
+    assert [c["cred_id"] for c in idx.expiring(0, 3000)] == [b"a-2", b"b-1"]
+
+def test_issuers_resolved_for_every_version(tmp_path):
+    """Compact boxes get their issuer from the table, fetched once; v2 boxes carry it inline"""
+    issuer = encoding.decode_address(BOB)
+    chain = FakeChain({
+        b"v3-a": record(ALICE, 1, issuer_idx=1),
+        b"v3-b": record(ALICE, 2, issuer_idx=1),
+        b"v2": CredentialRecord.encode(issuer, encoding.decode_address(ALICE), 2, bytes(32), 100, 0, False,
+                                       b"bafy".ljust(32, b"\x00"), 0, 3),
+    }, issuers={0: bytes(32), 1: issuer})
+    idx = CredentialIndex(str(tmp_path / "idx.sqlite"), 1, chain, chain)
+    idx.load_all()
+
+    assert [c["issuer"] for c in idx.by_subject(ALICE)] == [BOB, BOB, BOB]
+    assert idx.get("v2")["cid_pointer"] == b"bafy"
+    assert chain.info_calls == 1
@@ -0,0 +1,111 @@
+import base64
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, transaction
+from algosdk.error import AlgodHTTPError
+
+from src import methods
+from src.importer import ISSUED, ISSUE_CALL_SIZE, ISSUING, MINT_NOTE_PREFIX, MINTING, BulkImporter, Journal
+from src.methods import decode_args
+from src.record import iter_batch_records
+
+ADMIN = account.generate_account()[1]
+SUBJECT = account.generate_account()[1]
+SP = transaction.SuggestedParams(1000, 1, 1000, "A" * 44, "test")
+
+class FakeChain:
+    """algod + indexer stand-in: existing boxes, earlier mints by note, new mints numbered from 500"""
+
+    def __init__(self, boxes=(), mints=None):
+        self.boxes = set(boxes)
+        self.mints = mints or {}  # note -> asset id
+        self.assets = {}          # mint txid -> asset id
+
+    def application_box_by_name(self, app_id, name):
+        if name not in self.boxes:
+            raise AlgodHTTPError("box not found", 404)
+        return {"name": base64.b64encode(name).decode()}
+
+    def search_transactions(self, address, txn_type, note_prefix, next_page=None):
+        return {"transactions": [
+            {"note": base64.b64encode(note).decode(), "created-asset-index": asset}
+            for note, asset in self.mints.items() if note.startswith(note_prefix)
+        ]}
+
+    def pending_transaction_info(self, txid):
+        return {"asset-index": self.assets[txid]}
+
+class RecordingSubmitter:
+    """Runs each builder at once and records the mints and issue_batch calls it saw"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.minted = []
+        self.issued = []
+        self.groups = []
+
+    def submit(self, build, label=None):
+        txns = build(SP)
+        self.groups.append(txns)
+        for txn in txns:
+            if isinstance(txn, transaction.AssetConfigTxn):
+                self.minted.append(txn.note[len(MINT_NOTE_PREFIX):].decode())
+                self.chain.assets[txn.get_txid()] = 500 + len(self.chain.assets)
+            elif txn.app_args:
+                name, values = decode_args(txn.app_args)
+                self.issued.extend((cred_id.decode(), rec["nft_asa_id"]) for cred_id, rec in iter_batch_records(values[0]))
+        future = Future()
+        future.set_result({"txids": [txn.get_txid() for txn in txns]})
+        return future
+
+def rows(*cred_ids):
+    return [{"cred_id": c, "subject": SUBJECT, "schema_code": 2, "expires_at": 0, "name": c} for c in cred_ids]
+
+def importer(chain, journal):
+    return BulkImporter(chain, chain, RecordingSubmitter(chain), 1, ADMIN, journal)
+
+def test_minted_asset_lookup_matches_the_whole_note():
+    """A search for "a1" also returns the mint of "a10"; only the exact note counts"""
+    chain = FakeChain(mints={MINT_NOTE_PREFIX + b"a10": 10, MINT_NOTE_PREFIX + b"a1": 1})
+    imp = importer(chain, Journal(":memory:"))
+    assert imp._find_minted_asset("a1") == 1
+    assert imp._find_minted_asset("a10") == 10
+    assert imp._find_minted_asset("a") is None
+
+def test_resume_settles_in_flight_states(tmp_path):
+    """An interrupted run is rerun: nothing is minted or issued twice"""
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    journal.mark([
+        ("done", ISSUED, 7, "T"),
+        ("landed", ISSUING, 8, None),     # its issue group confirmed before the crash
+        ("lost", ISSUING, 9, None),       # its issue group never made it
+        ("minted", MINTING, None, None),  # its mint confirmed before the crash
+        ("unminted", MINTING, None, None),
+        ("a1", MINTING, None, None),      # only a longer cred_id was minted
+    ])
+    chain = FakeChain(boxes=[b"landed"], mints={MINT_NOTE_PREFIX + b"minted": 42, MINT_NOTE_PREFIX + b"a10": 43})
+    imp = importer(chain, journal)
+
+    assert imp.run(rows("done", "landed", "lost", "minted", "unminted", "a1", "new")) == 5
+    assert imp.skipped == 2
+    assert sorted(imp.submitter.minted) == ["a1", "new", "unminted"]
+    issued = dict(imp.submitter.issued)
+    assert sorted(issued) == ["a1", "lost", "minted", "new", "unminted"]
+    assert issued["lost"] == 9 and issued["minted"] == 42 and issued["a1"] >= 500
+    assert journal.counts() == {ISSUED: 7}
+
+def test_issue_groups_carry_budget_calls(tmp_path):
+    """Full issue groups are topped up with budget calls and stay within 16 transactions"""
+    count = ISSUE_CALL_SIZE * methods.ISSUE_CALLS_PER_GROUP + 3
+    imp = importer(FakeChain(), Journal(str(tmp_path / "journal.sqlite")))
+    assert imp.run(rows(*(f"c-{n}" for n in range(count)))) == count
+
+    issue_groups = [g for g in imp.submitter.groups if not isinstance(g[0], transaction.AssetConfigTxn)]
+    assert [sum(1 for t in g if t.app_args) for g in issue_groups] == [methods.ISSUE_CALLS_PER_GROUP, 1]
+    assert all(len(g) <= methods.MAX_GROUP_SIZE for g in issue_groups)
+    assert len(issue_groups[0]) * methods.APP_CALL_BUDGET >= methods.ISSUE_CALLS_PER_GROUP * methods.call_cost(
+        "issue_batch", ISSUE_CALL_SIZE)
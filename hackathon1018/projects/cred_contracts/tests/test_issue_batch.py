@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account
+
+from src.builders import pack_issue_calls
+
+SUBJECT = account.generate_account()[1]
+
+def creds(*cred_ids, **fields):
+    return [dict({
+        "cred_id": c, "subject": SUBJECT, "schema_code": 2, "cred_hash": "ab" * 32,
+        "expires_at": 0, "nft_asa_id": 0, "cid_pointer": "bafy",
+    }, **fields) for c in cred_ids]
+
+def test_calls_take_one_box_reference_per_record():
+    """Records are split into issue_batch calls of at most 8, in input order"""
+    calls = list(pack_issue_calls(creds(*(f"c-{n}" for n in range(20)))))
+
+    assert [len(call) for call in calls] == [8, 8, 4]
+    assert [cred_id for call in calls for cred_id, _ in call] == [f"c-{n}" for n in range(20)]
+    assert all(rec[0] == len(cred_id) and rec[1:1 + len(cred_id)] == cred_id.encode()
+               for call in calls for cred_id, rec in call)
+
+def test_invalid_records_are_rejected():
+    """cred_ids must fit a box name without the reserved NUL prefix; subjects must be addresses"""
+    with pytest.raises(ValueError):
+        list(pack_issue_calls(creds("x" * 65)))
+    with pytest.raises(ValueError):
+        list(pack_issue_calls(creds("\x00rev-1")))
+    with pytest.raises(ValueError):
+        list(pack_issue_calls(creds("c-1", subject="not-an-address")))
@@ -0,0 +1,26 @@
+import hashlib
+from src.merkle import MerkleTree, depth, verify
+
+def digests(n):
+    return [hashlib.sha256(str(i).encode()).digest() for i in range(n)]
+
+def test_every_proof_verifies():
+    """Proofs verify for every leaf, including trees with odd levels"""
+    for n in (1, 2, 3, 5, 8, 13):
+        leaves = digests(n)
+        tree = MerkleTree(leaves)
+        for index, leaf in enumerate(leaves):
+            proof = tree.proof(index)
+            assert len(proof) == depth(n)
+            assert verify(tree.root, leaf, index, proof, n)
+
+def test_bad_proofs_rejected():
+    """Wrong leaf, wrong index and padded duplicate positions are rejected"""
+    leaves = digests(5)
+    tree = MerkleTree(leaves)
+    proof = tree.proof(4)
+
+    assert not verify(tree.root, leaves[3], 4, proof, 5)
+    assert not verify(tree.root, leaves[4], 3, proof, 5)
+    assert not verify(tree.root, leaves[4], 5, proof, 5)  # the duplicate of leaf 4
+    assert not verify(tree.root, leaves[4], 4, proof[:-1], 5)
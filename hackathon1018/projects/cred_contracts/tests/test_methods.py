@@ -0,0 +1,87 @@
+import json
+import os
+import re
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, transaction
+
+from src.credential_index import revoked_serials, touched_cred_ids
+from src import methods
+from src.methods import SELECTORS, call_params, decode_args, encode_args
+from src.record import encode_batch_record, encode_migrate_entry
+from src.revocation import BITS_PER_PAGE
+
+BASELINE = os.path.join(os.path.dirname(__file__), "..", "bench", "baseline_costs.json")
+
+def test_selectors_are_distinct():
+    """Every method gets its own 4-byte ARC-4 selector"""
+    assert len(set(SELECTORS.values())) == len(SELECTORS)
+    assert all(len(s) == 4 for s in SELECTORS.values())
+
+def test_encode_decode_roundtrip():
+    """Arguments survive ARC-4 encoding; dynamic values carry a length prefix"""
+    _, addr = account.generate_account()
+    args = encode_args("issue", "edu-1", addr, 2, bytes(range(32)), 0, bytes(32), 7)
+
+    assert args[0] == SELECTORS["issue"]
+    assert args[1] == b"\x00\x05edu-1"
+    name, values = decode_args(args)
+    assert name == "issue"
+    assert values[0] == "edu-1" and values[3] == bytes(range(32)) and values[6] == 7
+    assert decode_args([b"unknown"]) == (None, [])
+
+def test_index_parses_arc4_calls():
+    """The index finds cred_ids and bitmap serials in ARC-4 encoded calls"""
+    batch = b"".join(encode_batch_record(c, bytes(32), 2, bytes(32), 0, bytes(32), 1) for c in (b"a", b"bc"))
+
+    assert touched_cred_ids(encode_args("issue_batch", batch)) == [b"a", b"bc"]
+    assert touched_cred_ids(encode_args("revoke", "a")) == [b"a"]
+    migrated = encode_migrate_entry(b"m-1", b"\x03" * 100) + encode_migrate_entry(b"m-22", b"\x03" * 104)
+    assert touched_cred_ids(encode_args("migrate", migrated)) == [b"m-1", b"m-22"]
+    assert revoked_serials(encode_args("revoke_batch", 2, b"\x00\x05\x00\x07")) == [2 * BITS_PER_PAGE + 5, 2 * BITS_PER_PAGE + 7]
+
+def test_inner_txn_fee_pooling():
+    """issue_with_nft pays for its inner mint; other methods keep the suggested fee"""
+    sp = transaction.SuggestedParams(0, 1, 1000, "A" * 44, min_fee=1000)
+    pooled = call_params(sp, "issue_with_nft")
+
+    assert pooled.flat_fee and pooled.fee == 2000
+    assert call_params(sp, "issue") is sp and not sp.flat_fee
+
+def test_budget_calls_cover_full_issue_groups():
+    """Groups of full issue_batch calls get enough budget calls and still fit in one group"""
+    calls = methods.ISSUE_CALLS_PER_GROUP
+    cost = calls * methods.call_cost("issue_batch", methods.MAX_BOX_REFS)
+    pads = methods.budget_calls(cost, calls)
+
+    assert methods.call_cost("issue_batch", methods.MAX_BOX_REFS) > methods.APP_CALL_BUDGET
+    assert calls + pads <= methods.MAX_GROUP_SIZE
+    assert (calls + pads) * methods.APP_CALL_BUDGET >= cost + pads * methods.BUDGET_CALL_COST
+    assert methods.budget_calls(methods.call_cost("revoke_batch", 16), 1) == 0
+
+def test_budget_calls_are_distinct():
+    """Budget calls carry no arguments and differ by note, so their txids differ"""
+    _, addr = account.generate_account()
+    sp = transaction.SuggestedParams(0, 1, 1000, "A" * 44, min_fee=1000)
+    call = methods.app_call(1, addr, sp, "issue_batch", b"")
+    txns = methods.with_budget([call], 1, addr, sp, 3 * methods.APP_CALL_BUDGET)
+
+    assert len(txns) == 4 and txns[0] is call
+    assert all(not t.app_args for t in txns[1:])
+    assert len({t.get_txid() for t in txns}) == 4
+
+def test_call_costs_cover_the_measured_baseline():
+    """Every CALL_COSTS entry is at least the measured cost of its bench group, budget calls included"""
+    with open(BASELINE) as f:
+        measured = json.load(f)["methods"]
+    checked = set()
+    for scenario, costs in measured.items():
+        match = re.fullmatch(r"(\w+)_x(\d+)", scenario)
+        if match and match.group(1) in methods.CALL_COSTS:
+            name, items = match.group(1), int(match.group(2))
+            assert methods.call_cost(name, items) >= costs["opcode_cost"], scenario
+            checked.add(name)
+    assert checked == set(methods.CALL_COSTS)
@@ -0,0 +1,76 @@
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding, transaction
+
+from src.credential_index import CredentialIndex
+from src.methods import APP_CALL_BUDGET, MAX_BOX_REFS, MAX_GROUP_SIZE, call_cost, decode_args
+from src.migrate import CALLS_PER_GROUP, Migrator, migrate_builder, pack_migrate_calls
+from src.record import CompactRecord, CredentialRecord, iter_migrate_entries
+from src.revocation import PAGE_BYTES, locate, page_name
+from tests.test_credential_index import ALICE, BOB, FakeChain
+
+ADMIN = account.generate_account()[1]
+SP = transaction.SuggestedParams(1000, 1, 1000, "A" * 44, "test")
+
+def v2_box(serial, cid=b""):
+    return CredentialRecord.encode(encoding.decode_address(BOB), encoding.decode_address(ALICE), 2, bytes(32), 100,
+                                   5000, False, cid.ljust(32, b"\x00"), 9, serial)
+
+class RecordingSubmitter:
+    """Runs each builder at once; add_issuer calls register the address on the fake chain"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.calls = []
+
+    def submit(self, build, label=None):
+        for txn in build(SP):
+            name, values = decode_args(txn.app_args)
+            self.calls.append((name, values, [b.name for b in txn.boxes]))
+            if name == "add_issuer":
+                self.chain.issuers[len(self.chain.issuers)] = encoding.decode_address(values[0])
+        future = Future()
+        future.set_result({"txids": []})
+        return future
+
+def test_migrates_v2_boxes_as_compact_records(tmp_path):
+    """Issuers are registered once, bitmap revocations are folded in and existing boxes are skipped"""
+    page, bit = locate(2)
+    bitmap = bytearray(PAGE_BYTES)
+    bitmap[bit // 8] |= 0x80 >> (bit % 8)
+    boxes = {f"c-{n}".encode(): v2_box(n + 1, cid=b"bafy" if n == 0 else b"") for n in range(10)}
+    boxes[page_name(page)] = bytes(bitmap)
+    source = CredentialIndex(str(tmp_path / "v2.sqlite"), 1, FakeChain(boxes), FakeChain(boxes))
+    source.load_all()
+    dst = FakeChain({}, issuers={0: encoding.decode_address(ADMIN)})
+    submitter = RecordingSubmitter(dst)
+
+    migrator = Migrator(source, dst, 2, submitter, ADMIN, page_size=3)
+    assert migrator.run(existing=[b"c-9"]) == 9
+
+    assert [c[0] for c in submitter.calls] == ["add_issuer", "migrate", "migrate"]
+    records = dict(entry for _, values, _ in submitter.calls[1:] for entry in iter_migrate_entries(values[0]))
+    assert sorted(records) == [f"c-{n}".encode() for n in range(9)]
+    recs = {cred_id: CompactRecord(rec) for cred_id, rec in records.items()}
+    assert {r.issuer_idx for r in recs.values()} == {1}
+    assert recs[b"c-1"].revoked == 1 and recs[b"c-0"].revoked == 0
+    assert bytes(recs[b"c-0"].cid_pointer) == b"bafy"
+    assert migrator.bytes_after == 9 * 100 + 4
+    assert migrator.mbr_saved == 400 * (9 * 169 - migrator.bytes_after)
+
+def test_calls_respect_box_and_arg_limits():
+    entries = [(b"x" * 64, b"\x00" * 300)] * 10
+    assert [len(call) for call in pack_migrate_calls(entries)] == [6, 4]
+
+def test_full_groups_carry_budget_calls():
+    """Full migrate calls cost more than their own budget, so each group is padded within 16 txns"""
+    group_calls = [[(f"c-{i}-{n}".encode(), b"\x00" * 10) for n in range(MAX_BOX_REFS)] for i in range(CALLS_PER_GROUP)]
+    txns = migrate_builder(5, ADMIN, group_calls)(SP)
+
+    assert len(txns) <= MAX_GROUP_SIZE
+    assert len(txns) * APP_CALL_BUDGET >= CALLS_PER_GROUP * call_cost("migrate", MAX_BOX_REFS)
+    assert [decode_args(t.app_args)[0] for t in txns[CALLS_PER_GROUP:]] == [None] * (len(txns) - CALLS_PER_GROUP)
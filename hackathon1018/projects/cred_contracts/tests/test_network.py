@@ -0,0 +1,63 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk.error import AlgodHTTPError
+
+from src.network import Network, PooledAlgodClient
+
+class FakeAlgod(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+
+    def do_GET(self):
+        FakeAlgod.connections.add(self.client_address)
+        if self.path == "/v2/status":
+            self.reply(200, {"last-round": 7})
+        elif self.path == "/v2/transactions/params":
+            self.reply(200, {"consensus-version": "v", "fee": 0, "genesis-hash": "A" * 44,
+                             "genesis-id": "test", "last-round": 7, "min-fee": 1000})
+        else:
+            self.reply(404, {"message": "not found"})
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), FakeAlgod)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    FakeAlgod.connections = set()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+def test_pooled_client_reuses_connection(server):
+    """Sequential requests share one keep-alive connection; HTTP errors map to AlgodHTTPError"""
+    client = PooledAlgodClient("a" * 64, server)
+    assert [client.status()["last-round"] for _ in range(3)] == [7, 7, 7]
+    with pytest.raises(AlgodHTTPError) as e:
+        client.application_box_by_name(1, b"missing")
+
+    assert e.value.code == 404
+    assert len(FakeAlgod.connections) == 1
+
+def test_network_is_lazy_and_caches_params(server, monkeypatch):
+    """No client exists before first use; suggested params are reused within a round"""
+    monkeypatch.setenv("ALGOD_SERVER", server)
+    net = Network("localnet")
+    assert net._algod is None
+
+    first = net.suggested_params()
+    assert net.suggested_params() is first
+    assert net.suggested_params(refresh=True) is not first
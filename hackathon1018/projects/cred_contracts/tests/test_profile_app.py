@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("algokit_utils")
+
+from algosdk import account
+
+from bench.profile_app import METRICS, compare, scenarios, setup, simulate
+from src import merkle
+from src.deploy_localnet import NET, get_deployer_account
+
+BASELINE = os.path.join(os.path.dirname(__file__), "..", "bench", "baseline_costs.json")
+
+def load_baseline():
+    with open(BASELINE) as f:
+        return json.load(f)
+
+def test_baseline_covers_every_scenario():
+    tree = merkle.MerkleTree([bytes(32)] * 16)
+    baseline = load_baseline()["methods"]
+    assert sorted(baseline) == sorted(scenarios(1, account.generate_account()[1], tree))
+    assert all(set(METRICS) <= set(costs) for costs in baseline.values())
+
+def test_compare_flags_growth_over_threshold():
+    baseline = load_baseline()
+    current = json.loads(json.dumps(baseline))
+    assert compare(baseline, current, 0.05) == []
+
+    current["methods"]["issue_batch_x8"]["opcode_cost"] = int(baseline["methods"]["issue_batch_x8"]["opcode_cost"] * 1.1)
+    current["methods"]["revoke"]["fee"] = baseline["methods"]["revoke"]["fee"] * 2
+    current["methods"]["get"]["opcode_cost"] -= 10
+    regressions = compare(baseline, current, 0.05)
+    assert [r.split(":")[0] for r in regressions] == ["issue_batch_x8.opcode_cost", "revoke.fee"]
+
+def test_no_regressions_against_baseline():
+    """Profiles every method on LocalNet; refresh the baseline with --out after an intended change"""
+    try:
+        NET.algod.status()
+    except Exception:
+        pytest.skip("LocalNet is not running")
+    admin = get_deployer_account()
+    app_id, tree = setup(admin.private_key, admin.address)
+    report = {"methods": {
+        method: simulate(app_id, admin.address, calls) for method, calls in scenarios(app_id, admin.address, tree).items()
+    }}
+    assert compare(load_baseline(), report, 0.05) == []
@@ -0,0 +1,138 @@
+import pytest
+from src.record import (
+    COMPACT_MAX_SIZE,
+    COMPACT_OFFSETS,
+    COMPACT_SIZE,
+    LEGACY_RECORD_SIZE,
+    OFFSETS,
+    RECORD_SIZE,
+    CompactRecord,
+    CredentialRecord,
+    decode_record,
+    encode_batch_record,
+    is_record_size,
+    iter_batch_records,
+    iter_records,
+)
+
+def make_box(revoked=0, expires_at=2_000_000_000, nft_asa_id=1234, serial=5):
+    return CredentialRecord.encode(
+        b"I" * 32, b"S" * 32, 2, b"H" * 32, 1_700_000_000, expires_at, revoked, b"bafy".ljust(32, b"\x00"), nft_asa_id, serial
+    )
+
+def test_layout_offsets():
+    """The layout matches the box written by issue()"""
+    assert RECORD_SIZE == 169
+    assert LEGACY_RECORD_SIZE == 161
+    assert OFFSETS["revoked"] == 120
+    assert OFFSETS["nft_asa_id"] == 153
+    assert OFFSETS["serial"] == 161
+
+def test_record_roundtrip():
+    """Encoded boxes decode to the same field values"""
+    box = make_box(revoked=1)
+    rec = CredentialRecord(box)
+
+    assert len(box) == RECORD_SIZE
+    assert rec.schema_code == 2
+    assert bytes(rec.cred_hash) == b"H" * 32
+    assert rec.expires_at == 2_000_000_000
+    assert rec.revoked == 1
+    assert rec.nft_asa_id == 1234
+    assert rec.serial == 5
+    assert rec.to_dict()["cid_pointer"] == b"bafy"
+    assert rec.is_expired(2_000_000_001)
+    assert not rec.is_expired(1_900_000_000)
+
+def test_record_is_a_view():
+    """Byte fields are views into the original buffer, not copies"""
+    buf = bytearray(make_box())
+    rec = CredentialRecord(buf)
+    buf[OFFSETS["revoked"]] = 1
+
+    assert isinstance(rec.cred_hash, memoryview)
+    assert rec.revoked == 1
+
+def test_iter_records():
+    """Concatenated boxes decode record by record"""
+    buf = make_box(nft_asa_id=1) + make_box(nft_asa_id=2) + make_box(nft_asa_id=3)
+
+    assert [r.nft_asa_id for r in iter_records(buf)] == [1, 2, 3]
+
+def test_legacy_record():
+    """Boxes issued before serials existed decode with serial 0"""
+    rec = CredentialRecord(make_box(nft_asa_id=77)[:LEGACY_RECORD_SIZE])
+
+    assert rec.nft_asa_id == 77
+    assert rec.serial == 0
+
+def test_short_record_rejected():
+    with pytest.raises(ValueError):
+        CredentialRecord(make_box()[:LEGACY_RECORD_SIZE - 1])
+
+def test_batch_record_roundtrip():
+    """issue_batch records pack and unpack symmetrically"""
+    blob = encode_batch_record(b"cred-1", b"S" * 32, 3, b"H" * 32, 99, b"\x00" * 32, 7)
+    blob += encode_batch_record(b"c2", b"T" * 32, 1, b"G" * 32, 0, b"bafy".ljust(32, b"\x00"), 8)
+
+    records = list(iter_batch_records(blob))
+    assert [cred_id for cred_id, _ in records] == [b"cred-1", b"c2"]
+    assert records[0][1]["schema_code"] == 3
+    assert records[0][1]["cid_pointer"] == b""
+    assert records[1][1]["nft_asa_id"] == 8
+    assert records[1][1]["cid_pointer"] == b"bafy"  # stored without padding
+
+def test_decode_array():
+    """NumPy decoding gives vectorized expiry and revocation masks"""
+    pytest.importorskip("numpy")
+    from src.record import decode_array, expired_mask, revoked_mask
+
+    buf = make_box(expires_at=10) + make_box(expires_at=0, revoked=1) + make_box(expires_at=30)
+    records = decode_array(buf)
+
+    assert list(expired_mask(records, 20)) == [True, False, False]
+    assert list(revoked_mask(records)) == [False, True, False]
+    assert list(records["nft_asa_id"]) == [1234, 1234, 1234]
+
+def make_compact(cid_pointer=b"bafy", revoked=0, issuer_idx=2):
+    return CompactRecord.encode(b"S" * 32, 2, b"H" * 32, 1_700_000_000, 2_000_000_000, revoked, cid_pointer, 1234, 5, issuer_idx)
+
+def test_decode_compact_array():
+    """v3 boxes of any CID length stack into the same vectorized masks"""
+    pytest.importorskip("numpy")
+    from src.record import decode_compact_array, expired_mask, revoked_mask
+
+    boxes = [make_compact(), make_compact(cid_pointer=b"", revoked=1), make_compact(cid_pointer=b"x" * 32, issuer_idx=7)]
+    records = decode_compact_array(boxes)
+
+    assert list(expired_mask(records, 2_000_000_001)) == [True, True, True] and not expired_mask(records, 20).any()
+    assert list(revoked_mask(records)) == [False, True, False]
+    assert list(records["issuer_idx"]) == [2, 2, 7] and list(records["serial"]) == [5, 5, 5]
+
+def test_compact_layout():
+    """v3 boxes are 100 bytes plus the unpadded CID, and never collide with v2 sizes"""
+    assert COMPACT_SIZE == 100
+    assert COMPACT_OFFSETS["revoked"] == 82
+    assert len(make_compact(b"")) == COMPACT_SIZE
+    assert len(make_compact(b"x" * 32)) == COMPACT_MAX_SIZE
+    assert not any(COMPACT_SIZE <= size <= COMPACT_MAX_SIZE for size in (RECORD_SIZE, LEGACY_RECORD_SIZE))
+    assert is_record_size(COMPACT_SIZE + 4) and not is_record_size(COMPACT_SIZE - 1)
+
+def test_compact_roundtrip():
+    """Compact records expose the same fields as v2, with issuer_idx instead of an address"""
+    rec = decode_record(make_compact(revoked=1))
+
+    assert isinstance(rec, CompactRecord)
+    assert (rec.version, rec.schema_code, rec.nft_asa_id, rec.serial, rec.issuer_idx) == (3, 2, 1234, 5, 2)
+    assert bytes(rec.cid_pointer) == b"bafy"
+    assert rec.revoked == 1
+    assert rec.to_dict()["expires_at"] == 2_000_000_000
+    assert isinstance(decode_record(make_box()), CredentialRecord)
+
+def test_compact_rejects_unknown_version():
+    box = bytearray(make_compact())
+    box[0] = 4
+    with pytest.raises(ValueError):
+        CompactRecord(box)
+    with pytest.raises(ValueError):
+        make_compact(b"x" * 33)
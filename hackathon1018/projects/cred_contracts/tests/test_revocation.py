@@ -0,0 +1,33 @@
+from src.revocation import (
+    BITS_PER_PAGE,
+    MAX_BITS_PER_CALL,
+    PAGE_BYTES,
+    bit_is_set,
+    locate,
+    pack_revoke_calls,
+    revoked_in_page,
+)
+
+def set_bits(serials):
+    page = bytearray(PAGE_BYTES)
+    for serial in serials:
+        _, bit = locate(serial)
+        page[bit // 8] |= 0x80 >> (bit % 8)
+    return bytes(page)
+
+def test_bitmap_roundtrip():
+    """Bits set for serials are found again when reading the page"""
+    page = set_bits([1, 9, BITS_PER_PAGE - 1])
+
+    assert list(revoked_in_page(0, page)) == [1, 9, BITS_PER_PAGE - 1]
+    assert bit_is_set(page, 9)
+    assert not bit_is_set(page, 10)
+
+def test_pack_revoke_calls():
+    """Serials are grouped per page and split to fit one app call"""
+    serials = list(range(1, MAX_BITS_PER_CALL + 3)) + [BITS_PER_PAGE + 5]
+    calls = list(pack_revoke_calls(serials))
+
+    assert [page for page, _ in calls] == [0, 0, 1]
+    assert len(calls[0][1]) == MAX_BITS_PER_CALL * 2
+    assert calls[2][1] == (5).to_bytes(2, "big")
@@ -0,0 +1,88 @@
+import base64
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding, transaction
+
+from bench.localchain import LocalChain
+from src import methods
+from src.record import CompactRecord, encode_batch_record
+from src.shards import Shard, ShardMap, ShardedRegistry, hash_route
+
+SK, ADDR = account.generate_account()
+OTHER = account.generate_account()[1]
+
+def test_hash_and_prefix_routing():
+    shards = [Shard("edu", 1, ADDR), Shard("visa", 2, ADDR), Shard("cert", 3, ADDR)]
+    by_hash = ShardMap(shards)
+    assert by_hash.route("edu-1") is shards[hash_route("edu-1", 3)]
+    parts = by_hash.partition([f"c-{i}" for i in range(300)])
+    assert sum(map(len, parts.values())) == 300 and len(parts) == 3
+    assert all(by_hash.route(c) is shard for shard, part in parts.items() for c in part)
+
+    by_prefix = ShardMap(shards, "prefix")
+    assert by_prefix.route("visa-2024-7").name == "visa"
+    assert by_prefix.route("misc-1") is shards[hash_route("misc-1", 3)]
+    with pytest.raises(ValueError):
+        ShardMap(shards, "range")
+
+def test_shard_map_json_round_trip(tmp_path):
+    path = str(tmp_path / "artifacts" / "shards.json")
+    ShardMap([Shard("a", 10, ADDR), Shard("b", 11, OTHER)], "prefix").save(path, network="localnet")
+    loaded = ShardMap.load(path)
+    assert loaded.strategy == "prefix"
+    assert loaded.shards == [Shard("a", 10, ADDR), Shard("b", 11, OTHER)]
+
+def issue_builder(app_id, cred_id):
+    rec = encode_batch_record(cred_id.encode(), encoding.decode_address(ADDR), 2, bytes(32), 0, b"", 0)
+    return lambda sp: [methods.app_call(app_id, ADDR, sp, "issue_batch", rec, boxes=[cred_id.encode()])]
+
+def test_submit_all_runs_each_shard_with_its_admin():
+    """Only app 1 is modelled by the stand-in chain, so its boxes show what was routed there"""
+    chain = LocalChain(ADDR, round_time=0.05)
+    registry = ShardedRegistry(chain, ShardMap([Shard("a", 1, ADDR), Shard("b", 2, ADDR)]), {ADDR: SK}, 4)
+    cred_ids = [f"c-{i}" for i in range(40)]
+    try:
+        parts = registry.map.partition(cred_ids)
+        work = {shard: [(c, issue_builder(shard.app_id, c)) for c in part] for shard, part in parts.items()}
+        results = registry.submit_all(work)
+    finally:
+        chain.close()
+    assert registry._failures(results) == {"a": 0, "b": 0}
+    assert sorted(chain.boxes) == sorted(c.encode() for c in parts[registry.map.shards[0]])
+    assert CompactRecord(next(iter(chain.boxes.values()))).subject == encoding.decode_address(ADDR)
+
+def test_submit_all_needs_every_admin_key():
+    registry = ShardedRegistry(None, ShardMap([Shard("a", 1, ADDR), Shard("b", 2, OTHER)]), {ADDR: SK})
+    with pytest.raises(KeyError):
+        registry.submit_all({shard: [] for shard in registry.map.shards})
+
+class PerAppSimulator:
+    """verify_batch answers with the app id as verdict bits for every entry"""
+
+    def __init__(self):
+        self.senders = set()
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(1000, 1, 1000, "A" * 44, "test")
+
+    def simulate_transactions(self, request):
+        results = []
+        for stx in request.txn_groups[0].txns:
+            self.senders.add(stx.transaction.sender)
+            bits = bytes([stx.transaction.index]) * len(stx.transaction.boxes)
+            ret = methods.RETURN_PREFIX + len(bits).to_bytes(2, "big") + bits
+            results.append({"txn-result": {"logs": [base64.b64encode(ret).decode()]}})
+        return {"txn-groups": [{"txn-results": results}]}
+
+def test_verify_many_asks_the_owning_shard():
+    algod = PerAppSimulator()
+    shard_map = ShardMap([Shard("a", methods.VERDICT_FOUND, ADDR), Shard("b", methods.VERDICT_VALID, OTHER)])
+    cred_ids = [f"c-{i}" for i in range(50)]
+    verdicts = ShardedRegistry(algod, shard_map).verify_many(cred_ids, [bytes(32)] * 50)
+
+    assert [v.cred_id for v in verdicts] == cred_ids
+    assert [v.valid for v in verdicts] == [shard_map.route(c).name == "b" for c in cred_ids]
+    assert algod.senders == {ADDR, OTHER}
@@ -0,0 +1,109 @@
+# Opcode budget checks against the real contract
+# Each test simulates groups on LocalNet (algokit localnet start); the module is
+# skipped when no LocalNet is reachable.
+import pytest
+
+pytest.importorskip("algokit_utils")
+
+from algosdk import encoding, transaction
+from algosdk.v2client import models
+
+from src import methods
+from src.artifact_cache import get_programs
+from src.builders import issue_batch_builder, pack_issue_calls, read_serial, revoke_builder
+from src.deploy_localnet import NET, get_deployer_account
+from src.migrate import CALLS_PER_GROUP, migrate_builder, pack_migrate_calls
+from src.record import CompactRecord, encode_migrate_entry
+from src.shards import create_registry
+
+try:
+    NET.algod.status()
+except Exception:
+    pytest.skip("LocalNet is not running", allow_module_level=True)
+
+@pytest.fixture(scope="module")
+def app():
+    admin = get_deployer_account()
+    approval, clear = get_programs(NET.algod)
+    return create_registry(NET.algod, admin, approval, clear, fund=10_000_000), admin
+
+def simulate(txns, admin):
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    request = models.SimulateRequest(txn_groups=[
+        models.SimulateRequestTransactionGroup(txns=[txn.sign(admin.private_key) for txn in txns]),
+    ])
+    return NET.algod.simulate_transactions(request)["txn-groups"][0]
+
+def send(txns, admin):
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    txid = NET.algod.send_transactions([txn.sign(admin.private_key) for txn in txns])
+    transaction.wait_for_confirmation(NET.algod, txid, 4)
+
+def creds(prefix, count, admin):
+    return [{
+        "cred_id": f"{prefix}-{n}", "subject": admin.address, "schema_code": 2, "cred_hash": "ab" * 32,
+        "expires_at": 0, "nft_asa_id": 0, "cid_pointer": "bafy" * 8,
+    } for n in range(count)]
+
+def test_full_issue_batch_call_needs_budget_calls(app):
+    """One 8-record call is over its own budget alone and passes with the builder's budget calls"""
+    app_id, admin = app
+    sp = NET.suggested_params(refresh=True)
+    call = next(pack_issue_calls(creds("sim-one", methods.MAX_BOX_REFS, admin)))
+    assert len(call) == methods.MAX_BOX_REFS
+
+    bare = methods.app_call(app_id, admin.address, sp, "issue_batch", b"".join(r for _, r in call),
+                            boxes=[c.encode() for c, _ in call])
+    assert "budget" in simulate([bare], admin).get("failure-message", "")
+
+    result = simulate(issue_batch_builder(app_id, admin.address, [call])(sp), admin)
+    assert not result.get("failure-message")
+    consumed = result["txn-results"][0]["app-budget-consumed"]
+    assert consumed <= methods.call_cost("issue_batch", len(call))
+
+def test_full_issue_group_fits_pooled_budget(app):
+    """ISSUE_CALLS_PER_GROUP full calls plus their budget calls stay within one group"""
+    app_id, admin = app
+    sp = NET.suggested_params(refresh=True)
+    group_calls = list(pack_issue_calls(creds("sim-group", methods.MAX_BOX_REFS * methods.ISSUE_CALLS_PER_GROUP, admin)))
+    txns = issue_batch_builder(app_id, admin.address, group_calls)(sp)
+
+    assert len(group_calls) == methods.ISSUE_CALLS_PER_GROUP
+    assert len(txns) <= methods.MAX_GROUP_SIZE
+    result = simulate(txns, admin)
+    assert not result.get("failure-message")
+    assert result["app-budget-consumed"] <= result["app-budget-added"]
+
+def test_full_migrate_group_fits_pooled_budget(app):
+    """migrate.CALLS_PER_GROUP full calls plus their budget calls stay within one group"""
+    app_id, admin = app
+    sp = NET.suggested_params(refresh=True)
+    rec = CompactRecord.encode(encoding.decode_address(admin.address), 2, bytes(32), 0, 0, 0, b"bafy", 0, 0, 0)
+    entries = [(f"sim-mig-{n}".encode(), encode_migrate_entry(f"sim-mig-{n}".encode(), rec))
+               for n in range(methods.MAX_BOX_REFS * CALLS_PER_GROUP)]
+    group_calls = list(pack_migrate_calls(entries))
+    txns = migrate_builder(app_id, admin.address, group_calls)(sp)
+
+    assert len(group_calls) == CALLS_PER_GROUP and len(txns) <= methods.MAX_GROUP_SIZE
+    result = simulate(txns, admin)
+    assert not result.get("failure-message")
+    assert result["txn-results"][0]["app-budget-consumed"] <= methods.call_cost("migrate", methods.MAX_BOX_REFS)
+
+def test_reissue_keeps_serial_and_refuses_revoked(app):
+    """A reissued credential keeps its serial; revoked credentials and NUL-prefixed ids are rejected"""
+    app_id, admin = app
+    sp = NET.suggested_params(refresh=True)
+    live, revoked = creds("sim-reissue", 2, admin)
+    send(issue_batch_builder(app_id, admin.address, list(pack_issue_calls([live, revoked])))(sp), admin)
+    send(revoke_builder(app_id, admin.address, revoked["cred_id"])(sp), admin)
+    serial = read_serial(NET.algod, app_id, live["cred_id"])
+
+    send(issue_batch_builder(app_id, admin.address, list(pack_issue_calls([live])))(sp), admin)
+    assert read_serial(NET.algod, app_id, live["cred_id"]) == serial
+    again = issue_batch_builder(app_id, admin.address, list(pack_issue_calls([revoked])))(sp)
+    assert "assert failed" in simulate(again, admin).get("failure-message", "")
+    reserved = methods.app_call(app_id, admin.address, sp, "issue", "\x00rev-1", admin.address, 2, bytes(32), 0, b"", 0,
+                                boxes=[b"\x00rev-1"])
+    assert "assert failed" in simulate([reserved], admin).get("failure-message", "")
@@ -0,0 +1,83 @@
+import base64
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, encoding, transaction
+
+from src import methods
+from src.credential_index import CredentialIndex
+from src.record import CompactRecord
+from src.snapshot import BinarySnapshot, diff, export_index, import_snapshot, open_snapshot, write_snapshot
+
+ALICE = account.generate_account()[1]
+BOB = account.generate_account()[1]
+SP = transaction.SuggestedParams(1000, 1, 1000, "A" * 44)
+
+def row(cred_id, subject=ALICE, issuer=BOB, revoked=0, cid=b"bafy"):
+    return (cred_id, issuer, subject, 2, bytes(range(32)), 100, 0, revoked, cid, 7, int(cred_id[2:]))
+
+ROWS = [row(f"c-{i:03}".encode(), revoked=int(i % 5 == 0), issuer=(ALICE, BOB)[i % 2]) for i in range(200)]
+
+def test_binary_round_trip(tmp_path):
+    path = str(tmp_path / "snap")
+    assert write_snapshot(path, ROWS, 9, 1234, "binary") == "binary"
+    with open_snapshot(path) as snap:
+        assert isinstance(snap, BinarySnapshot)
+        assert (snap.app_id, snap.round, len(snap)) == (9, 1234, 200)
+        assert list(snap.rows()) == ROWS
+        assert snap.get("c-137") == ROWS[137]
+        assert snap.get("c-1370") is None and snap.get("a") is None
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "snap.parquet")
+    assert write_snapshot(path, ROWS, 9, 1234) == "parquet"
+    with open_snapshot(path) as snap:
+        assert (snap.app_id, snap.round) == (9, 1234)
+        assert list(snap.rows()) == ROWS
+        assert snap.get("c-042") == ROWS[42]
+
+class FakeChain:
+    """algod + indexer stand-in with one issue() after the snapshot round"""
+
+    def __init__(self, box):
+        self.box = box
+        self.searches = []
+
+    def search_transactions(self, application_id, min_round, max_round, next_page=None):
+        self.searches.append((min_round, max_round))
+        args = methods.app_call(1, ALICE, SP, "issue", "c-900", ALICE, 2, bytes(32), 0, b"", 0).app_args
+        return {"transactions": [{"application-transaction": {
+            "application-args": [base64.b64encode(a).decode() for a in args]}}]}
+
+    def application_box_by_name(self, app_id, name):
+        return {"value": base64.b64encode(self.box).decode()}
+
+    def application_info(self, app_id):
+        return {"params": {"global-state": []}}
+
+def test_import_catches_up_from_snapshot_round(tmp_path):
+    source = CredentialIndex(":memory:", 1, None)
+    source.restore(ROWS, 50)
+    path = str(tmp_path / "snap")
+    assert export_index(source, path, "binary") == ("binary", 50)
+
+    record = CompactRecord.encode(encoding.decode_address(ALICE), 2, bytes(32), 60, 0, False, b"", 0, 900)
+    chain = FakeChain(record)
+    index = CredentialIndex(str(tmp_path / "new.sqlite"), 1, chain, chain)
+    index._issuers = {0: encoding.decode_address(BOB)}
+    assert import_snapshot(path, index) == 50
+    index.catch_up(80)
+
+    assert chain.searches == [(51, 80)]
+    assert index.synced_round == 80
+    assert index.get("c-137")["revoked"] == 0 and index.get("c-135")["revoked"] == 1
+    assert index.get("c-900")["issuer"] == BOB
+    with pytest.raises(ValueError):
+        import_snapshot(path, CredentialIndex(":memory:", 2, None))
+
+def test_diff():
+    new = ROWS[1:51] + [ROWS[51][:7] + (1,) + ROWS[51][8:]] + ROWS[52:] + [row(b"c-999")]
+    assert list(diff(ROWS, new)) == [("removed", b"c-000"), ("changed", b"c-051"), ("added", b"c-999")]
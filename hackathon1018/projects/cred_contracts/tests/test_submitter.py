@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, transaction
+from algosdk.error import AlgodHTTPError
+
+from src.submitter import Submitter
+
+SK, ADDR = account.generate_account()
+
+class FakeAlgod:
+    """A chain that confirms each sent group in the next round
+
+    The first drop sends are accepted but never land, so they expire; the first dead
+    sends are rejected with "txn dead". Groups stay valid for three rounds.
+    """
+
+    def __init__(self, drop=0, dead=0):
+        self.round = 1
+        self.blocks = {}
+        self.drop = drop
+        self.dead = dead
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def status(self):
+        return {"last-round": self.round}
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(1000, self.round, self.round + 3, "A" * 44, "test", flat_fee=True)
+
+    def send_transactions(self, stxns):
+        with self.lock:
+            if self.dead:
+                self.dead -= 1
+                raise AlgodHTTPError("TransactionPool.Remember: txn dead: round 9 outside of 1--4")
+            self.sent.append(stxns[0].get_txid())
+            if self.drop:
+                self.drop -= 1
+                return
+            self.blocks.setdefault(self.round + 1, []).extend(stx.get_txid() for stx in stxns)
+
+    def status_after_block(self, rnd):
+        time.sleep(0.005)
+        with self.lock:
+            self.round = max(self.round, rnd + 1)
+            return {"last-round": self.round}
+
+    def get_block_txids(self, rnd):
+        return {"blockTxids": self.blocks.get(rnd, [])}
+
+def payment(n, builds=None):
+    def build(sp):
+        if builds is not None:
+            builds.append(sp.first)
+        return [transaction.PaymentTxn(ADDR, sp, ADDR, 0, note=b"group:%d" % n)]
+    return build
+
+def test_confirms_every_group():
+    algod = FakeAlgod()
+    with Submitter(algod, SK, max_in_flight=4) as submitter:
+        futures = [submitter.submit(payment(n), label=n) for n in range(10)]
+        results = [f.result(timeout=10) for f in futures]
+    assert [r["label"] for r in results] == list(range(10))
+    assert all(len(r["txids"]) == 1 and r["confirmed-round"] > 1 for r in results)
+    assert len(algod.sent) == 10
+
+def test_expired_groups_are_rebuilt_while_every_slot_is_taken():
+    """Both slots belong to groups that expire; the waiting third group must not block their retry"""
+    algod = FakeAlgod(drop=2)
+    builds = []
+    with Submitter(algod, SK, max_in_flight=2) as submitter:
+        futures = [submitter.submit(payment(n, builds)) for n in range(3)]
+        results = [f.result(timeout=10) for f in futures]
+    assert len(algod.sent) == 5 and len(builds) == 5
+    assert len({r["txids"][0] for r in results}) == 3
+
+def test_gives_up_after_max_retries():
+    algod = FakeAlgod(drop=3)
+    with Submitter(algod, SK, max_in_flight=1, max_retries=2) as submitter:
+        future = submitter.submit(payment(0))
+        with pytest.raises(RuntimeError, match="expired after 3 attempts"):
+            future.result(timeout=10)
+        assert submitter.submit(payment(1)).result(timeout=10)["confirmed-round"]
+
+def test_txn_dead_rebuilds_with_fresh_params():
+    algod = FakeAlgod(dead=1)
+    builds = []
+    with Submitter(algod, SK) as submitter:
+        result = submitter.submit(payment(0, builds)).result(timeout=10)
+    assert len(builds) == 2 and algod.sent == result["txids"]
+
+def test_in_flight_groups_are_bounded():
+    algod = FakeAlgod()
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, highest
+
+    def build(n):
+        inner = payment(n)
+
+        def counted(sp):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            return inner(sp)
+        return counted
+
+    def settled(_):
+        with lock:
+            in_flight[0] -= 1
+
+    with Submitter(algod, SK, max_in_flight=3, queue_size=2) as submitter:
+        futures = []
+        for n in range(20):
+            futures.append(submitter.submit(build(n)))
+            futures[-1].add_done_callback(settled)
+        assert all(f.result(timeout=10)["confirmed-round"] for f in futures)
+    assert in_flight[1] <= 3
@@ -0,0 +1,104 @@
+import io
+import json
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, transaction
+
+from src.credential_index import CredentialIndex
+from src.methods import APP_CALL_BUDGET, MAX_BOX_REFS, MAX_GROUP_SIZE, call_cost, decode_args
+from src.record import iter_cred_ids
+from src.revocation import locate, page_name
+from src.sweeper import CALLS_PER_GROUP, ExpirySweeper, box_mbr, pack_sweep_calls, sweep_builder
+from tests.test_credential_index import ALICE, FakeChain, record
+
+ADMIN = account.generate_account()[1]
+SP = transaction.SuggestedParams(1000, 1, 1000, "A" * 44, "test")
+
+class FakeSubmitter:
+    """Builds each group and resolves it at once, failing groups that touch a poisoned cred_id"""
+
+    def __init__(self, poisoned=()):
+        self.groups = []
+        self.poisoned = set(poisoned)
+
+    def submit(self, build, label=None):
+        txns = build(SP)
+        self.groups.append(txns)
+        future = Future()
+        ids = [c for t in txns if t.app_args for c in iter_cred_ids(decode_args(t.app_args)[1][0])]
+        if self.poisoned & set(ids):
+            future.set_exception(RuntimeError("logic eval error"))
+        else:
+            future.set_result({"txids": [t.get_txid() for t in txns]})
+        return future
+
+@pytest.fixture
+def index(tmp_path):
+    boxes = {f"x-{n}".encode(): record(ALICE, n + 1, expires_at=100 + n) for n in range(10)}
+    boxes[b"later"] = record(ALICE, 20, expires_at=10_000)
+    boxes[b"never"] = record(ALICE, 21)
+    boxes[b"gone"] = record(ALICE, 22)
+    page, bit = locate(22)
+    bitmap = bytearray(1024)
+    bitmap[bit // 8] |= 0x80 >> (bit % 8)
+    boxes[page_name(page)] = bytes(bitmap)
+    chain = FakeChain(boxes)
+    idx = CredentialIndex(str(tmp_path / "idx.sqlite"), 1, chain, chain)
+    idx.load_all()
+    return idx
+
+def test_sweeps_due_credentials_in_batches(index):
+    """Only expired credentials are swept, 8 box references per call, and the freed MBR adds up"""
+    submitter = FakeSubmitter()
+    sweeper = ExpirySweeper(index, submitter, ADMIN, margin=0)
+    swept, reclaimed = sweeper.sweep_once(now=1000)
+
+    calls = [t for group in submitter.groups for t in group]
+    assert swept == 10
+    assert [len(t.boxes) for t in calls] == [MAX_BOX_REFS, 2]
+    assert reclaimed == sum(box_mbr(f"x-{n}".encode(), b"") for n in range(10))
+    assert index.get("x-0") is None and index.get("later") is not None and index.get("gone") is not None
+    assert sweeper.sweep_once(now=1000) == (0, 0)
+
+def test_reissued_and_failed_entries_are_skipped(index):
+    """A credential reissued with a new expiry is left alone; a failed group keeps its rows"""
+    sweeper = ExpirySweeper(index, FakeSubmitter(poisoned=[b"x-1"]), ADMIN, margin=0)
+    sweeper.scan(now=0)
+    index.db.execute("UPDATE credentials SET expires_at = 5000 WHERE cred_id = ?", (b"x-0",))
+
+    swept, _ = sweeper.sweep_once(now=1000)
+    assert swept == 0  # all nine due credentials fit one group, which failed
+    assert index.get("x-0")["expires_at"] == 5000 and index.get("x-1") is not None
+
+def test_revoked_need_an_archive(index):
+    """Revoked credentials are swept with their bitmap page referenced, after being archived"""
+    assert ExpirySweeper(index, FakeSubmitter(), ADMIN).sweep_once(now=50) == (0, 0)
+
+    archive = io.StringIO()
+    submitter = FakeSubmitter()
+    swept, _ = ExpirySweeper(index, submitter, ADMIN, archive=archive).sweep_once(now=50)
+
+    assert swept == 1
+    assert submitter.groups[0][0].boxes[1].name == page_name(locate(22)[0])
+    assert json.loads(archive.getvalue())["cred_id"] == b"gone".hex()
+
+def test_pages_are_shared_within_a_call():
+    """Credentials on the same bitmap page share one box reference"""
+    entries = [(f"r-{n}".encode(), b"page") for n in range(7)] + [(b"plain", None)]
+    calls = list(pack_sweep_calls(entries))
+
+    assert [len(boxes) for _, boxes in calls] == [8, 1]
+    assert calls[0][1].count(b"page") == 1
+
+def test_full_groups_carry_budget_calls():
+    """Seven revoked credentials sharing a bitmap page cost more than one call's budget"""
+    group_calls = list(pack_sweep_calls((f"r-{n}".encode(), b"page") for n in range(7 * CALLS_PER_GROUP)))
+    txns = sweep_builder(5, ADMIN, group_calls)(SP)
+
+    assert len(group_calls) == CALLS_PER_GROUP and len(txns) <= MAX_GROUP_SIZE
+    assert len(txns) * APP_CALL_BUDGET >= sum(call_cost("sweep", len(ids)) for ids, _ in group_calls)
+    assert not any(t.app_args for t in txns[CALLS_PER_GROUP:])
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from src import telemetry
+from src.telemetry import JsonLinesSink, Metrics, PrometheusSink, make_sink
+
+@pytest.fixture(autouse=True)
+def no_sink():
+    yield
+    telemetry.set_sink(None)
+
+def test_disabled_calls_are_noops():
+    assert not telemetry.enabled()
+    with telemetry.span("send", method="issue") as s:
+        s.set(txid="T")
+    assert telemetry.span("sign") is telemetry.span("send")
+    telemetry.count("calls_total")
+    telemetry.observe("box_bytes", 120)
+
+def test_jsonl_sink_records_spans_and_errors(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    telemetry.set_sink(JsonLinesSink(str(path)))
+    with telemetry.span("send", method="issue") as s:
+        s.set(txid="T")
+    with pytest.raises(RuntimeError):
+        with telemetry.span("wait_for_confirmation"):
+            raise RuntimeError("pool error")
+    telemetry.count("retries_total", reason="txn_dead")
+    telemetry.shutdown()
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(e["type"], e["name"]) for e in events] == [
+        ("span", "send"), ("span", "wait_for_confirmation"), ("counter", "retries_total"),
+    ]
+    assert events[0]["method"] == "issue" and events[0]["txid"] == "T" and events[0]["duration_s"] >= 0
+    assert events[1]["error"] == "RuntimeError"
+    assert events[2]["reason"] == "txn_dead"
+
+def test_prometheus_text():
+    m = Metrics()
+    m.count("groups_total", 2, {"result": "confirmed"})
+    m.count("groups_total", 1, {"result": "confirmed"})
+    for value in (0.02, 0.3, 99):
+        m.observe("confirm_seconds", value, {})
+    text = m.prometheus()
+    assert '# TYPE groups_total counter\ngroups_total{result="confirmed"} 3' in text
+    assert 'confirm_seconds_bucket{le="0.025"} 1' in text
+    assert 'confirm_seconds_bucket{le="0.5"} 2' in text
+    assert 'confirm_seconds_bucket{le="+Inf"} 3' in text
+    assert "confirm_seconds_count 3" in text
+
+def test_prometheus_sink_writes_on_close(tmp_path):
+    path = tmp_path / "cred.prom"
+    sink = make_sink(f"prom:{path}")
+    assert isinstance(sink, PrometheusSink) and not path.exists()
+    telemetry.set_sink(sink)
+    with telemetry.span("sign", method="revoke"):
+        pass
+    telemetry.observe("group_fee_microalgos", 2000)
+    telemetry.shutdown()
+    text = path.read_text()
+    assert 'sign_seconds_count{method="revoke"} 1' in text
+    assert 'group_fee_microalgos_bucket{le="2000"} 1' in text
+
+def test_prometheus_sink_rewrites_every_interval(tmp_path):
+    path = tmp_path / "cred.prom"
+    sink = PrometheusSink(str(path), interval=0)
+    sink.count("groups_total", 1, {"result": "failed"})
+    assert 'groups_total{result="failed"} 1' in path.read_text()
+    sink.count("groups_total", 2, {"result": "failed"})
+    assert 'groups_total{result="failed"} 3' in path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["cred.prom"]
+
+def test_unknown_sink():
+    with pytest.raises(ValueError):
+        make_sink("statsd:localhost")
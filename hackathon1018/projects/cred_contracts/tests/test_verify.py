@@ -0,0 +1,153 @@
+import base64
+
+import pytest
+
+pytest.importorskip("algosdk")
+
+from algosdk import account, transaction
+from algosdk.error import AlgodHTTPError
+
+from src import methods
+from src.record import CredentialRecord
+from src.revocation import PAGE_BYTES, locate, page_name
+from src.util import credential_digest
+from src.verify import CredentialVerifier, verify_onchain
+
+DOC = {"type": "EducationCredential", "credentialId": "edu-1", "subject": "student-1"}
+
+class FakeAlgod:
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.reads = []
+
+    def application_box_by_name(self, app_id, name):
+        self.reads.append(name)
+        if name not in self.boxes:
+            raise AlgodHTTPError("box not found", 404)
+        return {"value": base64.b64encode(self.boxes[name]).decode()}
+
+def box(expires_at=0, revoked=False, serial=0):
+    return CredentialRecord.encode(bytes(32), bytes(32), 1, credential_digest(DOC), 100, expires_at,
+                                   revoked, bytes(32), 7, serial)
+
+def test_verify_many_coalesces_and_caches():
+    """Duplicate cred_ids share one box read and later calls hit the cache"""
+    algod = FakeAlgod({b"edu-1": box()})
+    verifier = CredentialVerifier(algod, 1)
+
+    verdicts = verifier.verify_many(["edu-1", "edu-1", "missing"], [DOC, {"other": 1}, DOC])
+    assert [v.valid for v in verdicts] == [True, False, False]
+    assert verdicts[1].found and not verdicts[1].hash_match
+    assert not verdicts[2].found
+    assert sorted(algod.reads) == [b"edu-1", b"missing"]
+
+    verifier.verify("edu-1", credential_digest(DOC))
+    assert len(algod.reads) == 2
+
+    verifier.invalidate(["edu-1"])
+    verifier.verify("edu-1", DOC)
+    assert len(algod.reads) == 3
+
+def test_verify_expired_and_revoked():
+    """Expiry uses expires_at (0 = never) and the per-record revoked byte"""
+    algod = FakeAlgod({b"old": box(expires_at=50), b"gone": box(revoked=True)})
+    verdicts = CredentialVerifier(algod, 1).verify_many(["old", "gone"], [DOC, DOC], now=60)
+
+    assert verdicts[0].expired and not verdicts[0].revoked
+    assert verdicts[1].revoked and not verdicts[1].expired
+
+def test_lru_bound():
+    """The cache never holds more than max_entries records"""
+    algod = FakeAlgod({f"c{i}".encode(): box() for i in range(5)})
+    verifier = CredentialVerifier(algod, 1, max_entries=2)
+    verifier.verify_many([f"c{i}" for i in range(5)], [DOC] * 5)
+
+    assert len(verifier._cache) == 2
+
+def test_bitmap_pages_are_read_once_per_batch():
+    """Credentials sharing a bitmap page cost one page read, and its bits mark them revoked"""
+    page, bit = locate(3)
+    bitmap = bytearray(PAGE_BYTES)
+    bitmap[bit // 8] |= 0x80 >> (bit % 8)
+    boxes = {f"c{i}".encode(): box(serial=i) for i in range(1, 6)}
+    boxes[page_name(page)] = bytes(bitmap)
+    algod = FakeAlgod(boxes)
+    verdicts = CredentialVerifier(algod, 1).verify_many([f"c{i}" for i in range(1, 6)], [DOC] * 5)
+
+    assert [v.revoked for v in verdicts] == [False, False, True, False, False]
+    assert algod.reads.count(page_name(page)) == 1
+
+class InvalidatingAlgod(FakeAlgod):
+    """Runs on_read once, right after the first box read, like a revoke landing mid-fetch"""
+
+    def __init__(self, boxes, on_read):
+        super().__init__(boxes)
+        self.on_read = on_read
+
+    def application_box_by_name(self, app_id, name):
+        value = super().application_box_by_name(app_id, name)
+        on_read, self.on_read = self.on_read, lambda: None
+        on_read()
+        return value
+
+@pytest.mark.parametrize("by_serial", [False, True])
+def test_invalidation_during_fetch_is_not_overwritten(by_serial):
+    """A fetch that started before invalidate() answers its callers but is not cached"""
+    algod = InvalidatingAlgod({b"edu-1": box(serial=9)}, lambda: None)
+    verifier = CredentialVerifier(algod, 1)
+    algod.on_read = lambda: verifier.invalidate(serials=[9]) if by_serial else verifier.invalidate(["edu-1"])
+
+    assert verifier.verify("edu-1", DOC).valid
+    assert "edu-1" not in verifier._cache
+    verifier.verify("edu-1", DOC)
+    verifier.verify("edu-1", DOC)
+    assert algod.reads.count(b"edu-1") == 2 and not verifier._invalidated
+
+class FakeSimulator:
+    """Answers verify_batch simulate requests like the contract would (revoked byte only)"""
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.requests = []
+
+    def application_info(self, app_id):
+        return {"params": {"creator": account.generate_account()[1]}}
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(1000, 1, 1000, "A" * 44, "test")
+
+    def simulate_transactions(self, request):
+        self.requests.append(request)
+        results = []
+        for stx in request.txn_groups[0].txns:
+            name, (batch,) = methods.decode_args(stx.transaction.app_args)
+            assert name == "verify_batch" and len(stx.transaction.boxes) <= 8
+            bits, pos = b"", 0
+            while pos < len(batch):
+                cred_id = batch[pos + 1:pos + 1 + batch[pos]]
+                digest = batch[pos + 1 + len(cred_id):pos + 33 + len(cred_id)]
+                pos += 33 + len(cred_id)
+                rec = self.boxes.get(cred_id)
+                b = 0
+                if rec is not None:
+                    rec = CredentialRecord(rec)
+                    b = (methods.VERDICT_FOUND | methods.VERDICT_HASH_MATCH * (bytes(rec.cred_hash) == digest)
+                         | methods.VERDICT_REVOKED * rec.revoked)
+                bits += bytes([b])
+            ret = methods.RETURN_PREFIX + len(bits).to_bytes(2, "big") + bits
+            results.append({"txn-result": {"logs": [base64.b64encode(ret).decode()]}})
+        return {"txn-groups": [{"txn-results": results}]}
+
+def test_verify_onchain_batches_through_simulate():
+    """130 credentials take 2 simulated groups (16 calls x 8) and keep their order"""
+    boxes = {f"c{i}".encode(): box(revoked=i % 3 == 0) for i in range(130)}
+    algod = FakeSimulator(boxes)
+    cred_ids = [f"c{i}" for i in range(130)] + ["missing"]
+    verdicts = verify_onchain(algod, 1, cred_ids, [DOC] * 130 + [DOC])
+
+    assert len(algod.requests) == 2
+    assert algod.requests[0].allow_unnamed_resources
+    assert [v.cred_id for v in verdicts] == cred_ids
+    assert [v.valid for v in verdicts[:4]] == [False, True, True, False]
+    assert verdicts[0].revoked and verdicts[1].hash_match
+    assert not verdicts[-1].found
@@ -9,6 +9,16 @@ const CONTRACT_CONFIG = {
 // Cache for contract calls
 const contractCache = new Map<string, any>()
 
+// ARC-4 methods of the registry contract (see cred_contracts/src/methods.py)
+const ISSUE_METHOD = algosdk.ABIMethod.fromSignature('issue(string,address,uint8,byte[32],uint64,byte[],uint64)void')
+const REVOKE_METHOD = algosdk.ABIMethod.fromSignature('revoke(string)void')
+
+// Method selector followed by the ARC-4 encoded arguments
+const encodeMethodArgs = (method: algosdk.ABIMethod, values: algosdk.ABIValue[]): Uint8Array[] => [
+  method.getSelector(),
+  ...method.args.map((arg, i) => (arg.type as algosdk.ABIType).encode(values[i]))
+]
+
 // Create smart contract client
 export const getContractClient = (): algosdk.Algodv2 => {
   return new algosdk.Algodv2('', process.env.NEXT_PUBLIC_ALGOD_SERVER || 'http://localhost:4001', '')
@@ -48,16 +58,16 @@ export const issueCredentialContract = async (
     }
     
     // Prepare contract arguments
-    const appArgs: Uint8Array[] = [
-      new Uint8Array(Buffer.from('issue')), // Method name
-      new Uint8Array(Buffer.from(credentialId)), // Credential ID
-      new Uint8Array(algosdk.decodeAddress(subject).publicKey), // Subject address
-      new Uint8Array([schemaCode]), // Schema code
-      new Uint8Array(Buffer.from(hashHex, 'hex')), // Hash
-      new Uint8Array(new Uint8Array(new BigUint64Array([BigInt(expiresAt)]).buffer)), // Expires at
-      new Uint8Array(Buffer.from(cidPointer)), // CID pointer
-      new Uint8Array(new Uint8Array(new BigUint64Array([BigInt(nftAsaId)]).buffer)) // NFT ASA ID
-    ]
+    const cidBytes = new Uint8Array(Buffer.from(cidPointer).subarray(0, 32)) // CID pointer, stored unpadded
+    const appArgs = encodeMethodArgs(ISSUE_METHOD, [
+      credentialId,
+      subject,
+      schemaCode,
+      new Uint8Array(Buffer.from(hashHex, 'hex')),
+      BigInt(expiresAt),
+      cidBytes,
+      BigInt(nftAsaId)
+    ])
     
     // Create application call transaction
     const txn = algosdk.makeApplicationNoOpTxnFromObject({
@@ -130,10 +140,7 @@ export const revokeCredentialContract = async (
     }
     
     // Prepare contract arguments
-    const appArgs: Uint8Array[] = [
-      new Uint8Array(Buffer.from('revoke')), // Method name
-      new Uint8Array(Buffer.from(credentialId)) // Credential ID
-    ]
+    const appArgs = encodeMethodArgs(REVOKE_METHOD, [credentialId])
     
     // Create application call transaction
     const txn = algosdk.makeApplicationNoOpTxnFromObject({